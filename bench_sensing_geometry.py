@@ -0,0 +1,183 @@
+"""
+IoU 추적 / 손-박스 거리 판단 마이크로 벤치마크
+
+- 합성 프레임(컵 / 공부 물체 후보 N 개씩 + 추적 중인 박스 + 손 랜드마크 21개)을 만들고
+- 예전 방식(calculate_iou / calculate_distance_to_bbox 를 컵 / 공부 물체 후보마다 Python 루프)과
+  HOIDetector 의 벡터화 방식(프레임당 IoU 행렬 한 번 + 랜드마크-박스 거리 행렬 한 번)을 비교
+- 두 방식의 판단 결과가 같은지 확인한 뒤 프레임당 비용(µs)을 출력
+
+실행: python bench_sensing_geometry.py [프레임 수]
+"""
+import sys
+import time
+import random
+from types import SimpleNamespace
+
+import numpy as np
+
+from sensing_geometry import (
+    box_array, iou_matrix, best_match, landmark_points, hand_box_distances, closest_within,
+)
+
+FRAMES = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000
+REPEAT = 5
+SIZES = [1, 3, 10, 30]   # 프레임당 컵 / 공부 물체 후보 수 (각각)
+IMG_W, IMG_H = 640, 480
+IOU_THRESHOLD = 0.3
+PROXIMITY_DISTANCE = 60
+KEY_LANDMARKS = [0, 4, 8, 12, 16, 20, 9]
+
+
+# ---------------- 예전 방식 (스칼라) ----------------
+
+def calculate_iou(box1, box2):
+    x1_1, y1_1, x2_1, y2_1 = box1
+    x1_2, y1_2, x2_2, y2_2 = box2
+
+    xi1 = max(x1_1, x1_2)
+    yi1 = max(y1_1, y1_2)
+    xi2 = min(x2_1, x2_2)
+    yi2 = min(y2_1, y2_2)
+
+    inter_area = max(0, xi2 - xi1) * max(0, yi2 - yi1)
+
+    box1_area = (x2_1 - x1_1) * (y2_1 - y1_1)
+    box2_area = (x2_2 - x1_2) * (y2_2 - y1_2)
+    union_area = box1_area + box2_area - inter_area
+
+    return inter_area / union_area if union_area > 0 else 0
+
+
+def calculate_distance_to_bbox(bbox, hand_landmarks, img_w, img_h):
+    x1, y1, x2, y2 = bbox
+    min_distance = float('inf')
+
+    for idx in KEY_LANDMARKS:
+        lm = hand_landmarks.landmark[idx]
+        lm_x = lm.x * img_w
+        lm_y = lm.y * img_h
+
+        if x1 <= lm_x <= x2 and y1 <= lm_y <= y2:
+            return 0
+
+        closest_x = max(x1, min(lm_x, x2))
+        closest_y = max(y1, min(lm_y, y2))
+        dist = np.sqrt((lm_x - closest_x) ** 2 + (lm_y - closest_y) ** 2)
+        min_distance = min(min_distance, dist)
+
+    return min_distance
+
+
+def scalar_match(tracked, candidates):
+    best_iou, best = 0, None
+    for i, box in enumerate(candidates):
+        iou = calculate_iou(tracked, box)
+        if iou > IOU_THRESHOLD and iou > best_iou:
+            best_iou, best = iou, i
+    return best
+
+
+def scalar_closest(tracked, candidates, hand):
+    if calculate_distance_to_bbox(tracked, hand, IMG_W, IMG_H) <= PROXIMITY_DISTANCE:
+        return -1
+    closest, closest_distance = None, float('inf')
+    for i, box in enumerate(candidates):
+        dist = calculate_distance_to_bbox(box, hand, IMG_W, IMG_H)
+        if dist <= PROXIMITY_DISTANCE and dist < closest_distance:
+            closest, closest_distance = i, dist
+    return closest
+
+
+def scalar_frame(frame):
+    """HOIDetector 한 프레임 분량: 추적 박스 매칭 2번 + 손-박스 근접 판단 2번"""
+    cups, study, tracked_cup, tracked_study, hand = frame
+    return (
+        scalar_match(tracked_cup, cups),
+        scalar_match(tracked_study, study),
+        scalar_closest(tracked_cup, cups, hand),
+        scalar_closest(tracked_study, study, hand),
+    )
+
+
+# ---------------- 벡터화 방식 ----------------
+
+def vector_closest(distances, tracked_distance):
+    if tracked_distance <= PROXIMITY_DISTANCE:
+        return -1
+    return closest_within(distances, PROXIMITY_DISTANCE)
+
+
+def vector_frame(frame):
+    cups, study, tracked_cup, tracked_study, hand = frame
+    candidate_boxes = box_array(cups + study)
+    tracked_boxes = box_array([tracked_cup, tracked_study])
+    split = len(cups)
+
+    ious = iou_matrix(tracked_boxes, candidate_boxes)
+    points = landmark_points(hand, IMG_W, IMG_H)
+    distances = hand_box_distances(points, np.vstack([tracked_boxes, candidate_boxes]))
+
+    return (
+        best_match(ious[0, :split], IOU_THRESHOLD),
+        best_match(ious[1, split:], IOU_THRESHOLD),
+        vector_closest(distances[2:2 + split], distances[0]),
+        vector_closest(distances[2 + split:], distances[1]),
+    )
+
+
+# ---------------- 합성 데이터 ----------------
+
+def random_box(rng):
+    w, h = rng.randint(30, 200), rng.randint(30, 200)
+    x1, y1 = rng.randint(0, IMG_W - w), rng.randint(0, IMG_H - h)
+    return x1, y1, x1 + w, y1 + h
+
+
+def jitter(rng, box):
+    return tuple(v + rng.randint(-10, 10) for v in box)
+
+
+def random_hand(rng):
+    cx, cy = rng.uniform(0.1, 0.9), rng.uniform(0.1, 0.9)
+    return SimpleNamespace(landmark=[
+        SimpleNamespace(x=cx + rng.uniform(-0.08, 0.08), y=cy + rng.uniform(-0.08, 0.08)) for _ in range(21)
+    ])
+
+
+def make_frames(count, size, seed=0):
+    rng = random.Random(seed)
+    frames = []
+    for _ in range(count):
+        cups = [random_box(rng) for _ in range(size)]
+        study = [random_box(rng) for _ in range(size)]
+        frames.append((cups, study, jitter(rng, cups[0]), jitter(rng, study[0]), random_hand(rng)))
+    return frames
+
+
+def bench(func, frames):
+    best = float("inf")
+    for _ in range(REPEAT):
+        t0 = time.perf_counter()
+        for frame in frames:
+            func(frame)
+        best = min(best, time.perf_counter() - t0)
+    return best / len(frames) * 1e6
+
+
+def main():
+    print(f"=== {FRAMES} frames / size (best of {REPEAT}), µs per frame ===")
+    print(f"{'boxes':>7} {'scalar':>10} {'vector':>10} {'ratio':>7}")
+    for size in SIZES:
+        frames = make_frames(FRAMES, size)
+        for frame in frames:
+            expected, actual = scalar_frame(frame), vector_frame(frame)
+            if expected != actual:
+                sys.exit(f"결과 불일치 (boxes={size}): scalar {expected} / vector {actual}")
+
+        old = bench(scalar_frame, frames)
+        new = bench(vector_frame, frames)
+        print(f"{size * 2:>7} {old:10.1f} {new:10.1f} {'x' + format(old / new, '.1f'):>7}")
+
+
+if __name__ == "__main__":
+    main()
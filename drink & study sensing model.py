@@ -1,20 +1,114 @@
 import cv2
 from ultralytics import YOLOWorld
 import mediapipe as mp
-import numpy as np
-import pandas as pd
-from datetime import datetime
+from datetime import datetime, timedelta
 import os
 from collections import deque
-import math
 import uuid
 import sys
+import re
+import csv
+import glob
+import hashlib
+import time
+import argparse
+import threading
+import traceback
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from hoi_detector import HOIDetector
+from log_writer import DiskWriter
 
 # =========================================================
 # [설정] 카메라 및 모델
 # =========================================================
 CAMERA_SOURCE = 1
 
+# 로그 저장 형식: "csv"(기본) 또는 "arrow" (일별 Arrow IPC 파일, pyarrow 필요 — 그날 CSV 를 모았다가 하루에 한 번 변환)
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "csv").lower()
+
+# 파이프라인 모드: 1 이면 캡처 / YOLO / MediaPipe / 로직+화면 을 각각 스레드로 돌려 겹쳐 실행
+# (직렬: 프레임당 시간 = 모든 단계 합, 파이프라인: 가장 느린 단계 하나)
+PIPELINE_MODE = os.environ.get("PIPELINE_MODE", "0") == "1"
+PIPELINE_QUEUE_SIZE = 2  # 단계 사이 큐 길이, 가득 차면 가장 오래된 프레임을 버림
+
+# 손 ROI 모드: 1 이면 직전 손바닥(Kalman 예측) 또는 추적 중인 컵 주변만 잘라 MediaPipe 실행
+# 잘라낸 영역에서 못 찾으면 같은 프레임을 전체로 다시 검사
+HAND_ROI_MODE = os.environ.get("HAND_ROI_MODE", "0") == "1"
+HAND_ROI_SCALE = 0.5      # ROI 한 변 = 프레임 긴 변 × 이 값
+HAND_ROI_MIN_SIZE = 256
+
+# 디스크 쓰기 (캡처 JPEG / 로그) 는 백그라운드 스레드 하나가 전담 → 감지 루프는 큐에 넣기만
+WRITER_QUEUE_SIZE = 64    # 가득 차면 캡처는 버리고(경고), 로그는 자리 날 때까지 대기
+LOG_FLUSH_SEC = 1.0       # 로그 flush + fsync 주기
+
+# =========================================================
+# [실행 옵션] 기본: 카메라 실시간 / --replay: 녹화 영상·이미지 폴더 재처리
+# =========================================================
+# 재처리 모드: 화면 없이 최대 속도, 프레임을 버리지 않음, 이벤트 시각 = 프레임 시각
+# 로그는 logs/{prefix}_log_{날짜}_{입력 이름}.csv 로 따로 (다시 돌리면 이전 결과를 지우고 새로 씀)
+# 예) python "drink & study sensing model.py" --replay desk_0901.mp4 --start "2025-09-01 09:00:00"
+#     python "drink & study sensing model.py" --replay videos/*.mp4 --jobs 4
+# 멀티 카메라: --streams 로 카메라 여러 대를 한 프로세스에서 (YOLO 모델 하나, 틱마다 프레임을 묶어 predict 한 번)
+# 로그는 logs/{prefix}_log_{날짜}_{스트림 ID}.csv, ID 는 "이름=소스" 로 지정 (없으면 cam0, cam1, ...)
+# 예) python "drink & study sensing model.py" --streams desk1=0 desk2=1 desk3=rtsp://192.168.0.10/stream
+
+parser = argparse.ArgumentParser(description="물 마시기 / 공부 감지")
+parser.add_argument("--replay", nargs="+", metavar="SOURCE",
+                    help="녹화 영상 파일 또는 이미지 폴더 / glob 패턴 (여러 개면 입력별 프로세스로 처리)")
+parser.add_argument("--start", help="첫 프레임 시각 'YYYY-MM-DD HH:MM:SS' (없으면 파일 수정 시각으로 추정)")
+parser.add_argument("--fps", type=float, help="프레임 속도 (없으면 영상 정보, 이미지 폴더는 30)")
+parser.add_argument("--jobs", type=int, default=1, help="--replay 입력 여러 개를 동시에 처리할 프로세스 수")
+parser.add_argument("--streams", nargs="+", metavar="[ID=]SOURCE",
+                    help="카메라 번호 / 영상 / RTSP 주소 여러 개를 한 프로세스에서 (스트림 ID 별로 로그 분리)")
+ARGS = parser.parse_args()
+
+REPLAY_MODE = bool(ARGS.replay)
+MULTI_STREAM = bool(ARGS.streams)
+if REPLAY_MODE and len(ARGS.replay) > 1 and ARGS.start:
+    parser.error("--start 는 입력이 하나일 때만 쓸 수 있습니다")
+if REPLAY_MODE and MULTI_STREAM:
+    parser.error("--replay 와 --streams 는 같이 쓸 수 없습니다")
+if MULTI_STREAM and (PIPELINE_MODE or HAND_ROI_MODE):
+    # 둘 다 단일 카메라 전용 (전역 capture / detector 기준) → 멀티 카메라에서는 끄고 진행
+    print("[Warning] --streams 에서는 PIPELINE_MODE / HAND_ROI_MODE 를 지원하지 않아 무시합니다")
+    PIPELINE_MODE = HAND_ROI_MODE = False
+
+
+def parse_stream_spec(spec, index):
+    """'ID=소스' 또는 '소스' → (스트림 ID, VideoCapture 소스), 숫자 소스는 카메라 번호"""
+    name, sep, source = spec.partition("=")
+    if not sep or not re.fullmatch(r"\w+", name):
+        # RTSP 주소의 쿼리(?channel=1) 같은 '=' 는 ID 로 보지 않음
+        name, source = f"cam{index}", spec
+    stream_id = re.sub(r"[^0-9A-Za-z]+", "", name) or f"cam{index}"
+    return stream_id, int(source) if source.isdigit() else source
+
+
+STREAM_SPECS = [parse_stream_spec(spec, i) for i, spec in enumerate(ARGS.streams or [])]
+if len({stream_id for stream_id, _ in STREAM_SPECS}) < len(STREAM_SPECS):
+    parser.error("--streams 의 스트림 ID 가 겹칩니다")
+
+
+def run_replay_jobs(sources, jobs):
+    """입력마다 이 스크립트를 --replay 하나로 다시 실행 (프로세스별로 모델 / 상태가 따로)"""
+    def run_one(source):
+        command = [sys.executable, os.path.abspath(__file__), "--replay", source]
+        if ARGS.fps:
+            command += ["--fps", str(ARGS.fps)]
+        return source, subprocess.run(command).returncode
+
+    failed = 0
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        for source, returncode in pool.map(run_one, sources):
+            print(f"[Replay] {'완료' if returncode == 0 else f'실패({returncode})'}: {source}")
+            failed += returncode != 0
+    return 1 if failed else 0
+
+
+if REPLAY_MODE and len(ARGS.replay) > 1:
+    sys.exit(run_replay_jobs(ARGS.replay, ARGS.jobs))
+
 print("YOLO-World 모델 로딩 중...")
 yolo_model = YOLOWorld("yolov8s-worldv2.pt")
 
@@ -32,112 +126,161 @@ print(f"✓ {len(CUSTOM_CLASSES)}개 클래스 로드 완료")
 # MediaPipe 설정
 mp_hands = mp.solutions.hands
 mp_drawing = mp.solutions.drawing_utils
-hands = mp_hands.Hands(
-    static_image_mode=False,
-    max_num_hands=1,
-    min_detection_confidence=0.5,
-    min_tracking_confidence=0.5
-)
-
-# =========================================================
-# [클래스 매핑]
-# =========================================================
-DRINKING_CLASSES = ["cup", "mug", "water bottle", "glass", "coffee cup"]
 
-STUDY_BOOK_CLASSES = ["open book", "closed book", "textbook", "notebook", "journal"]
-STUDY_DEVICE_CLASSES = ["laptop", "keyboard", "tablet", "monitor"]
-STUDY_TOOL_CLASSES = ["pen", "pencil", "marker", "paper", "document", "notepad", "calculator"]
 
-ALL_STUDY_CLASSES = STUDY_BOOK_CLASSES + STUDY_DEVICE_CLASSES + STUDY_TOOL_CLASSES
+def create_hands():
+    # 인스턴스마다 이전 프레임 추적 상태를 가지므로 영상(스트림)마다 따로 만든다
+    return mp_hands.Hands(
+        static_image_mode=False,
+        max_num_hands=1,
+        min_detection_confidence=0.5,
+        min_tracking_confidence=0.5
+    )
 
-# ------------------ [파라미터] 물 마시기 ------------------
-WATER_CONTACT_FRAMES = 8
-WATER_TRACKING_FRAMES = 40
-MIN_TOTAL_RISE = 40
-MOVEMENT_CONSISTENCY = 0.50
-GESTURE_CONFIDENCE = 0.10
 
-WATER_PROXIMITY_DISTANCE = 20
-MISSING_HAND_TOLERANCE = 20  # ★ 이 프레임만큼 손 복원 시도
-MIN_OBJECT_SIZE_RATIO = 0.02
-DRINKING_MIN_CONFIDENCE = 0.35
-DRINKING_MIN_ASPECT_RATIO = 1.0
+# 단일 카메라 / 재처리용 (멀티 카메라는 CameraStream 이 스트림마다 가짐)
+hands = None if MULTI_STREAM else create_hands()
 
-DRINKING_COOLDOWN = 90
+# ROI 전용 인스턴스 (전체 프레임 인스턴스의 추적 상태와 섞이지 않게 따로)
+roi_hands = create_hands() if HAND_ROI_MODE else None
 
-IOU_THRESHOLD = 0.5
-MAX_TRACKING_FRAMES = 30
+# 물 마시기 / 공부 판단 파라미터와 감지 엔진(HOIDetector)은 hoi_detector.py
 
-# ------------------ [파라미터] 공부 감지 ------------------
-STUDY_MIN_CONFIDENCE = 0.30
-STUDY_PROXIMITY_DISTANCE = 20
-STUDY_MIN_START_FRAMES = 90
-STUDY_AWAY_FRAMES = 120
-STUDY_MIN_SESSION_FRAMES = 150
+# ------------------ [파라미터] YOLO 탐지 주기 ------------------
+# N 프레임마다 한 번만 YOLO, 사이 프레임은 직전 박스를 템플릿 매칭으로 따라감 (1 = 매 프레임 YOLO)
+# 손이 물체에 다가오는 중(접촉 판단 구간, hoi_detector.DETECT_APPROACH_DISTANCE)이면 매 프레임 YOLO
+DETECT_EVERY_N = int(os.environ.get("DETECT_EVERY_N", "1"))
+TRACK_SEARCH_MARGIN = 24       # 템플릿 탐색 범위 (박스 주변 px, 원본 해상도 기준)
+TRACK_MIN_SCORE = 0.6          # 매칭 점수가 이보다 낮으면 놓친 것 → 다음 프레임 YOLO
+TRACK_SCALE = 0.5              # 템플릿 매칭은 축소 영상에서
 
 
 # =========================================================
-# [Kalman Filter 클래스]
+# [박스 추적 클래스] YOLO 를 건너뛰는 프레임용
 # =========================================================
 
-class KalmanFilter2D:
-    """2D 위치 추적을 위한 Kalman Filter"""
+class BoxPropagator:
+    """마지막 YOLO 탐지 박스를 템플릿 매칭으로 따라감 (박스 주변만 탐색, 템플릿은 탐지 프레임 것 고정 → 누적 drift 없음)"""
 
     def __init__(self):
-        # 상태 벡터: [x, y, vx, vy] (위치 + 속도)
-        self.kalman = cv2.KalmanFilter(4, 2)
+        self.items = []  # (template, bbox, class_name, confidence)
+
+    @staticmethod
+    def prepare(frame):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return cv2.resize(gray, None, fx=TRACK_SCALE, fy=TRACK_SCALE, interpolation=cv2.INTER_AREA)
+
+    def reset(self, small, detections):
+        self.items = []
+        for bbox, class_name, confidence in detections:
+            x1, y1, x2, y2 = [int(v * TRACK_SCALE) for v in bbox]
+            if x2 - x1 < 4 or y2 - y1 < 4:
+                continue
+            self.items.append((small[y1:y2, x1:x2].copy(), bbox, class_name, confidence))
+
+    def propagate(self, small):
+        """반환: (박스 목록, 하나라도 놓쳤는지)"""
+        h, w = small.shape[:2]
+        margin = int(TRACK_SEARCH_MARGIN * TRACK_SCALE)
+        detections = []
+        tracked = []
+        lost = False
+
+        for template, bbox, class_name, confidence in self.items:
+            x1, y1, x2, y2 = bbox
+            th, tw = template.shape[:2]
+            sx = max(0, int(x1 * TRACK_SCALE) - margin)
+            sy = max(0, int(y1 * TRACK_SCALE) - margin)
+            window = small[sy:min(h, sy + th + 2 * margin), sx:min(w, sx + tw + 2 * margin)]
+
+            score = -1.0
+            if window.shape[0] >= th and window.shape[1] >= tw:
+                match = cv2.matchTemplate(window, template, cv2.TM_CCOEFF_NORMED)
+                _, score, _, loc = cv2.minMaxLoc(match)
+
+            if not score >= TRACK_MIN_SCORE:
+                lost = True
+                continue
+
+            nx1 = int((sx + loc[0]) / TRACK_SCALE)
+            ny1 = int((sy + loc[1]) / TRACK_SCALE)
+            bbox = (nx1, ny1, nx1 + (x2 - x1), ny1 + (y2 - y1))
+            tracked.append((template, bbox, class_name, confidence))
+            detections.append((bbox, class_name, confidence))
+
+        self.items = tracked
+        return detections, lost
 
-        # 상태 전이 행렬 (등속도 모델)
-        self.kalman.transitionMatrix = np.array([
-            [1, 0, 1, 0],  # x = x + vx
-            [0, 1, 0, 1],  # y = y + vy
-            [0, 0, 1, 0],  # vx = vx
-            [0, 0, 0, 1]  # vy = vy
-        ], dtype=np.float32)
 
-        # 측정 행렬 (x, y만 측정)
-        self.kalman.measurementMatrix = np.array([
-            [1, 0, 0, 0],
-            [0, 1, 0, 0]
-        ], dtype=np.float32)
+# =========================================================
+# [재처리 입력] 이미지 폴더를 VideoCapture 처럼
+# =========================================================
 
-        # 프로세스 노이즈
-        self.kalman.processNoiseCov = np.eye(4, dtype=np.float32) * 0.03
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
 
-        # 측정 노이즈
-        self.kalman.measurementNoiseCov = np.eye(2, dtype=np.float32) * 0.1
 
-        # 초기화 플래그
-        self.initialized = False
+class ImageSequenceCapture:
+    """이미지 폴더 / glob 패턴을 파일 이름순으로 읽음 (읽을 수 없는 파일은 건너뜀)"""
 
-    def update(self, x, y):
-        """실제 측정값으로 업데이트"""
-        measurement = np.array([[x], [y]], dtype=np.float32)
+    def __init__(self, source):
+        pattern = os.path.join(source, "*") if os.path.isdir(source) else source
+        self.paths = sorted(p for p in glob.glob(pattern) if p.lower().endswith(IMAGE_EXTENSIONS))
+        self.index = 0
 
-        if not self.initialized:
-            # 첫 프레임: 상태 초기화
-            self.kalman.statePre = np.array([[x], [y], [0], [0]], dtype=np.float32)
-            self.kalman.statePost = np.array([[x], [y], [0], [0]], dtype=np.float32)
-            self.initialized = True
-            return x, y
+    def isOpened(self):
+        return self.index < len(self.paths)
 
-        # 예측 + 보정
-        self.kalman.correct(measurement)
-        prediction = self.kalman.predict()
+    def read(self):
+        while self.index < len(self.paths):
+            frame = cv2.imread(self.paths[self.index])
+            self.index += 1
+            if frame is not None:
+                return True, frame
+        return False, None
 
-        return float(prediction[0]), float(prediction[1])
+    def get(self, prop):
+        return len(self.paths) if prop == cv2.CAP_PROP_FRAME_COUNT else 0
 
-    def predict(self):
-        """측정값 없이 예측만 수행 (손 사라졌을 때)"""
-        if not self.initialized:
-            return None, None
+    def release(self):
+        self.index = len(self.paths)
 
-        prediction = self.kalman.predict()
-        return float(prediction[0]), float(prediction[1])
 
-    def reset(self):
-        """필터 리셋"""
-        self.initialized = False
+def open_replay_source(source):
+    """반환: (capture, 첫 프레임 시각, fps)"""
+    if os.path.isdir(source) or any(c in source for c in "*?["):
+        capture = ImageSequenceCapture(source)
+        if not capture.paths:
+            sys.exit(f"이미지가 없습니다: {source}")
+        first_file = capture.paths[0]
+    else:
+        if not os.path.exists(source):
+            sys.exit(f"파일이 없습니다: {source}")
+        capture = cv2.VideoCapture(source)
+        first_file = None
+
+    fps = ARGS.fps or capture.get(cv2.CAP_PROP_FPS) or 30.0
+
+    if ARGS.start:
+        start = datetime.strptime(ARGS.start, "%Y-%m-%d %H:%M:%S")
+    elif first_file:
+        start = datetime.fromtimestamp(os.path.getmtime(first_file))
+    else:
+        # 녹화가 끝난 시각 = 파일 수정 시각 → 길이만큼 앞으로
+        duration = (capture.get(cv2.CAP_PROP_FRAME_COUNT) or 0) / fps
+        start = datetime.fromtimestamp(os.path.getmtime(source)) - timedelta(seconds=duration)
+
+    return capture, start, fps
+
+
+def replay_tag(source):
+    """
+    로그 파일 이름에 붙일 입력 이름 (구분자를 빼서 서버가 시각으로 오인하지 않게)
+    + 절대 경로 해시 6자리: 폴더만 다르고 이름이 같은 입력끼리 로그가 섞이거나
+      재처리 시 서로의 결과(로그 / 캡처)를 지우지 않도록
+    """
+    path = os.path.abspath(os.path.normpath(source))
+    name = re.sub(r"[^0-9A-Za-z]+", "", os.path.splitext(os.path.basename(path))[0]) or "replay"
+    return name + hashlib.sha1(path.encode("utf-8")).hexdigest()[:6]
 
 
 # =========================================================
@@ -146,99 +289,73 @@ class KalmanFilter2D:
 os.makedirs("logs", exist_ok=True)
 os.makedirs("captures", exist_ok=True)
 
-cap = cv2.VideoCapture(CAMERA_SOURCE)
-
-# --- 전역 상태 ---
-active_interaction = None
-last_water_detected_frame = 0
-frame_count = 0
-
-# --- 물 마시기 상태 ---
-water_state = "idle"
-water_contact_counter = 0
-water_tracking_counter = 0
-
-initial_palm_y = None
-initial_palm_x = None
-palm_y_history = []
-upward_count = 0
-cup_gesture_count = 0
-hand_missing_frames = 0
-
-detected_cup_name = None
-detected_cup_box = None
-
-tracked_cup_box = None
-tracked_cup_name = None
-tracked_cup_missing = 0
-
-# ★ Kalman Filter 초기화
-palm_kalman = KalmanFilter2D()
-palm_position_history = deque(maxlen=10)  # 최근 10개 위치 저장
-
-# ★ 손 복원 관련 변수
-hand_last_seen_x = None
-hand_last_seen_y = None
-hand_velocity_x = 0
-hand_velocity_y = 0
-
-# --- 공부 상태 ---
-study_state = "idle"
-study_start_counter = 0
-study_total_frames = 0
-study_away_counter = 0
-study_start_time = None
-study_end_time = None
-study_object_name = "unknown"
-study_object_detail = "unknown"
-study_start_capture_path = None
-last_study_box = None
-last_study_class_name = None
-
-tracked_study_box = None
-tracked_study_name = None
-tracked_study_missing = 0
+if REPLAY_MODE:
+    cap, REPLAY_START, REPLAY_FPS = open_replay_source(ARGS.replay[0])
+    LOG_SUFFIX = f"_{replay_tag(ARGS.replay[0])}"
+elif MULTI_STREAM:
+    cap = None  # 스트림별 capture 는 CameraStream 이 가짐
+    LOG_SUFFIX = ""
+else:
+    cap = cv2.VideoCapture(CAMERA_SOURCE)
+    LOG_SUFFIX = ""
+# 프레임 수 → 초 환산 (재처리: 입력 영상의 fps, 실시간 카메라: 30fps 기준)
+FRAME_RATE = REPLAY_FPS if REPLAY_MODE else 30
+replay_frame_index = 0
 
 
 # =========================================================
 # [유틸리티 함수]
 # =========================================================
 
-def calculate_iou(box1, box2):
-    x1_1, y1_1, x2_1, y2_1 = box1
-    x1_2, y1_2, x2_2, y2_2 = box2
-
-    xi1 = max(x1_1, x1_2)
-    yi1 = max(y1_1, y1_2)
-    xi2 = min(x2_1, x2_2)
-    yi2 = min(y2_1, y2_2)
+def get_log_path(prefix, when, stream_id=None):
+    day = when.strftime("%Y-%m-%d")
+    suffix = f"_{stream_id}" if stream_id else LOG_SUFFIX
+    # Arrow 로그도 그날은 CSV 로 추가 → DiskWriter 가 날짜가 바뀔 때 / 종료할 때 .arrow 로 합침
+    return os.path.join("logs", f"{prefix}_log_{day}{suffix}.csv")
 
-    inter_area = max(0, xi2 - xi1) * max(0, yi2 - yi1)
 
-    box1_area = (x2_1 - x1_1) * (y2_1 - y1_1)
-    box2_area = (x2_2 - x1_2) * (y2_2 - y1_2)
-    union_area = box1_area + box2_area - inter_area
+def remove_replay_outputs():
+    """같은 입력을 다시 재처리할 때: 이전 결과 로그와 그 로그가 가리키는 캡처 삭제"""
+    for path in glob.glob(os.path.join("logs", f"*_log_*{LOG_SUFFIX}.*")):
+        if not path.endswith((f"{LOG_SUFFIX}.csv", f"{LOG_SUFFIX}.arrow")):
+            continue
+        if path.endswith(".csv"):
+            with open(path, encoding="utf-8", newline="") as fh:
+                rows = list(csv.DictReader(fh))
+        else:
+            import pyarrow.ipc
+            with pyarrow.OSFile(path, 'rb') as source:
+                rows = pyarrow.ipc.open_file(source).read_all().to_pylist()
+        for row in rows:
+            for column in ("capture_path", "start_capture", "end_capture"):
+                if row.get(column) and os.path.isfile(row[column]):
+                    os.remove(row[column])
+        os.remove(path)
+        print(f"[Replay] 이전 결과 삭제: {path}")
 
-    return inter_area / union_area if union_area > 0 else 0
 
+def next_frame_time():
+    """방금 읽은 프레임의 시각 (실시간: 지금, 재처리: 시작 시각 + 프레임 번호 / fps)"""
+    global replay_frame_index
+    if not REPLAY_MODE:
+        return datetime.now()
+    frame_time = REPLAY_START + timedelta(seconds=replay_frame_index / REPLAY_FPS)
+    replay_frame_index += 1
+    return frame_time
 
-def get_log_path(prefix):
-    today = datetime.now().strftime("%Y-%m-%d")
-    return os.path.join("logs", f"{prefix}_log_{today}.csv")
 
+# 재처리 모드는 캡처도 버리지 않음 (디스크가 밀리면 처리 속도를 늦춤)
+disk_writer = DiskWriter(WRITER_QUEUE_SIZE, LOG_FLUSH_SEC, log_format=LOG_FORMAT, drop_captures=not REPLAY_MODE)
 
-def save_log(prefix, record):
-    path = get_log_path(prefix)
-    df = pd.DataFrame([record])
 
-    if os.path.exists(path):
-        df.to_csv(path, mode='a', header=False, index=False)
-    else:
-        df.to_csv(path, index=False)
+def save_log(prefix, record, when, stream_id=None):
+    path = get_log_path(prefix, when, stream_id)
+    disk_writer.save_log(prefix, path, record, stream_id)
+    stream_text = f" [{stream_id}]" if stream_id else ""
 
     if prefix == "water":
         print(f"\n{'=' * 60}")
-        print(f"[물 마시기 감지] {record.get('timestamp')}")
+        print(f"[물 마시기 감지]{stream_text} {record.get('timestamp')}")
         print(f"  - 물체: {record.get('object')}")
         print(f"  - 상승: {record.get('rise')}px")
         print(f"  - 제스처: {record.get('gesture_conf')}")
@@ -248,7 +365,7 @@ def save_log(prefix, record):
         sys.stdout.flush()
     elif prefix == "study":
         print(f"\n{'=' * 60}")
-        print(f"[공부 세션 종료]")
+        print(f"[공부 세션 종료]{stream_text}")
         print(f"  - 시작: {record.get('start_time')}")
         print(f"  - 종료: {record.get('end_time')}")
         print(f"  - 시간: {record.get('duration_sec')}초")
@@ -262,678 +379,528 @@ def save_capture_image(frame, timestamp_str, prefix="capture"):
     unique_id = str(uuid.uuid4())[:8]
     filename = f"{prefix}_{timestamp_str.replace(':', '-').replace(' ', '_')}_{unique_id}.jpg"
     filepath = os.path.join("captures", filename)
-    cv2.imwrite(filepath, frame)
+    disk_writer.save_capture(filepath, frame)
     print(f"[캡처 저장] {filepath}")
     return filepath
 
 
-def reset_water_state():
-    global water_state, water_contact_counter, water_tracking_counter
-    global initial_palm_y, initial_palm_x, palm_y_history
-    global upward_count, cup_gesture_count, hand_missing_frames
-    global detected_cup_name, detected_cup_box
-    global tracked_cup_box, tracked_cup_name, tracked_cup_missing
-    global palm_kalman, palm_position_history
-    global hand_last_seen_x, hand_last_seen_y, hand_velocity_x, hand_velocity_y
-
-    water_state = "idle"
-    water_contact_counter = 0
-    water_tracking_counter = 0
-    initial_palm_y = None
-    initial_palm_x = None
-    palm_y_history = []
-    upward_count = 0
-    cup_gesture_count = 0
-    hand_missing_frames = 0
-    detected_cup_name = None
-    detected_cup_box = None
-    tracked_cup_box = None
-    tracked_cup_name = None
-    tracked_cup_missing = 0
-
-    # Kalman Filter 리셋
-    palm_kalman.reset()
-    palm_position_history.clear()
-    hand_last_seen_x = None
-    hand_last_seen_y = None
-    hand_velocity_x = 0
-    hand_velocity_y = 0
+# =========================================================
+# [감지 엔진] 스트림 하나의 물 마시기 / 공부 상태 (hoi_detector.py)
+# =========================================================
+
+def draw_hand_landmarks(frame, hand_landmarks):
+    mp_drawing.draw_landmarks(frame, hand_landmarks, mp_hands.HAND_CONNECTIONS)
+
+
+def create_detector():
+    # 스트림마다 상태가 따로이므로 capture / 화면 표시만 이 스크립트 것으로 연결해서 만든다
+    return HOIDetector(save_capture_image, fps=FRAME_RATE, detect_every_n=DETECT_EVERY_N,
+                       draw_hand=draw_hand_landmarks)
+
+
+detector = None if MULTI_STREAM else create_detector()  # 멀티 카메라는 CameraStream 이 스트림마다 가짐
 
 
 # =========================================================
-# [제스처 감지 함수]
+# [프레임 소스: 직렬 / 파이프라인]
 # =========================================================
+# 두 방식 모두 (frame, YOLO 결과, MediaPipe 결과) 를 같은 프레임끼리 묶어서 넘긴다
+# → 이벤트 캡처는 항상 판단에 쓰인 바로 그 프레임
 
-def calculate_lm_distance(lm1, lm2):
-    return math.sqrt((lm1.x - lm2.x) ** 2 + (lm1.y - lm2.y) ** 2)
+STREAM_END = object()  # 파이프라인 종료 표시
 
+detect_stats = {"yolo": 0, "tracked": 0}
 
-def is_holding_pen(landmarks):
-    pinch_dist = calculate_lm_distance(landmarks.landmark[4], landmarks.landmark[8])
-    support_dist = calculate_lm_distance(landmarks.landmark[4], landmarks.landmark[12])
-    return pinch_dist < 0.08 and support_dist < 0.10
 
+class DetectSchedule:
+    """
+    스트림 하나의 YOLO 탐지 주기 (DETECT_EVERY_N > 1)
+    - 로직 단계가 detector 에 남긴 힌트(detect_dense / detect_now)를 탐지 단계가 읽음
+    - 사이 프레임은 템플릿 추적, 추적이 실패하면 detect_now 를 세워 다음 프레임 YOLO 1회
+    """
 
-def is_holding_cup(landmarks):
-    c_shape_dist = calculate_lm_distance(landmarks.landmark[4], landmarks.landmark[8])
-    return 0.05 <= c_shape_dist <= 0.30
+    def __init__(self, detector):
+        self.detector = detector
+        self.propagator = BoxPropagator()
+        self.frames_since_detect = 0
+        self.small = None
 
+    def wants_yolo(self, frame):
+        if DETECT_EVERY_N <= 1:
+            return True
 
-def get_palm_position(hand_landmarks, img_w, img_h):
-    palm = hand_landmarks.landmark[9]
-    return palm.x * img_w, palm.y * img_h
+        self.small = BoxPropagator.prepare(frame)
+        detector = self.detector
+        if self.frames_since_detect + 1 >= DETECT_EVERY_N or detector.detect_dense or detector.detect_now.is_set():
+            detector.detect_now.clear()
+            return True
+        return False
 
+    def detected(self, detections):
+        """YOLO 결과로 템플릿을 새로 잡음 (오류로 None 이면 그대로)"""
+        if DETECT_EVERY_N > 1 and detections is not None:
+            self.propagator.reset(self.small, detections)
+            self.frames_since_detect = 0
+        return detections
 
-def calculate_distance_to_bbox(bbox, hand_landmarks, img_w, img_h):
-    x1, y1, x2, y2 = bbox
-    key_landmarks = [0, 4, 8, 12, 16, 20, 9]
+    def track(self):
+        detections, lost = self.propagator.propagate(self.small)
+        self.frames_since_detect += 1
+        detect_stats["tracked"] += 1
+        if lost:
+            self.detector.detect_now.set()
+        return detections
 
-    min_distance = float('inf')
 
-    for idx in key_landmarks:
-        lm = hand_landmarks.landmark[idx]
-        lm_x = lm.x * img_w
-        lm_y = lm.y * img_h
+detect_schedule = None if MULTI_STREAM else DetectSchedule(detector)
 
-        if x1 <= lm_x <= x2 and y1 <= lm_y <= y2:
-            return 0
 
-        closest_x = max(x1, min(lm_x, x2))
-        closest_y = max(y1, min(lm_y, y2))
-        dist = np.sqrt((lm_x - closest_x) ** 2 + (lm_y - closest_y) ** 2)
-        min_distance = min(min_distance, dist)
+def parse_detections(result):
+    """YOLO 결과 한 장 → [(bbox, class_name, confidence)]"""
+    detections = []
+    if result.boxes is not None:
+        for box in result.boxes:
+            x1, y1, x2, y2 = map(int, box.xyxy[0])
+            detections.append(((x1, y1, x2, y2), yolo_model.names[int(box.cls[0])], float(box.conf[0])))
+    return detections
 
-    return min_distance
 
+def run_yolo(frame):
+    try:
+        results = yolo_model.predict(source=frame, conf=0.25, verbose=False)
+    except Exception as e:
+        print(f"[Warning] YOLO 탐지 오류: {e}")
+        return None
+    detect_stats["yolo"] += 1
+    return parse_detections(results[0]) if len(results) > 0 else []
 
-def get_category_from_class(class_name):
-    if class_name in STUDY_BOOK_CLASSES:
-        return "book"
-    elif class_name in STUDY_DEVICE_CLASSES:
-        return "device"
-    elif class_name in STUDY_TOOL_CLASSES:
-        return "tool"
-    else:
-        return "unknown"
 
+def detect_objects(frame):
+    """이번 프레임 박스 목록 (YOLO 또는 템플릿 추적), YOLO 오류면 None"""
+    if detect_schedule.wants_yolo(frame):
+        return detect_schedule.detected(run_yolo(frame))
+    return detect_schedule.track()
 
-# =========================================================
-# 메인 루프
-# =========================================================
 
-try:
-    print("=" * 60)
-    print("YOLO-World + Kalman Filter Hand Tracking")
-    print("=" * 60)
-    print("ESC 키로 종료하세요.\n")
-    sys.stdout.flush()
+hand_roi_stats = {"roi": 0, "fallback": 0}
+
+
+def hand_roi_center():
+    """
+    detector 상태 → 손 ROI 중심 (cx, cy), 근거가 없으면 None
+    로직(메인) 스레드에서만 호출: 파이프라인은 이 값을 프레임 패킷에 담아 손 단계로 넘김
+    """
+    if not HAND_ROI_MODE:
+        return None
+
+    water = detector.water
+    if water.hand_missing_frames == 0 and water.palm_kalman.initialized:
+        return water.palm_kalman.peek()
+    if water.state == "tracking" and water.tracked_cup_box is not None:
+        bx1, by1, bx2, by2 = water.tracked_cup_box
+        return (bx1 + bx2) / 2, (by1 + by2) / 2
+    return None
+
+
+# 파이프라인: 로직 단계가 프레임을 처리할 때마다 갱신, 캡처 단계가 새 프레임 패킷에 담음 (튜플 통째 교체)
+latest_roi_center = None
+
 
+def hand_roi(img_w, img_h, center):
+    """손을 찾을 영역 (x1, y1, x2, y2), 근거가 없으면 None (= 전체 프레임)"""
+    if center is None:
+        return None
+    cx, cy = center
+
+    size = max(HAND_ROI_MIN_SIZE, int(max(img_w, img_h) * HAND_ROI_SCALE))
+    roi_w, roi_h = min(size, img_w), min(size, img_h)
+    if roi_w == img_w and roi_h == img_h:
+        return None
+
+    x1 = int(min(max(cx - roi_w / 2, 0), img_w - roi_w))
+    y1 = int(min(max(cy - roi_h / 2, 0), img_h - roi_h))
+    return x1, y1, x1 + roi_w, y1 + roi_h
+
+
+def map_landmarks_to_frame(hand_results, roi, img_w, img_h):
+    """ROI 기준 정규화 좌표 → 전체 프레임 기준 정규화 좌표 (제자리 수정)"""
+    x1, y1, x2, y2 = roi
+    sx, sy = (x2 - x1) / img_w, (y2 - y1) / img_h
+
+    for hand_landmarks in hand_results.multi_hand_landmarks:
+        for lm in hand_landmarks.landmark:
+            lm.x = x1 / img_w + lm.x * sx
+            lm.y = y1 / img_h + lm.y * sy
+            lm.z = lm.z * sx
+
+    return hand_results
+
+
+def detect_hands(frame, roi_center=None):
+    img_h, img_w = frame.shape[:2]
+    roi = hand_roi(img_w, img_h, roi_center)
+
+    if roi is not None:
+        x1, y1, x2, y2 = roi
+        hand_results = roi_hands.process(cv2.cvtColor(frame[y1:y2, x1:x2], cv2.COLOR_BGR2RGB))
+        if hand_results.multi_hand_landmarks:
+            hand_roi_stats["roi"] += 1
+            return map_landmarks_to_frame(hand_results, roi, img_w, img_h)
+        hand_roi_stats["fallback"] += 1
+
+    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    return hands.process(rgb)
+
+
+def read_frame():
+    """반환: (프레임 시각, 프레임), 못 읽은 프레임은 (None, None), 재처리 입력이 끝나면 None"""
+    ret, frame = cap.read()
+    if not ret or frame is None or frame.size == 0:
+        return None if REPLAY_MODE else (None, None)
+    return next_frame_time(), frame
+
+
+def serial_frames():
     while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret or frame is None or frame.size == 0:
+        grabbed = read_frame()
+        if grabbed is None:
+            break
+        frame_time, frame = grabbed
+        if frame is None:
             continue
 
-        frame_count += 1
-        img_h, img_w = frame.shape[:2]
+        detections = detect_objects(frame)
+        if detections is None:
+            continue
 
-        # YOLO-World 객체 탐지
-        try:
-            results = yolo_model.predict(source=frame, conf=0.25, verbose=False)
-        except Exception as e:
-            print(f"[Warning] YOLO 탐지 오류: {e}")
+        yield frame_time, frame, detections, detect_hands(frame, hand_roi_center())
+
+
+class FrameQueue:
+    """
+    크기 제한 큐
+    - 실시간: 가득 차면 가장 오래된 항목을 버림 (밀린 프레임보다 최신 프레임 우선)
+    - 재처리: 버리지 않고 자리 날 때까지 대기 (모든 프레임 처리)
+    """
+
+    def __init__(self, maxsize, drop_oldest=True):
+        self.items = deque()
+        self.maxsize = maxsize
+        self.drop_oldest = drop_oldest
+        self.dropped = 0
+        self.cond = threading.Condition()
+
+    def put(self, item):
+        with self.cond:
+            while len(self.items) >= self.maxsize:
+                if self.drop_oldest or pipeline_stop.is_set():
+                    self.items.popleft()
+                    self.dropped += 1
+                else:
+                    self.cond.wait(0.1)
+            self.items.append(item)
+            self.cond.notify_all()
+
+    def get(self, timeout=0.1):
+        """항목이 없으면 timeout 동안 기다리고 None 반환"""
+        with self.cond:
+            if not self.items:
+                self.cond.wait(timeout)
+            if not self.items:
+                return None
+            item = self.items.popleft()
+            self.cond.notify_all()
+            return item
+
+
+pipeline_stop = threading.Event()
+pipeline_threads = []
+detect_queue = FrameQueue(PIPELINE_QUEUE_SIZE, drop_oldest=not REPLAY_MODE)   # 캡처 → YOLO
+hands_queue = FrameQueue(PIPELINE_QUEUE_SIZE, drop_oldest=not REPLAY_MODE)    # YOLO → MediaPipe
+logic_queue = FrameQueue(PIPELINE_QUEUE_SIZE, drop_oldest=not REPLAY_MODE)    # MediaPipe → 로직/화면 (메인 스레드)
+
+
+def grab_stage():
+    try:
+        while not pipeline_stop.is_set() and cap.isOpened():
+            grabbed = read_frame()
+            if grabbed is None:
+                break
+            frame_time, frame = grabbed
+            if frame is None:
+                continue
+            detect_queue.put({"time": frame_time, "frame": frame, "roi_center": latest_roi_center})
+    finally:
+        detect_queue.put(STREAM_END)
+
+
+def detect_stage(packet):
+    packet["detections"] = detect_objects(packet["frame"])
+    return packet if packet["detections"] is not None else None
+
+
+def hands_stage(packet):
+    packet["hands"] = detect_hands(packet["frame"], packet["roi_center"])
+    return packet
+
+
+def run_stage(work, source, sink):
+    """source 에서 꺼내 work 처리 후 sink 로 (work 가 None 이면 그 프레임은 건너뜀)"""
+    try:
+        while not pipeline_stop.is_set():
+            packet = source.get()
+            if packet is None:
+                continue
+            if packet is STREAM_END:
+                break
+            packet = work(packet)
+            if packet is not None:
+                sink.put(packet)
+    except Exception:
+        traceback.print_exc()
+    finally:
+        sink.put(STREAM_END)
+
+
+def pipelined_frames():
+    pipeline_threads.extend([
+        threading.Thread(target=grab_stage, name="grab", daemon=True),
+        threading.Thread(target=run_stage, args=(detect_stage, detect_queue, hands_queue), name="yolo", daemon=True),
+        threading.Thread(target=run_stage, args=(hands_stage, hands_queue, logic_queue), name="hands", daemon=True),
+    ])
+    for thread in pipeline_threads:
+        thread.start()
+
+    while not pipeline_stop.is_set():
+        packet = logic_queue.get()
+        if packet is None:
             continue
+        if packet is STREAM_END:
+            break
+        yield packet["time"], packet["frame"], packet["detections"], packet["hands"]
 
-        # ------------------- 객체 탐지 및 필터링 -------------------
-        detected_cups = []
-        detected_study = []
-
-        if len(results) > 0 and results[0].boxes is not None:
-            boxes = results[0].boxes
-
-            for box in boxes:
-                confidence = float(box.conf[0])
-                x1, y1, x2, y2 = map(int, box.xyxy[0])
-                class_id = int(box.cls[0])
-                class_name = yolo_model.names[class_id]
-
-                box_w, box_h = x2 - x1, y2 - y1
-                ratio = (box_w * box_h) / (img_w * img_h)
-                bbox = (x1, y1, x2, y2)
-
-                if class_name in DRINKING_CLASSES:
-                    aspect_ratio = box_h / box_w if box_w > 0 else 0
-
-                    if (confidence >= DRINKING_MIN_CONFIDENCE and
-                            ratio >= MIN_OBJECT_SIZE_RATIO and
-                            aspect_ratio >= DRINKING_MIN_ASPECT_RATIO):
-                        detected_cups.append((bbox, class_name, confidence))
-
-                if class_name in ALL_STUDY_CLASSES:
-                    if confidence >= STUDY_MIN_CONFIDENCE and ratio >= 0.02:
-                        detected_study.append((bbox, class_name, confidence))
-
-        # ===============================================================
-        # IoU 기반 물체 추적
-        # ===============================================================
-
-        if tracked_cup_box is not None:
-            matched = False
-            best_iou = 0
-            best_match_box = None
-            best_match_name = None
-
-            for cup_box, cup_name, cup_conf in detected_cups:
-                iou = calculate_iou(tracked_cup_box, cup_box)
-                if iou > IOU_THRESHOLD and iou > best_iou:
-                    best_iou = iou
-                    best_match_box = cup_box
-                    best_match_name = cup_name
-                    matched = True
-
-            if matched:
-                tracked_cup_box = best_match_box
-                tracked_cup_missing = 0
-            else:
-                tracked_cup_missing += 1
-                if tracked_cup_missing > MAX_TRACKING_FRAMES:
-                    print(f"[Track] 컵 추적 중단 (사라짐)")
-                    sys.stdout.flush()
-                    tracked_cup_box = None
-                    tracked_cup_name = None
-                    tracked_cup_missing = 0
-
-        if tracked_study_box is not None:
-            matched = False
-            best_iou = 0
-            best_match_box = None
-            best_match_name = None
-
-            for study_box, study_name, study_conf in detected_study:
-                iou = calculate_iou(tracked_study_box, study_box)
-                if iou > IOU_THRESHOLD and iou > best_iou:
-                    best_iou = iou
-                    best_match_box = study_box
-                    best_match_name = study_name
-                    matched = True
-
-            if matched:
-                tracked_study_box = best_match_box
-                tracked_study_missing = 0
-            else:
-                tracked_study_missing += 1
-                if tracked_study_missing > MAX_TRACKING_FRAMES:
-                    tracked_study_box = None
-                    tracked_study_name = None
-                    tracked_study_missing = 0
-
-        # ===============================================================
-        # ★★★ 손 검출 + Kalman Filter 복원 ★★★
-        # ===============================================================
-
-        hand_detected = False
-        hand_landmarks = None
-        gesture_holding_pen = False
-        gesture_holding_cup = False
-        current_palm_x, current_palm_y = None, None
-        hand_restored = False  # 복원 플래그
-
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        hand_results = hands.process(rgb)
 
-        if hand_results.multi_hand_landmarks:
-            # ★ 실제 손 감지됨
-            hand_landmarks = hand_results.multi_hand_landmarks[0]
-            mp_drawing.draw_landmarks(frame, hand_landmarks, mp_hands.HAND_CONNECTIONS)
-            hand_detected = True
-            hand_missing_frames = 0
+def stop_pipeline():
+    if not pipeline_threads:
+        return
+    pipeline_stop.set()
+    for thread in pipeline_threads:
+        thread.join(timeout=2)
+    print(f"[Pipeline] 버린 프레임: 캡처→YOLO {detect_queue.dropped}, "
+          f"YOLO→손 {hands_queue.dropped}, 손→로직 {logic_queue.dropped}")
 
-            raw_x, raw_y = get_palm_position(hand_landmarks, img_w, img_h)
 
-            # Kalman Filter 업데이트
-            filtered_x, filtered_y = palm_kalman.update(raw_x, raw_y)
-            current_palm_x, current_palm_y = filtered_x, filtered_y
+# =========================================================
+# [멀티 카메라] 스트림 N 개, YOLO 모델 하나
+# =========================================================
+# 틱마다: 모든 스트림 grab → YOLO 가 필요한 프레임을 묶어 predict 한 번 → 스트림별 MediaPipe 는 스레드로 동시에
+# → 스트림별 HOIDetector 상태로 판단, 로그는 스트림 ID 별 파일
+# (파이프라인 / 손 ROI 모드는 단일 카메라 전용)
+# grab 실패: 영상 파일이면 끝 → 제외, 카메라 / RTSP 는 연속 실패가 쌓이면 소스를 다시 열고
+#            다시 열어도 프레임이 안 나오면 STREAM_REOPEN_LIMIT 회 뒤 제외
+STREAM_IDLE_SEC = 0.01      # 이번 틱에 디코딩된 프레임이 하나도 없으면 잠깐 쉬고 다시 grab (빈 loop 로 코어 100% 방지)
+STREAM_RETRY_GRABS = 30     # grab 이 연속으로 이만큼 실패하면 다시 열기
+STREAM_REOPEN_SEC = 2.0     # 다시 열기 사이 최소 간격
+STREAM_REOPEN_LIMIT = 5
+
+class CameraStream:
+    """카메라 하나: capture + MediaPipe 인스턴스 + 감지 엔진 + 탐지 주기"""
+
+    def __init__(self, stream_id, source):
+        self.stream_id = stream_id
+        self.source = source
+        self.is_file = isinstance(source, str) and os.path.isfile(source)
+        self.cap = cv2.VideoCapture(source)
+        self.failures = 0       # 연속 grab 실패
+        self.reopens = 0        # 마지막으로 프레임을 읽은 뒤 다시 연 횟수
+        self.reopened_at = time.monotonic()
+        self.hands = create_hands()
+        self.detector = create_detector()
+        self.schedule = DetectSchedule(self.detector)
+        self.window = f"YOLO-World + Kalman Filter [{stream_id}]"
+
+    def detect_hands(self, frame):
+        return self.hands.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+
+    def reopen(self):
+        self.cap.release()
+        self.cap = cv2.VideoCapture(self.source)
+        self.failures = 0
+        self.reopens += 1
+        self.reopened_at = time.monotonic()
+
+
+streams = [CameraStream(stream_id, source) for stream_id, source in STREAM_SPECS]
+stream_stats = {"ticks": 0, "batches": 0, "images": 0, "reopened": 0, "dropped": 0}
+
+
+def drop_stream(stream, reason):
+    """capture 를 닫고 이후 틱에서 뺌"""
+    stream.cap.release()
+    streams.remove(stream)
+    stream_stats["dropped"] += 1
+    print(f"[Streams] {stream.stream_id} {reason} → 제외 (남은 스트림 {len(streams)}개)")
+    sys.stdout.flush()
 
-            # 위치 히스토리 저장
-            palm_position_history.append((current_palm_x, current_palm_y))
 
-            # 속도 계산 (최근 2개 위치)
-            if len(palm_position_history) >= 2:
-                hand_velocity_x = palm_position_history[-1][0] - palm_position_history[-2][0]
-                hand_velocity_y = palm_position_history[-1][1] - palm_position_history[-2][1]
+def stream_failed(stream):
+    """grab 실패 한 번: 영상 파일은 끝, 카메라 / RTSP 는 실패가 쌓이면 다시 열기"""
+    if stream.is_file:
+        drop_stream(stream, "영상 끝")
+        return
 
-            hand_last_seen_x = current_palm_x
-            hand_last_seen_y = current_palm_y
+    stream.failures += 1
+    if stream.failures < STREAM_RETRY_GRABS or time.monotonic() - stream.reopened_at < STREAM_REOPEN_SEC:
+        return
+    if stream.reopens >= STREAM_REOPEN_LIMIT:
+        drop_stream(stream, f"다시 열기 {stream.reopens}회 후에도 읽기 실패")
+        return
 
-            gesture_holding_cup = is_holding_cup(hand_landmarks)
-            gesture_holding_pen = is_holding_pen(hand_landmarks)
+    stream.reopen()
+    stream_stats["reopened"] += 1
+    print(f"[Streams] {stream.stream_id} 연속 {STREAM_RETRY_GRABS}회 이상 읽기 실패 → 다시 열기 "
+          f"({stream.reopens}/{STREAM_REOPEN_LIMIT})")
+    sys.stdout.flush()
 
-        else:
-            # ★ 손이 안 보임 → 복원 시도
-            hand_missing_frames += 1
 
-            if hand_missing_frames <= MISSING_HAND_TOLERANCE and water_state == "tracking":
-                # ★★★ 복원 모드 ★★★
+def grab_streams():
+    """모든 스트림의 같은 순간 프레임: grab 을 먼저 다 하고 retrieve 로 디코딩 → [(stream, frame)]"""
+    grabbed = list(zip(streams, [stream.cap.grab() for stream in streams]))
+    frames = []
+    for stream, ok in grabbed:
+        if not ok:
+            stream_failed(stream)
+            continue
+        ok, frame = stream.cap.retrieve()
+        if ok and frame is not None and frame.size > 0:
+            stream.failures = stream.reopens = 0
+            frames.append((stream, frame))
+    return frames
+
+
+def run_yolo_batch(frames):
+    """프레임 여러 장을 predict 한 번으로 → 프레임별 박스 목록, 오류면 None"""
+    try:
+        results = yolo_model.predict(source=frames, conf=0.25, verbose=False)
+    except Exception as e:
+        print(f"[Warning] YOLO 탐지 오류: {e}")
+        return None
+    detect_stats["yolo"] += len(frames)
+    stream_stats["batches"] += 1
+    stream_stats["images"] += len(frames)
+    return [parse_detections(result) for result in results]
+
+
+def stream_ticks():
+    """틱마다 (프레임 시각, [(stream, frame, 박스 목록, MediaPipe 결과)])"""
+    with ThreadPoolExecutor(max_workers=len(streams), thread_name_prefix="hands") as pool:
+        while streams:
+            grabbed = grab_streams()
+            if not grabbed:
+                time.sleep(STREAM_IDLE_SEC)
+                continue
+            frame_time = datetime.now()
+            stream_stats["ticks"] += 1
+
+            batch = [(stream, frame) for stream, frame in grabbed if stream.schedule.wants_yolo(frame)]
+            batch_detections = run_yolo_batch([frame for _, frame in batch]) if batch else []
+            if batch_detections is None:
+                # 배치 오류 → 스트림별로 한 장씩 다시 (그래도 실패한 스트림만 이번 틱에서 빠짐)
+                batch_detections = [run_yolo(frame) for _, frame in batch]
+
+            detections = {}
+            for (stream, _), stream_detections in zip(batch, batch_detections):
+                detections[stream] = stream.schedule.detected(stream_detections)
+            for stream, _ in grabbed:
+                if stream not in detections:
+                    detections[stream] = stream.schedule.track()
+            grabbed = [(stream, frame) for stream, frame in grabbed if detections[stream] is not None]
+            if not grabbed:
+                continue
+
+            hand_results = pool.map(lambda item: item[0].detect_hands(item[1]), grabbed)
+            yield frame_time, [(stream, frame, detections[stream], results)
+                               for (stream, frame), results in zip(grabbed, hand_results)]
+
 
-                # 방법 1: Kalman Filter 예측
-                pred_x, pred_y = palm_kalman.predict()
+# =========================================================
+# 메인 루프
+# =========================================================
 
-                if pred_x is not None and pred_y is not None:
-                    # 화면 경계 체크
-                    pred_x = max(0, min(pred_x, img_w))
-                    pred_y = max(0, min(pred_y, img_h))
+try:
+    print("=" * 60)
+    print("YOLO-World + Kalman Filter Hand Tracking")
+    print("=" * 60)
+    if MULTI_STREAM:
+        print(f"모드: 멀티 카메라 {len(streams)}대 ({', '.join(stream.stream_id for stream in streams)}), YOLO 배치")
+    else:
+        print(f"모드: {'파이프라인 (스레드)' if PIPELINE_MODE else '직렬'}")
+    if REPLAY_MODE:
+        print(f"재처리: {ARGS.replay[0]} (시작 {REPLAY_START:%Y-%m-%d %H:%M:%S}, {REPLAY_FPS:.1f} fps, 화면 없음)\n")
+        remove_replay_outputs()
+    else:
+        print("ESC 키로 종료하세요.\n")
+    sys.stdout.flush()
 
-                    current_palm_x = pred_x
-                    current_palm_y = pred_y
-                    hand_restored = True
-                    hand_detected = True  # ★ 복원된 손도 "감지됨"으로 처리
+    disk_writer.start()
 
-                    # 복원된 위치 표시
-                    cv2.circle(frame, (int(current_palm_x), int(current_palm_y)), 15, (0, 255, 255), 3)
-                    cv2.putText(frame, "RESTORED", (int(current_palm_x) - 40, int(current_palm_y) - 20),
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 255), 2)
+    if MULTI_STREAM:
+        for frame_time, tick in stream_ticks():
+            for stream, frame, detections, hand_results in tick:
+                hand_landmarks = hand_results.multi_hand_landmarks[0] if hand_results.multi_hand_landmarks else None
 
-                    print(f"[Hand] 복원 {hand_missing_frames}/{MISSING_HAND_TOLERANCE} (Kalman)")
+                for prefix, record in stream.detector.process(frame, detections, hand_landmarks, frame_time):
+                    save_log(prefix, record, frame_time, stream.stream_id)
 
-                # 방법 2: 선형 예측 (백업)
-                elif hand_last_seen_x is not None and len(palm_position_history) >= 2:
-                    # 등속도 가정
-                    current_palm_x = hand_last_seen_x + hand_velocity_x * hand_missing_frames
-                    current_palm_y = hand_last_seen_y + hand_velocity_y * hand_missing_frames
+                cv2.imshow(stream.window, frame)
 
-                    # 화면 경계 체크
-                    current_palm_x = max(0, min(current_palm_x, img_w))
-                    current_palm_y = max(0, min(current_palm_y, img_h))
+            if cv2.waitKey(1) & 0xFF == 27:
+                break
+    else:
+        frame_source = pipelined_frames() if PIPELINE_MODE else serial_frames()
+        replay_t0 = time.perf_counter()
 
-                    hand_restored = True
-                    hand_detected = True
+        for frame_time, frame, detections, hand_results in frame_source:
+            hand_landmarks = hand_results.multi_hand_landmarks[0] if hand_results.multi_hand_landmarks else None
 
-                    cv2.circle(frame, (int(current_palm_x), int(current_palm_y)), 12, (255, 0, 255), 2)
-                    cv2.putText(frame, "LINEAR", (int(current_palm_x) - 30, int(current_palm_y) - 20),
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 0, 255), 1)
+            for prefix, record in detector.process(frame, detections, hand_landmarks, frame_time):
+                save_log(prefix, record, frame_time)
+            if PIPELINE_MODE:
+                latest_roi_center = hand_roi_center()
 
-                    print(f"[Hand] 복원 {hand_missing_frames}/{MISSING_HAND_TOLERANCE} (Linear)")
+            if REPLAY_MODE and detector.frame_count % 300 == 0:
+                print(f"[Replay] {detector.frame_count} 프레임 ({frame_time:%H:%M:%S}), "
+                      f"{detector.frame_count / (time.perf_counter() - replay_t0):.1f} fps")
+                sys.stdout.flush()
 
-        # ===============================================================
-        # 거리 기반 상호작용 판단
-        # ===============================================================
+            if REPLAY_MODE:
+                continue
 
-        closest_cup_box = None
-        closest_cup_name = None
-        closest_cup_distance = float('inf')
-        hand_contact_cup = False
+            cv2.imshow("YOLO-World + Kalman Filter", frame)
 
-        if hand_detected and active_interaction != "study":
-            if tracked_cup_box is not None:
-                # ★ 복원된 손이어도 거리 계산 가능 (손바닥 위치만 있으면 됨)
-                if not hand_restored and hand_landmarks:
-                    dist = calculate_distance_to_bbox(tracked_cup_box, hand_landmarks, img_w, img_h)
-                else:
-                    # 복원된 경우: 손바닥 중심과 박스 중심 거리
-                    bx1, by1, bx2, by2 = tracked_cup_box
-                    box_cx = (bx1 + bx2) / 2
-                    box_cy = (by1 + by2) / 2
-                    dist = np.sqrt((current_palm_x - box_cx) ** 2 + (current_palm_y - box_cy) ** 2)
-
-                if dist <= WATER_PROXIMITY_DISTANCE:
-                    closest_cup_box = tracked_cup_box
-                    closest_cup_name = tracked_cup_name
-                    closest_cup_distance = dist
-                    hand_contact_cup = True
-
-            if not hand_contact_cup and len(detected_cups) > 0:
-                for cup_box, cup_name, cup_conf in detected_cups:
-                    if not hand_restored and hand_landmarks:
-                        dist = calculate_distance_to_bbox(cup_box, hand_landmarks, img_w, img_h)
-                    else:
-                        bx1, by1, bx2, by2 = cup_box
-                        box_cx = (bx1 + bx2) / 2
-                        box_cy = (by1 + by2) / 2
-                        dist = np.sqrt((current_palm_x - box_cx) ** 2 + (current_palm_y - box_cy) ** 2)
-
-                    if dist <= WATER_PROXIMITY_DISTANCE and dist < closest_cup_distance:
-                        closest_cup_distance = dist
-                        closest_cup_box = cup_box
-                        closest_cup_name = cup_name
-                        hand_contact_cup = True
-
-            if closest_cup_box:
-                x1, y1, x2, y2 = closest_cup_box
-                color = (255, 0, 0) if tracked_cup_box is not None else (0, 255, 0)
-                cv2.rectangle(frame, (x1, y1), (x2, y2), color, 3)
-                cv2.putText(frame, f"{closest_cup_name} {int(closest_cup_distance)}px",
-                            (x1, y1 - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
-
-        for cup_box, cup_name, cup_conf in detected_cups:
-            if cup_box != closest_cup_box:
-                x1, y1, x2, y2 = cup_box
-                cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 1)
-                cv2.putText(frame, f"{cup_name}", (x1, y1 - 5),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.4, (0, 255, 0), 1)
-
-        # --- [B] 공부 (기존 로직 유지) ---
-        closest_study_box = None
-        closest_study_name = None
-        closest_study_distance = float('inf')
-        hand_contact_study = False
-
-        if hand_detected and active_interaction != "water" and not hand_restored:
-            if tracked_study_box is not None and hand_landmarks:
-                dist = calculate_distance_to_bbox(tracked_study_box, hand_landmarks, img_w, img_h)
-                if dist <= STUDY_PROXIMITY_DISTANCE:
-                    closest_study_box = tracked_study_box
-                    closest_study_name = tracked_study_name
-                    closest_study_distance = dist
-                    hand_contact_study = True
-
-            if not hand_contact_study and len(detected_study) > 0:
-                for study_box, study_name, study_conf in detected_study:
-                    dist = calculate_distance_to_bbox(study_box, hand_landmarks, img_w, img_h)
-
-                    if dist <= STUDY_PROXIMITY_DISTANCE and dist < closest_study_distance:
-                        closest_study_distance = dist
-                        closest_study_box = study_box
-                        closest_study_name = study_name
-                        hand_contact_study = True
-
-            if closest_study_box:
-                x1, y1, x2, y2 = closest_study_box
-
-                if closest_study_name in STUDY_BOOK_CLASSES:
-                    color = (0, 140, 255)
-                elif closest_study_name in STUDY_DEVICE_CLASSES:
-                    color = (255, 140, 0)
-                else:
-                    color = (0, 255, 140)
-
-                line_width = 3 if tracked_study_box is not None else 2
-                cv2.rectangle(frame, (x1, y1), (x2, y2), color, line_width)
-                cv2.putText(frame, f"{closest_study_name} {int(closest_study_distance)}px",
-                            (x1, y1 - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
-
-                last_study_box = closest_study_box
-                last_study_class_name = closest_study_name
-
-        for study_box, study_name, study_conf in detected_study:
-            if study_box != closest_study_box:
-                x1, y1, x2, y2 = study_box
-                cv2.rectangle(frame, (x1, y1), (x2, y2), (200, 200, 200), 1)
-                cv2.putText(frame, f"{study_name}", (x1, y1 - 5),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.4, (200, 200, 200), 1)
-
-        # ==========================================================
-        # [로직 A] 물 마시기
-        # ==========================================================
-
-        in_cooldown = (frame_count - last_water_detected_frame) < DRINKING_COOLDOWN
-
-        if water_state == "idle" and not in_cooldown:
-            if hand_detected and hand_contact_cup and active_interaction != "study":
-                water_contact_counter += 1
-
-                if water_contact_counter == 1:
-                    tracked_cup_box = closest_cup_box
-                    tracked_cup_name = closest_cup_name
-                    tracked_cup_missing = 0
-                    print(f"[Water] 접촉 감지 시작 ({tracked_cup_name}, 거리: {int(closest_cup_distance)}px)")
-                    print(f"[Track] 컵 추적 시작 → 클래스 고정!")
-                    sys.stdout.flush()
-
-                if water_contact_counter >= WATER_CONTACT_FRAMES:
-                    water_state = "tracking"
-                    active_interaction = "water"
-                    detected_cup_name = tracked_cup_name
-                    detected_cup_box = tracked_cup_box
-
-                    initial_palm_y = current_palm_y
-                    initial_palm_x = current_palm_x
-                    palm_y_history = [current_palm_y]
-                    water_tracking_counter = 0
-                    upward_count = 0
-                    cup_gesture_count = 0
-
-                    print(f"[Water] 잠금 모드 진입! (물체: {detected_cup_name})")
-                    print(f"→ 이제 손 움직임만 추적합니다 (복원 가능)")
-                    sys.stdout.flush()
-            else:
-                if water_contact_counter > 0:
-                    print(f"[Water] 접촉 중단 (카운터 리셋)")
-                    sys.stdout.flush()
-                water_contact_counter = 0
-                tracked_cup_box = None
-                tracked_cup_name = None
-                tracked_cup_missing = 0
-
-        elif water_state == "tracking":
-            if hand_detected:
-                water_tracking_counter += 1
-                palm_y_history.append(current_palm_y)
-
-                if not hand_restored and gesture_holding_cup:
-                    cup_gesture_count += 1
-
-                if len(palm_y_history) >= 2:
-                    if palm_y_history[-2] - palm_y_history[-1] > 0.5:
-                        upward_count += 1
-
-                # ★ 복원된 손이어도 카운터는 리셋하지 않음
-                if not hand_restored:
-                    hand_missing_frames = 0
-
-            else:
-                # ★ 복원 실패 시에만 중단
-                if hand_missing_frames > MISSING_HAND_TOLERANCE:
-                    print(f"[Water] 손 완전 사라짐 → 중단")
-                    sys.stdout.flush()
-                    reset_water_state()
-                    active_interaction = None
-
-            if water_tracking_counter >= WATER_TRACKING_FRAMES:
-                total_rise = initial_palm_y - palm_y_history[-1]
-                consistency = upward_count / water_tracking_counter if water_tracking_counter > 0 else 0
-                gesture_conf = cup_gesture_count / water_tracking_counter if water_tracking_counter > 0 else 0
-
-                print(f"\n[Water 판단]")
-                print(f"  상승: {total_rise:.1f}px (>= {MIN_TOTAL_RISE})")
-                print(f"  일관성: {consistency:.2f} (>= {MOVEMENT_CONSISTENCY})")
-                print(f"  제스처: {gesture_conf:.2f} (>= {GESTURE_CONFIDENCE})")
-                sys.stdout.flush()
+            if cv2.waitKey(1) & 0xFF == 27:
+                break
 
-                if (total_rise >= MIN_TOTAL_RISE and
-                        consistency >= MOVEMENT_CONSISTENCY and
-                        gesture_conf >= GESTURE_CONFIDENCE):
-
-                    ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    cap_path = save_capture_image(frame.copy(), ts, "water_drinking")
-
-                    save_log("water", {
-                        "timestamp": ts,
-                        "action": "water_drinking",
-                        "object": detected_cup_name,
-                        "duration_frames": water_tracking_counter,
-                        "rise": int(total_rise),
-                        "consistency": round(consistency, 2),
-                        "gesture_conf": round(gesture_conf, 2),
-                        "capture_path": cap_path
-                    })
-
-                    last_water_detected_frame = frame_count
-                    reset_water_state()
-                    active_interaction = None
-                    print(f"★★★ 물 마시기 확정! ★★★\n")
-                    sys.stdout.flush()
-                else:
-                    print(f"[Water] 조건 미달 → 기각\n")
-                    sys.stdout.flush()
-                    reset_water_state()
-                    active_interaction = None
-
-        # ==========================================================
-        # [로직 B] 공부 감지 (기존 유지)
-        # ==========================================================
-
-        if study_state == "idle" and active_interaction != "water":
-            if hand_detected and hand_contact_study:
-                study_start_counter += 1
-
-                if study_start_counter == 1:
-                    tracked_study_box = closest_study_box
-                    tracked_study_name = closest_study_name
-                    tracked_study_missing = 0
-
-                if closest_study_box:
-                    bx1, by1, bx2, by2 = closest_study_box
-                    bar_y = by1 - 15
-                    progress = min(study_start_counter / STUDY_MIN_START_FRAMES, 1.0)
-                    cv2.rectangle(frame, (bx1, bar_y), (bx1 + int((bx2 - bx1) * progress), bar_y + 10),
-                                  (0, 165, 255), -1)
-
-                    msg = "Pen!" if gesture_holding_pen else "Hand"
-                    cv2.putText(frame, msg, (bx1, bar_y - 5),
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 165, 255), 2)
-
-                if study_start_counter >= STUDY_MIN_START_FRAMES:
-                    study_state = "studying"
-                    active_interaction = "study"
-                    study_total_frames = 0
-                    study_away_counter = 0
-
-                    study_start_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    study_start_capture_path = save_capture_image(frame.copy(), study_start_time, "study_start")
-
-                    study_object_name = get_category_from_class(tracked_study_name)
-                    study_object_detail = tracked_study_name
-
-                    print(f"\n[Study] 세션 시작!")
-                    print(f"  시작 시간: {study_start_time}")
-                    print(f"  물체: {study_object_name} ({study_object_detail})")
-                    sys.stdout.flush()
-            else:
-                study_start_counter = 0
-                tracked_study_box = None
-                tracked_study_name = None
-
-        elif study_state == "studying":
-            study_total_frames += 1
-
-            if hand_detected and hand_contact_study:
-                study_away_counter = 0
-
-                if gesture_holding_pen:
-                    cv2.putText(frame, "WRITING...", (50, 200),
-                                cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 0, 255), 2)
-            else:
-                study_away_counter += 1
-
-                if study_away_counter >= STUDY_AWAY_FRAMES:
-                    study_state = "idle"
-                    active_interaction = None
-
-                    study_end_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    study_end_capture_path = save_capture_image(frame.copy(), study_end_time, "study_end")
-
-                    duration_sec = round(study_total_frames / 30, 1)
-
-                    if study_total_frames >= STUDY_MIN_SESSION_FRAMES:
-                        save_log("study", {
-                            "start_time": study_start_time,
-                            "end_time": study_end_time,
-                            "duration_sec": duration_sec,
-                            "object": study_object_name,
-                            "object_detail": study_object_detail,
-                            "start_capture": study_start_capture_path,
-                            "end_capture": study_end_capture_path
-                        })
-                        print(f"[Study] 세션 종료 (기록 완료)")
-                    else:
-                        print(f"[Study] 세션 너무 짧음 (기록 안 함)")
-
-                    study_start_counter = 0
-                    study_total_frames = 0
-                    study_away_counter = 0
-                    tracked_study_box = None
-                    tracked_study_name = None
-                    sys.stdout.flush()
-
-        # ==========================================================
-        # UI 표시
-        # ==========================================================
-
-        if current_palm_x and not hand_restored:
-            if gesture_holding_pen and active_interaction != "water":
-                cv2.putText(frame, "PEN", (int(current_palm_x) - 20, int(current_palm_y) - 20),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 0, 255), 2)
-            elif gesture_holding_cup and active_interaction != "study":
-                cv2.putText(frame, "CUP", (int(current_palm_x) - 20, int(current_palm_y) - 20),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 100, 0), 2)
-
-        if in_cooldown:
-            cooldown_sec = (DRINKING_COOLDOWN - (frame_count - last_water_detected_frame)) / 30
-            cv2.putText(frame, f"Cooldown: {cooldown_sec:.1f}s", (img_w - 250, 60),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 165, 255), 2)
-
-        lock_color = (0, 0, 255) if active_interaction else (100, 100, 100)
-        lock_text = f"LOCK: {active_interaction.upper() if active_interaction else 'NONE'}"
-        cv2.putText(frame, lock_text, (img_w - 250, 30),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, lock_color, 2)
-
-        if tracked_cup_box is not None:
-            cv2.putText(frame, f"Tracking: {tracked_cup_name}", (10, 150),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 0, 0), 2)
-
-        if water_state == "idle":
-            water_color = (150, 150, 0)
-            status = "IDLE"
-            if water_contact_counter > 0:
-                status = f"Contact: {water_contact_counter}/{WATER_CONTACT_FRAMES}"
-        elif water_state == "tracking":
-            water_color = (0, 255, 255)
-            status = f"TRACKING {water_tracking_counter}/{WATER_TRACKING_FRAMES}"
-
-            if initial_palm_y and current_palm_y:
-                current_rise = initial_palm_y - current_palm_y
-                cv2.putText(frame, f"Rise: {current_rise:.1f}px", (10, 60),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.6, water_color, 2)
-
-        cv2.putText(frame, f"Water: {status}", (10, 30),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, water_color, 2)
-
-        # ★ 손 복원 상태 표시
-        if hand_restored:
-            cv2.putText(frame, f"Hand: RESTORED ({hand_missing_frames}f)", (10, 180),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
-
-        if study_state == "idle":
-            study_color = (100, 100, 100)
-            study_status = "IDLE"
-            if study_start_counter > 0:
-                study_status = f"Starting: {study_start_counter}/{STUDY_MIN_START_FRAMES}"
-        elif study_state == "studying":
-            if active_interaction == "study":
-                study_color = (0, 255, 255)
-            else:
-                study_color = (0, 200, 255)
-
-            sec = study_total_frames / 30
-            study_status = f"STUDYING {sec:.1f}s"
-
-            if study_away_counter > 0:
-                away_sec = (STUDY_AWAY_FRAMES - study_away_counter) / 30
-                cv2.putText(frame, f"Away: {away_sec:.1f}s left", (10, 115),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
-
-        cv2.putText(frame, f"Study: {study_status}", (10, 90),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, study_color, 2)
-
-        cv2.imshow("YOLO-World + Kalman Filter", frame)
-
-        if cv2.waitKey(1) & 0xFF == 27:
-            break
+    if REPLAY_MODE:
+        print(f"[Replay] 완료: {detector.frame_count} 프레임, {time.perf_counter() - replay_t0:.1f}s")
 
 except Exception as e:
     print(f"오류 발생: {e}")
-    import traceback
-
     traceback.print_exc()
 finally:
-    cap.release()
+    stop_pipeline()
+    disk_writer.close()
+    print(f"[Writer] 캡처 {disk_writer.stats['captures']}장 / 로그 {disk_writer.stats['logs']}줄 저장, "
+          f"버린 캡처 {disk_writer.stats['dropped']}장")
+    if DETECT_EVERY_N > 1:
+        print(f"[Detect] YOLO {detect_stats['yolo']}회 / 템플릿 추적 {detect_stats['tracked']}회")
+    if HAND_ROI_MODE:
+        print(f"[Hand ROI] ROI 검출 {hand_roi_stats['roi']}회 / 전체 프레임 재시도 {hand_roi_stats['fallback']}회")
+    if MULTI_STREAM:
+        print(f"[Streams] 틱 {stream_stats['ticks']}회 / YOLO 배치 {stream_stats['batches']}회 "
+              f"({stream_stats['images']}장), 다시 열기 {stream_stats['reopened']}회, 제외된 스트림 {stream_stats['dropped']}개")
+        for stream in streams:
+            stream.cap.release()
+    else:
+        cap.release()
     cv2.destroyAllWindows()
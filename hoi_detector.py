@@ -0,0 +1,840 @@
+"""
+손-물체 상호작용(HOI) 판단 엔진: 스트림 하나의 물 마시기 / 공부 상태
+
+(frame, 박스 목록, 손 랜드마크, 프레임 시각) → 로그 이벤트 목록
+상태는 전부 HOIDetector 인스턴스 안에 있으므로 스트림마다 하나씩, 카메라 / 모델 없이도 돌려볼 수 있음
+감지 스크립트("drink & study sensing model.py")와 tests/test_hoi_detector.py 가 같이 씀
+"""
+import sys
+import math
+import threading
+from collections import deque
+
+import cv2
+import numpy as np
+
+from sensing_geometry import (
+    box_array, iou_matrix, best_match, landmark_points, point_box_distances,
+    hand_box_distances, center_distances, closest_within,
+)
+
+# =========================================================
+# [클래스 매핑]
+# =========================================================
+DRINKING_CLASSES = ["cup", "mug", "water bottle", "glass", "coffee cup"]
+
+STUDY_BOOK_CLASSES = ["open book", "closed book", "textbook", "notebook", "journal"]
+STUDY_DEVICE_CLASSES = ["laptop", "keyboard", "tablet", "monitor"]
+STUDY_TOOL_CLASSES = ["pen", "pencil", "marker", "paper", "document", "notepad", "calculator"]
+
+ALL_STUDY_CLASSES = STUDY_BOOK_CLASSES + STUDY_DEVICE_CLASSES + STUDY_TOOL_CLASSES
+
+# ------------------ [파라미터] 물 마시기 ------------------
+WATER_CONTACT_FRAMES = 8
+WATER_TRACKING_FRAMES = 40
+MIN_TOTAL_RISE = 40
+MOVEMENT_CONSISTENCY = 0.50
+GESTURE_CONFIDENCE = 0.10
+
+WATER_PROXIMITY_DISTANCE = 20
+MISSING_HAND_TOLERANCE = 20  # ★ 이 프레임만큼 손 복원 시도
+MIN_OBJECT_SIZE_RATIO = 0.02
+DRINKING_MIN_CONFIDENCE = 0.35
+DRINKING_MIN_ASPECT_RATIO = 1.0
+
+DRINKING_COOLDOWN = 90
+
+IOU_THRESHOLD = 0.5
+MAX_TRACKING_FRAMES = 30
+
+# ------------------ [파라미터] 공부 감지 ------------------
+STUDY_MIN_CONFIDENCE = 0.30
+STUDY_PROXIMITY_DISTANCE = 20
+STUDY_MIN_START_FRAMES = 90
+STUDY_AWAY_FRAMES = 120
+STUDY_MIN_SESSION_FRAMES = 150
+
+# ------------------ [파라미터] YOLO 탐지 주기 ------------------
+DETECT_APPROACH_DISTANCE = 80  # 손바닥 ~ 물체 박스 거리가 이 안이면 매 프레임 탐지
+
+
+# =========================================================
+# [Kalman Filter 클래스]
+# =========================================================
+
+class KalmanFilter2D:
+    """2D 위치 추적을 위한 Kalman Filter"""
+
+    def __init__(self):
+        # 상태 벡터: [x, y, vx, vy] (위치 + 속도)
+        self.kalman = cv2.KalmanFilter(4, 2)
+
+        # 상태 전이 행렬 (등속도 모델)
+        self.kalman.transitionMatrix = np.array([
+            [1, 0, 1, 0],  # x = x + vx
+            [0, 1, 0, 1],  # y = y + vy
+            [0, 0, 1, 0],  # vx = vx
+            [0, 0, 0, 1]  # vy = vy
+        ], dtype=np.float32)
+
+        # 측정 행렬 (x, y만 측정)
+        self.kalman.measurementMatrix = np.array([
+            [1, 0, 0, 0],
+            [0, 1, 0, 0]
+        ], dtype=np.float32)
+
+        # 프로세스 노이즈
+        self.kalman.processNoiseCov = np.eye(4, dtype=np.float32) * 0.03
+
+        # 측정 노이즈
+        self.kalman.measurementNoiseCov = np.eye(2, dtype=np.float32) * 0.1
+
+        # 초기화 플래그
+        self.initialized = False
+
+    def update(self, x, y):
+        """실제 측정값으로 업데이트"""
+        measurement = np.array([[x], [y]], dtype=np.float32)
+
+        if not self.initialized:
+            # 첫 프레임: 상태 초기화
+            self.kalman.statePre = np.array([[x], [y], [0], [0]], dtype=np.float32)
+            self.kalman.statePost = np.array([[x], [y], [0], [0]], dtype=np.float32)
+            self.initialized = True
+            return x, y
+
+        # 예측 + 보정
+        self.kalman.correct(measurement)
+        prediction = self.kalman.predict()
+
+        return float(prediction.flat[0]), float(prediction.flat[1])
+
+    def predict(self):
+        """측정값 없이 예측만 수행 (손 사라졌을 때)"""
+        if not self.initialized:
+            return None, None
+
+        prediction = self.kalman.predict()
+        return float(prediction.flat[0]), float(prediction.flat[1])
+
+    def peek(self):
+        """상태를 바꾸지 않고 다음 위치만 추정 (손 ROI 위치 잡기용)"""
+        if not self.initialized:
+            return None, None
+
+        state = self.kalman.statePost
+        return float(state[0, 0] + state[2, 0]), float(state[1, 0] + state[3, 0])
+
+    def reset(self):
+        """필터 리셋"""
+        self.initialized = False
+
+
+# =========================================================
+# [제스처 감지 함수]
+# =========================================================
+
+def calculate_lm_distance(lm1, lm2):
+    return math.sqrt((lm1.x - lm2.x) ** 2 + (lm1.y - lm2.y) ** 2)
+
+
+def is_holding_pen(landmarks):
+    pinch_dist = calculate_lm_distance(landmarks.landmark[4], landmarks.landmark[8])
+    support_dist = calculate_lm_distance(landmarks.landmark[4], landmarks.landmark[12])
+    return pinch_dist < 0.08 and support_dist < 0.10
+
+
+def is_holding_cup(landmarks):
+    c_shape_dist = calculate_lm_distance(landmarks.landmark[4], landmarks.landmark[8])
+    return 0.05 <= c_shape_dist <= 0.30
+
+
+def get_palm_position(hand_landmarks, img_w, img_h):
+    palm = hand_landmarks.landmark[9]
+    return palm.x * img_w, palm.y * img_h
+
+
+def get_category_from_class(class_name):
+    if class_name in STUDY_BOOK_CLASSES:
+        return "book"
+    elif class_name in STUDY_DEVICE_CLASSES:
+        return "device"
+    elif class_name in STUDY_TOOL_CLASSES:
+        return "tool"
+    else:
+        return "unknown"
+
+
+# =========================================================
+# [감지 엔진]
+# =========================================================
+
+def filter_detections(detections, img_w, img_h):
+    """박스 목록 → (컵 후보, 공부 물체 후보)"""
+    detected_cups = []
+    detected_study = []
+
+    for bbox, class_name, confidence in detections:
+        x1, y1, x2, y2 = bbox
+        box_w, box_h = x2 - x1, y2 - y1
+        ratio = (box_w * box_h) / (img_w * img_h)
+
+        if class_name in DRINKING_CLASSES:
+            aspect_ratio = box_h / box_w if box_w > 0 else 0
+
+            if (confidence >= DRINKING_MIN_CONFIDENCE and
+                    ratio >= MIN_OBJECT_SIZE_RATIO and
+                    aspect_ratio >= DRINKING_MIN_ASPECT_RATIO):
+                detected_cups.append((bbox, class_name, confidence))
+
+        if class_name in ALL_STUDY_CLASSES:
+            if confidence >= STUDY_MIN_CONFIDENCE and ratio >= 0.02:
+                detected_study.append((bbox, class_name, confidence))
+
+    return detected_cups, detected_study
+
+
+class WaterState:
+    """물 마시기 상태 머신 (idle → tracking)"""
+
+    __slots__ = (
+        "state", "contact_counter", "tracking_counter",
+        "initial_palm_x", "initial_palm_y", "palm_y_history",
+        "upward_count", "cup_gesture_count", "hand_missing_frames",
+        "detected_cup_name", "detected_cup_box",
+        "tracked_cup_box", "tracked_cup_name", "tracked_cup_missing",
+        "palm_kalman", "palm_position_history",
+        "hand_last_seen_x", "hand_last_seen_y", "hand_velocity_x", "hand_velocity_y",
+    )
+
+    def __init__(self):
+        self.palm_kalman = KalmanFilter2D()
+        self.palm_position_history = deque(maxlen=10)  # 최근 10개 위치 저장
+        self.reset()
+
+    def reset(self):
+        self.state = "idle"
+        self.contact_counter = 0
+        self.tracking_counter = 0
+        self.initial_palm_x = None
+        self.initial_palm_y = None
+        self.palm_y_history = []
+        self.upward_count = 0
+        self.cup_gesture_count = 0
+        self.hand_missing_frames = 0
+        self.detected_cup_name = None
+        self.detected_cup_box = None
+        self.tracked_cup_box = None
+        self.tracked_cup_name = None
+        self.tracked_cup_missing = 0
+
+        # Kalman Filter 리셋
+        self.palm_kalman.reset()
+        self.palm_position_history.clear()
+        self.hand_last_seen_x = None
+        self.hand_last_seen_y = None
+        self.hand_velocity_x = 0
+        self.hand_velocity_y = 0
+
+
+class StudyState:
+    """공부 상태 머신 (idle → studying)"""
+
+    __slots__ = (
+        "state", "start_counter", "total_frames", "away_counter",
+        "start_time", "end_time", "object_name", "object_detail", "start_capture_path",
+        "last_box", "last_class_name",
+        "tracked_box", "tracked_name", "tracked_missing",
+    )
+
+    def __init__(self):
+        self.state = "idle"
+        self.start_counter = 0
+        self.total_frames = 0
+        self.away_counter = 0
+        self.start_time = None
+        self.end_time = None
+        self.object_name = "unknown"
+        self.object_detail = "unknown"
+        self.start_capture_path = None
+        self.last_box = None
+        self.last_class_name = None
+        self.tracked_box = None
+        self.tracked_name = None
+        self.tracked_missing = 0
+
+
+class HandObservation:
+    """프레임 하나의 손 상태 (실제 검출 또는 Kalman / 선형 복원)"""
+
+    __slots__ = ("detected", "restored", "landmarks", "points", "palm_x", "palm_y", "holding_cup", "holding_pen")
+
+    def __init__(self):
+        self.detected = False
+        self.restored = False
+        self.landmarks = None
+        self.points = None      # 주요 랜드마크 (7, 2) 픽셀 좌표, 실제 검출된 손만
+        self.palm_x = None
+        self.palm_y = None
+        self.holding_cup = False
+        self.holding_pen = False
+
+
+class HOIDetector:
+    """
+    스트림 하나의 손-물체 상호작용(HOI) 판단 엔진
+    process() 가 반환하는 이벤트: [(log prefix, record)] → save_log 로 저장
+    capture: (frame, 시각 문자열, prefix) → 저장 경로 (테스트 / 벤치마크에서는 디스크 없이 바꿔 끼움)
+    fps: 프레임 수 → 초 환산 (공부 세션 duration_sec, 화면 표시)
+    detect_every_n: 감지 스크립트의 DETECT_EVERY_N (1 이면 탐지 주기 힌트 계산 안 함)
+    draw_hand: (frame, 손 랜드마크) → 화면에 랜드마크 그리기, None 이면 생략
+    """
+
+    __slots__ = (
+        "water", "study", "active_interaction", "frame_count", "last_water_detected_frame",
+        "capture", "fps", "detect_every_n", "draw_hand", "detect_dense", "detect_now",
+    )
+
+    def __init__(self, capture, fps=30, detect_every_n=1, draw_hand=None):
+        self.water = WaterState()
+        self.study = StudyState()
+        self.active_interaction = None
+        self.frame_count = 0
+        self.last_water_detected_frame = 0
+        self.capture = capture
+        self.fps = fps
+        self.detect_every_n = detect_every_n
+        self.draw_hand = draw_hand
+
+        # 탐지 주기 힌트 (detect_every_n > 1): 탐지 단계가 읽음
+        self.detect_dense = False               # 손이 물체에 접근 중 → 매 프레임 YOLO
+        self.detect_now = threading.Event()     # 상태 진입(tracking / studying) → 다음 프레임 YOLO 1회
+
+    def process(self, frame, detections, hand_landmarks, frame_time):
+        self.frame_count += 1
+        img_h, img_w = frame.shape[:2]
+        events = []
+
+        detected_cups, detected_study = filter_detections(detections, img_w, img_h)
+        # 후보 박스 [컵..., 공부 물체...] 를 배열 하나로 → IoU / 거리 계산을 종류별로 반복하지 않음
+        candidate_boxes = box_array([box for box, _, _ in detected_cups + detected_study])
+        split = len(detected_cups)
+        self.follow_tracked_objects(detected_cups, detected_study, candidate_boxes)
+
+        hand = self.observe_hand(frame, hand_landmarks, img_w, img_h)
+
+        # 손 → [추적 컵, 추적 공부 물체, 후보...] 거리 (추적 중이 아니면 NaN)
+        if hand.detected:
+            tracked_boxes = box_array([self.water.tracked_cup_box, self.study.tracked_box])
+            distances = self.hand_distances(hand, np.vstack([tracked_boxes, candidate_boxes]))
+        else:
+            distances = np.full(2 + len(candidate_boxes), np.nan)
+
+        cup_box, cup_name, cup_distance = self.closest_cup(
+            frame, hand, detected_cups, distances[0], distances[2:2 + split])
+        study_box, study_name = self.closest_study(
+            frame, hand, detected_study, distances[1], distances[2 + split:])
+
+        in_cooldown = (self.frame_count - self.last_water_detected_frame) < DRINKING_COOLDOWN
+        self.update_water(frame, frame_time, hand, cup_box, cup_name, cup_distance, in_cooldown, events)
+        self.update_study(frame, frame_time, hand, study_box, study_name, events)
+
+        # 다음 프레임 탐지 주기 (손이 물체에 다가오는 중이면 매 프레임 YOLO)
+        if self.detect_every_n > 1:
+            self.detect_dense = (
+                hand.palm_x is not None and self.water.state == "idle" and self.study.state == "idle" and
+                len(candidate_boxes) > 0 and
+                point_box_distances(np.array([[hand.palm_x, hand.palm_y]]), candidate_boxes).min()
+                <= DETECT_APPROACH_DISTANCE
+            )
+
+        self.draw_status(frame, hand, in_cooldown, img_w)
+        return events
+
+    # ===============================================================
+    # IoU 기반 물체 추적
+    # ===============================================================
+
+    def follow_tracked_objects(self, detected_cups, detected_study, candidate_boxes):
+        water, study = self.water, self.study
+        if water.tracked_cup_box is None and study.tracked_box is None:
+            return
+
+        # 추적 박스 [컵, 공부 물체] × 후보 IoU 를 한 번에, 매칭은 같은 종류 후보끼리
+        ious = iou_matrix(box_array([water.tracked_cup_box, study.tracked_box]), candidate_boxes)
+        split = len(detected_cups)
+
+        if water.tracked_cup_box is not None:
+            match = best_match(ious[0, :split], IOU_THRESHOLD)
+
+            if match is not None:
+                water.tracked_cup_box = detected_cups[match][0]
+                water.tracked_cup_missing = 0
+            else:
+                water.tracked_cup_missing += 1
+                if water.tracked_cup_missing > MAX_TRACKING_FRAMES:
+                    print(f"[Track] 컵 추적 중단 (사라짐)")
+                    sys.stdout.flush()
+                    water.tracked_cup_box = None
+                    water.tracked_cup_name = None
+                    water.tracked_cup_missing = 0
+
+        if study.tracked_box is not None:
+            match = best_match(ious[1, split:], IOU_THRESHOLD)
+
+            if match is not None:
+                study.tracked_box = detected_study[match][0]
+                study.tracked_missing = 0
+            else:
+                study.tracked_missing += 1
+                if study.tracked_missing > MAX_TRACKING_FRAMES:
+                    study.tracked_box = None
+                    study.tracked_name = None
+                    study.tracked_missing = 0
+
+    # ===============================================================
+    # ★★★ 손 검출 + Kalman Filter 복원 ★★★
+    # ===============================================================
+
+    def observe_hand(self, frame, hand_landmarks, img_w, img_h):
+        water = self.water
+        hand = HandObservation()
+
+        if hand_landmarks is not None:
+            # ★ 실제 손 감지됨
+            if self.draw_hand is not None:
+                self.draw_hand(frame, hand_landmarks)
+            hand.landmarks = hand_landmarks
+            hand.points = landmark_points(hand_landmarks, img_w, img_h)
+            hand.detected = True
+            water.hand_missing_frames = 0
+
+            raw_x, raw_y = get_palm_position(hand_landmarks, img_w, img_h)
+
+            # Kalman Filter 업데이트
+            hand.palm_x, hand.palm_y = water.palm_kalman.update(raw_x, raw_y)
+
+            # 위치 히스토리 저장
+            history = water.palm_position_history
+            history.append((hand.palm_x, hand.palm_y))
+
+            # 속도 계산 (최근 2개 위치)
+            if len(history) >= 2:
+                water.hand_velocity_x = history[-1][0] - history[-2][0]
+                water.hand_velocity_y = history[-1][1] - history[-2][1]
+
+            water.hand_last_seen_x = hand.palm_x
+            water.hand_last_seen_y = hand.palm_y
+
+            hand.holding_cup = is_holding_cup(hand_landmarks)
+            hand.holding_pen = is_holding_pen(hand_landmarks)
+            return hand
+
+        # ★ 손이 안 보임 → 복원 시도
+        water.hand_missing_frames += 1
+
+        if water.hand_missing_frames <= MISSING_HAND_TOLERANCE and water.state == "tracking":
+            # ★★★ 복원 모드 ★★★
+
+            # 방법 1: Kalman Filter 예측
+            pred_x, pred_y = water.palm_kalman.predict()
+
+            if pred_x is not None and pred_y is not None:
+                # 화면 경계 체크
+                hand.palm_x = max(0, min(pred_x, img_w))
+                hand.palm_y = max(0, min(pred_y, img_h))
+                hand.restored = True
+                hand.detected = True  # ★ 복원된 손도 "감지됨"으로 처리
+
+                # 복원된 위치 표시
+                cv2.circle(frame, (int(hand.palm_x), int(hand.palm_y)), 15, (0, 255, 255), 3)
+                cv2.putText(frame, "RESTORED", (int(hand.palm_x) - 40, int(hand.palm_y) - 20),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 255), 2)
+
+                print(f"[Hand] 복원 {water.hand_missing_frames}/{MISSING_HAND_TOLERANCE} (Kalman)")
+
+            # 방법 2: 선형 예측 (백업)
+            elif water.hand_last_seen_x is not None and len(water.palm_position_history) >= 2:
+                # 등속도 가정
+                palm_x = water.hand_last_seen_x + water.hand_velocity_x * water.hand_missing_frames
+                palm_y = water.hand_last_seen_y + water.hand_velocity_y * water.hand_missing_frames
+
+                # 화면 경계 체크
+                hand.palm_x = max(0, min(palm_x, img_w))
+                hand.palm_y = max(0, min(palm_y, img_h))
+                hand.restored = True
+                hand.detected = True
+
+                cv2.circle(frame, (int(hand.palm_x), int(hand.palm_y)), 12, (255, 0, 255), 2)
+                cv2.putText(frame, "LINEAR", (int(hand.palm_x) - 30, int(hand.palm_y) - 20),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 0, 255), 1)
+
+                print(f"[Hand] 복원 {water.hand_missing_frames}/{MISSING_HAND_TOLERANCE} (Linear)")
+
+        return hand
+
+    # ===============================================================
+    # 거리 기반 상호작용 판단
+    # ===============================================================
+
+    def hand_distances(self, hand, boxes):
+        """손 → (N, 4) 박스들 거리 (N,)"""
+        if not hand.restored and hand.points is not None:
+            return hand_box_distances(hand.points, boxes)
+
+        # 복원된 경우: 손바닥 중심과 박스 중심 거리
+        return center_distances(hand.palm_x, hand.palm_y, boxes)
+
+    def closest_cup(self, frame, hand, detected_cups, tracked_distance, distances):
+        """반환: (접촉한 컵 박스, 이름, 거리), 접촉 없으면 박스 None"""
+        water = self.water
+        closest_cup_box = None
+        closest_cup_name = None
+        closest_cup_distance = float('inf')
+
+        if hand.detected and self.active_interaction != "study":
+            # ★ 복원된 손이어도 거리 계산 가능 (손바닥 위치만 있으면 됨)
+            if water.tracked_cup_box is not None and tracked_distance <= WATER_PROXIMITY_DISTANCE:
+                closest_cup_box = water.tracked_cup_box
+                closest_cup_name = water.tracked_cup_name
+                closest_cup_distance = tracked_distance
+            else:
+                closest = closest_within(distances, WATER_PROXIMITY_DISTANCE)
+                if closest is not None:
+                    closest_cup_box, closest_cup_name, _ = detected_cups[closest]
+                    closest_cup_distance = distances[closest]
+
+            if closest_cup_box:
+                x1, y1, x2, y2 = closest_cup_box
+                color = (255, 0, 0) if water.tracked_cup_box is not None else (0, 255, 0)
+                cv2.rectangle(frame, (x1, y1), (x2, y2), color, 3)
+                cv2.putText(frame, f"{closest_cup_name} {int(closest_cup_distance)}px",
+                            (x1, y1 - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+
+        for cup_box, cup_name, cup_conf in detected_cups:
+            if cup_box != closest_cup_box:
+                x1, y1, x2, y2 = cup_box
+                cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 1)
+                cv2.putText(frame, f"{cup_name}", (x1, y1 - 5),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.4, (0, 255, 0), 1)
+
+        return closest_cup_box, closest_cup_name, closest_cup_distance
+
+    def closest_study(self, frame, hand, detected_study, tracked_distance, distances):
+        """반환: (접촉한 공부 물체 박스, 이름), 접촉 없으면 박스 None"""
+        study = self.study
+        closest_study_box = None
+        closest_study_name = None
+        closest_study_distance = float('inf')
+
+        if hand.detected and self.active_interaction != "water" and not hand.restored:
+            if study.tracked_box is not None and tracked_distance <= STUDY_PROXIMITY_DISTANCE:
+                closest_study_box = study.tracked_box
+                closest_study_name = study.tracked_name
+                closest_study_distance = tracked_distance
+            else:
+                closest = closest_within(distances, STUDY_PROXIMITY_DISTANCE)
+                if closest is not None:
+                    closest_study_box, closest_study_name, _ = detected_study[closest]
+                    closest_study_distance = distances[closest]
+
+            if closest_study_box:
+                x1, y1, x2, y2 = closest_study_box
+
+                if closest_study_name in STUDY_BOOK_CLASSES:
+                    color = (0, 140, 255)
+                elif closest_study_name in STUDY_DEVICE_CLASSES:
+                    color = (255, 140, 0)
+                else:
+                    color = (0, 255, 140)
+
+                line_width = 3 if study.tracked_box is not None else 2
+                cv2.rectangle(frame, (x1, y1), (x2, y2), color, line_width)
+                cv2.putText(frame, f"{closest_study_name} {int(closest_study_distance)}px",
+                            (x1, y1 - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+
+                study.last_box = closest_study_box
+                study.last_class_name = closest_study_name
+
+        for study_box, study_name, study_conf in detected_study:
+            if study_box != closest_study_box:
+                x1, y1, x2, y2 = study_box
+                cv2.rectangle(frame, (x1, y1), (x2, y2), (200, 200, 200), 1)
+                cv2.putText(frame, f"{study_name}", (x1, y1 - 5),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.4, (200, 200, 200), 1)
+
+        return closest_study_box, closest_study_name
+
+    # ==========================================================
+    # [로직 A] 물 마시기
+    # ==========================================================
+
+    def update_water(self, frame, frame_time, hand, cup_box, cup_name, cup_distance, in_cooldown, events):
+        water = self.water
+
+        if water.state == "idle" and not in_cooldown:
+            if hand.detected and cup_box is not None and self.active_interaction != "study":
+                water.contact_counter += 1
+
+                if water.contact_counter == 1:
+                    water.tracked_cup_box = cup_box
+                    water.tracked_cup_name = cup_name
+                    water.tracked_cup_missing = 0
+                    print(f"[Water] 접촉 감지 시작 ({water.tracked_cup_name}, 거리: {int(cup_distance)}px)")
+                    print(f"[Track] 컵 추적 시작 → 클래스 고정!")
+                    sys.stdout.flush()
+
+                if water.contact_counter >= WATER_CONTACT_FRAMES:
+                    water.state = "tracking"
+                    self.active_interaction = "water"
+                    self.detect_now.set()
+                    water.detected_cup_name = water.tracked_cup_name
+                    water.detected_cup_box = water.tracked_cup_box
+
+                    water.initial_palm_y = hand.palm_y
+                    water.initial_palm_x = hand.palm_x
+                    water.palm_y_history = [hand.palm_y]
+                    water.tracking_counter = 0
+                    water.upward_count = 0
+                    water.cup_gesture_count = 0
+
+                    print(f"[Water] 잠금 모드 진입! (물체: {water.detected_cup_name})")
+                    print(f"→ 이제 손 움직임만 추적합니다 (복원 가능)")
+                    sys.stdout.flush()
+            else:
+                if water.contact_counter > 0:
+                    print(f"[Water] 접촉 중단 (카운터 리셋)")
+                    sys.stdout.flush()
+                water.contact_counter = 0
+                water.tracked_cup_box = None
+                water.tracked_cup_name = None
+                water.tracked_cup_missing = 0
+
+        elif water.state == "tracking":
+            if hand.detected:
+                water.tracking_counter += 1
+                water.palm_y_history.append(hand.palm_y)
+
+                if not hand.restored and hand.holding_cup:
+                    water.cup_gesture_count += 1
+
+                if len(water.palm_y_history) >= 2:
+                    if water.palm_y_history[-2] - water.palm_y_history[-1] > 0.5:
+                        water.upward_count += 1
+
+                # ★ 복원된 손이어도 카운터는 리셋하지 않음
+                if not hand.restored:
+                    water.hand_missing_frames = 0
+
+            else:
+                # ★ 복원 실패 시에만 중단
+                if water.hand_missing_frames > MISSING_HAND_TOLERANCE:
+                    print(f"[Water] 손 완전 사라짐 → 중단")
+                    sys.stdout.flush()
+                    water.reset()
+                    self.active_interaction = None
+
+            if water.tracking_counter >= WATER_TRACKING_FRAMES:
+                total_rise = water.initial_palm_y - water.palm_y_history[-1]
+                consistency = water.upward_count / water.tracking_counter if water.tracking_counter > 0 else 0
+                gesture_conf = water.cup_gesture_count / water.tracking_counter if water.tracking_counter > 0 else 0
+
+                print(f"\n[Water 판단]")
+                print(f"  상승: {total_rise:.1f}px (>= {MIN_TOTAL_RISE})")
+                print(f"  일관성: {consistency:.2f} (>= {MOVEMENT_CONSISTENCY})")
+                print(f"  제스처: {gesture_conf:.2f} (>= {GESTURE_CONFIDENCE})")
+                sys.stdout.flush()
+
+                if (total_rise >= MIN_TOTAL_RISE and
+                        consistency >= MOVEMENT_CONSISTENCY and
+                        gesture_conf >= GESTURE_CONFIDENCE):
+
+                    ts = frame_time.strftime("%Y-%m-%d %H:%M:%S")
+                    cap_path = self.capture(frame.copy(), ts, "water_drinking")
+
+                    events.append(("water", {
+                        "timestamp": ts,
+                        "action": "water_drinking",
+                        "object": water.detected_cup_name,
+                        "duration_frames": water.tracking_counter,
+                        "rise": int(total_rise),
+                        "consistency": round(consistency, 2),
+                        "gesture_conf": round(gesture_conf, 2),
+                        "capture_path": cap_path
+                    }))
+
+                    self.last_water_detected_frame = self.frame_count
+                    water.reset()
+                    self.active_interaction = None
+                    print(f"★★★ 물 마시기 확정! ★★★\n")
+                    sys.stdout.flush()
+                else:
+                    print(f"[Water] 조건 미달 → 기각\n")
+                    sys.stdout.flush()
+                    water.reset()
+                    self.active_interaction = None
+
+    # ==========================================================
+    # [로직 B] 공부 감지
+    # ==========================================================
+
+    def update_study(self, frame, frame_time, hand, study_box, study_name, events):
+        study = self.study
+
+        if study.state == "idle" and self.active_interaction != "water":
+            if hand.detected and study_box is not None:
+                study.start_counter += 1
+
+                if study.start_counter == 1:
+                    study.tracked_box = study_box
+                    study.tracked_name = study_name
+                    study.tracked_missing = 0
+
+                bx1, by1, bx2, by2 = study_box
+                bar_y = by1 - 15
+                progress = min(study.start_counter / STUDY_MIN_START_FRAMES, 1.0)
+                cv2.rectangle(frame, (bx1, bar_y), (bx1 + int((bx2 - bx1) * progress), bar_y + 10),
+                              (0, 165, 255), -1)
+
+                msg = "Pen!" if hand.holding_pen else "Hand"
+                cv2.putText(frame, msg, (bx1, bar_y - 5),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 165, 255), 2)
+
+                if study.start_counter >= STUDY_MIN_START_FRAMES:
+                    study.state = "studying"
+                    self.active_interaction = "study"
+                    self.detect_now.set()
+                    study.total_frames = 0
+                    study.away_counter = 0
+
+                    study.start_time = frame_time.strftime("%Y-%m-%d %H:%M:%S")
+                    study.start_capture_path = self.capture(frame.copy(), study.start_time, "study_start")
+
+                    study.object_name = get_category_from_class(study.tracked_name)
+                    study.object_detail = study.tracked_name
+
+                    print(f"\n[Study] 세션 시작!")
+                    print(f"  시작 시간: {study.start_time}")
+                    print(f"  물체: {study.object_name} ({study.object_detail})")
+                    sys.stdout.flush()
+            else:
+                study.start_counter = 0
+                study.tracked_box = None
+                study.tracked_name = None
+
+        elif study.state == "studying":
+            study.total_frames += 1
+
+            if hand.detected and study_box is not None:
+                study.away_counter = 0
+
+                if hand.holding_pen:
+                    cv2.putText(frame, "WRITING...", (50, 200),
+                                cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 0, 255), 2)
+            else:
+                study.away_counter += 1
+
+                if study.away_counter >= STUDY_AWAY_FRAMES:
+                    study.state = "idle"
+                    self.active_interaction = None
+
+                    study.end_time = frame_time.strftime("%Y-%m-%d %H:%M:%S")
+                    end_capture_path = self.capture(frame.copy(), study.end_time, "study_end")
+
+                    duration_sec = round(study.total_frames / self.fps, 1)
+
+                    if study.total_frames >= STUDY_MIN_SESSION_FRAMES:
+                        events.append(("study", {
+                            "start_time": study.start_time,
+                            "end_time": study.end_time,
+                            "duration_sec": duration_sec,
+                            "object": study.object_name,
+                            "object_detail": study.object_detail,
+                            "start_capture": study.start_capture_path,
+                            "end_capture": end_capture_path
+                        }))
+                        print(f"[Study] 세션 종료 (기록 완료)")
+                    else:
+                        print(f"[Study] 세션 너무 짧음 (기록 안 함)")
+
+                    study.start_counter = 0
+                    study.total_frames = 0
+                    study.away_counter = 0
+                    study.tracked_box = None
+                    study.tracked_name = None
+                    sys.stdout.flush()
+
+    # ==========================================================
+    # UI 표시
+    # ==========================================================
+
+    def draw_status(self, frame, hand, in_cooldown, img_w):
+        water, study = self.water, self.study
+        active_interaction = self.active_interaction
+
+        if hand.palm_x and not hand.restored:
+            if hand.holding_pen and active_interaction != "water":
+                cv2.putText(frame, "PEN", (int(hand.palm_x) - 20, int(hand.palm_y) - 20),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 0, 255), 2)
+            elif hand.holding_cup and active_interaction != "study":
+                cv2.putText(frame, "CUP", (int(hand.palm_x) - 20, int(hand.palm_y) - 20),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 100, 0), 2)
+
+        if in_cooldown:
+            cooldown_sec = (DRINKING_COOLDOWN - (self.frame_count - self.last_water_detected_frame)) / self.fps
+            cv2.putText(frame, f"Cooldown: {cooldown_sec:.1f}s", (img_w - 250, 60),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 165, 255), 2)
+
+        lock_color = (0, 0, 255) if active_interaction else (100, 100, 100)
+        lock_text = f"LOCK: {active_interaction.upper() if active_interaction else 'NONE'}"
+        cv2.putText(frame, lock_text, (img_w - 250, 30),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, lock_color, 2)
+
+        if water.tracked_cup_box is not None:
+            cv2.putText(frame, f"Tracking: {water.tracked_cup_name}", (10, 150),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 0, 0), 2)
+
+        if water.state == "idle":
+            water_color = (150, 150, 0)
+            status = "IDLE"
+            if water.contact_counter > 0:
+                status = f"Contact: {water.contact_counter}/{WATER_CONTACT_FRAMES}"
+        else:
+            water_color = (0, 255, 255)
+            status = f"TRACKING {water.tracking_counter}/{WATER_TRACKING_FRAMES}"
+
+            if water.initial_palm_y and hand.palm_y:
+                current_rise = water.initial_palm_y - hand.palm_y
+                cv2.putText(frame, f"Rise: {current_rise:.1f}px", (10, 60),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.6, water_color, 2)
+
+        cv2.putText(frame, f"Water: {status}", (10, 30),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, water_color, 2)
+
+        # ★ 손 복원 상태 표시
+        if hand.restored:
+            cv2.putText(frame, f"Hand: RESTORED ({water.hand_missing_frames}f)", (10, 180),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
+
+        if study.state == "idle":
+            study_color = (100, 100, 100)
+            study_status = "IDLE"
+            if study.start_counter > 0:
+                study_status = f"Starting: {study.start_counter}/{STUDY_MIN_START_FRAMES}"
+        else:
+            if active_interaction == "study":
+                study_color = (0, 255, 255)
+            else:
+                study_color = (0, 200, 255)
+
+            sec = study.total_frames / self.fps
+            study_status = f"STUDYING {sec:.1f}s"
+
+            if study.away_counter > 0:
+                away_sec = (STUDY_AWAY_FRAMES - study.away_counter) / self.fps
+                cv2.putText(frame, f"Away: {away_sec:.1f}s left", (10, 115),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
+
+        cv2.putText(frame, f"Study: {study_status}", (10, 90),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, study_color, 2)
+
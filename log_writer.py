@@ -0,0 +1,261 @@
+"""
+감지 결과 디스크 쓰기: 캡처 JPEG + 일별 로그 (CSV / Arrow)
+
+로그 파일은 서버(/api/logs/update, AI 분석 결과 기록)도 통째로 고쳐 쓰므로(임시 파일 → os.replace)
+양쪽 모두 로그 파일 옆 lock 파일(log_file_lock)을 잡고 쓴다.
+감지 스크립트("drink & study sensing model.py")와 tests/test_log_writer.py 가 같이 씀
+"""
+import os
+import io
+import csv
+import time
+import queue
+import threading
+import traceback
+from contextlib import contextmanager
+
+import cv2
+
+# ------------------ [Arrow 로그 스키마] ------------------
+# server/server.py 의 LOG_SCHEMAS 와 동일하게 유지
+LOG_SCHEMAS = {
+    "water": [
+        ("timestamp", "string"), ("action", "string"), ("object", "string"),
+        ("duration_frames", "int64"), ("rise", "int64"),
+        ("consistency", "float64"), ("gesture_conf", "float64"),
+        ("capture_path", "string"), ("ai_result", "string"), ("manual_label", "string"),
+    ],
+    "study": [
+        ("start_time", "string"), ("end_time", "string"), ("duration_sec", "float64"),
+        ("object", "string"), ("object_detail", "string"),
+        ("start_capture", "string"), ("end_capture", "string"),
+        ("book_id", "string"), ("book_title", "string"), ("book_authors", "string"),
+        ("book_thumbnail", "string"), ("total_pages", "float64"), ("read_pages", "float64"),
+        ("description", "string"), ("purpose", "string"), ("duration_min", "float64"),
+        ("category", "string"), ("manual_label", "string"), ("subject", "string"), ("note", "string"),
+    ],
+}
+
+
+# =========================================================
+# [로그 파일 lock] 서버 server/server.py 의 log_file_lock 과 같은 규칙 유지
+# =========================================================
+
+def log_lock_path(path):
+    """logs/water_log_2025-09-01.csv → logs/.water_log_2025-09-01.csv.lock (서버 glob 에 안 걸리게 숨김 파일)"""
+    directory, name = os.path.split(path)
+    return os.path.join(directory, f".{name}.lock")
+
+
+@contextmanager
+def log_file_lock(path):
+    """프로세스 간 배타 lock (POSIX: flock, Windows: msvcrt.locking 첫 바이트)"""
+    with open(log_lock_path(path), "a+b") as fh:
+        if os.name == "nt":
+            import msvcrt
+            fh.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK, 1)   # 10초 동안 재시도 후 OSError
+                    break
+                except OSError:
+                    continue
+            try:
+                yield
+            finally:
+                fh.seek(0)
+                msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+
+
+def csv_line(values):
+    buf = io.StringIO()
+    csv.writer(buf, lineterminator="\n").writerow(["" if v is None else v for v in values])
+    return buf.getvalue()
+
+
+def arrow_path_of(csv_path):
+    return os.path.splitext(csv_path)[0] + ".arrow"
+
+
+def csv_rows_to_table(rows, schema):
+    """CSV 줄(전부 문자열, 빈 칸 = null) → schema 타입의 Arrow Table (schema 에 없는 컬럼은 string 으로 뒤에)"""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    names = list(schema.names) + [c for c in (rows[0].keys() if rows else []) if c not in schema.names]
+    arrays, fields = [], []
+    for name in names:
+        text = pa.array([row.get(name) or None for row in rows], type=pa.string())
+        field = schema.field(name) if name in schema.names else pa.field(name, pa.string())
+        if pa.types.is_integer(field.type):
+            # 서버가 고쳐 쓴 CSV 는 정수 컬럼이 "76.0" 처럼 저장될 수 있음
+            text = pc.round(text.cast(pa.float64()))
+        arrays.append(text.cast(field.type))
+        fields.append(field)
+    return pa.Table.from_arrays(arrays, schema=pa.schema(fields))
+
+
+def merge_csv_into_arrow(csv_path, prefix):
+    """
+    하루치 CSV 로그 → 같은 이름의 .arrow 에 합치고 CSV 삭제 (날짜가 바뀔 때 / 종료할 때 한 번)
+    - 임시 파일에 쓰고 os.replace → 도중에 죽어도 기존 .arrow 는 그대로
+    - 합친 CSV (이름, 크기)를 .arrow 스키마 metadata 에 남김 → 교체 후 CSV 삭제 전에 죽었으면 다음에 다시 합치지 않고 삭제만
+    """
+    import pyarrow as pa
+    import pyarrow.ipc
+
+    arrow_path = arrow_path_of(csv_path)
+    with log_file_lock(csv_path), log_file_lock(arrow_path):
+        if not os.path.exists(csv_path):
+            return
+        marker = f"{os.path.basename(csv_path)}:{os.path.getsize(csv_path)}".encode("utf-8")
+
+        existing = None
+        if os.path.exists(arrow_path):
+            # memory map 대신 일반 읽기 → 교체(os.replace) 전에 파일 핸들이 풀리도록
+            with pa.OSFile(arrow_path, 'rb') as source:
+                existing = pa.ipc.open_file(source).read_all()
+            if (existing.schema.metadata or {}).get(b"merged_csv") == marker:
+                os.remove(csv_path)
+                return
+            existing = existing.replace_schema_metadata(None)
+
+        with open(csv_path, encoding="utf-8-sig", newline="") as fh:
+            rows = list(csv.DictReader(fh))
+        schema = existing.schema if existing is not None else \
+            pa.schema([pa.field(name, type_name) for name, type_name in LOG_SCHEMAS[prefix]])
+        table = csv_rows_to_table(rows, schema)
+        if existing is not None:
+            table = pa.concat_tables([existing, table], promote_options="default")
+        table = table.replace_schema_metadata({b"merged_csv": marker})
+
+        tmp_path = arrow_path + ".tmp"
+        with pa.OSFile(tmp_path, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, arrow_path)
+        os.remove(csv_path)
+
+
+class DiskWriter:
+    """
+    캡처 JPEG 인코딩 / 로그 추가를 전담하는 백그라운드 스레드
+    - CSV 로그: 줄을 모았다가 flush_sec 마다 파일별로 lock → 열기 / 추가 / fsync / 닫기
+      (핸들을 열어 두지 않으므로 서버의 os.replace 가 Windows 에서도 막히지 않고,
+       서버가 교체하는 도중에 쓴 줄이 이전 파일로 사라지지도 않음)
+    - Arrow 로그 (log_format="arrow"): 그날 줄은 CSV 와 똑같이 추가하고, 날짜가 바뀌거나 종료할 때
+      merge_csv_into_arrow 로 .arrow 에 한 번에 합침 (행마다 하루치 파일을 다시 쓰지 않음)
+    - 같은 큐 순서대로 처리 → 캡처 파일이 그 파일을 가리키는 로그 줄보다 먼저 써짐
+    """
+
+    def __init__(self, maxsize, flush_sec, log_format="csv", drop_captures=True):
+        self.jobs = queue.Queue(maxsize)
+        self.flush_sec = flush_sec
+        self.log_format = log_format
+        self.drop_captures = drop_captures
+        self.pending = {}   # path → [csv 줄]
+        self.headers = {}   # path → 헤더 줄 (파일이 비어 있을 때만 씀)
+        self.days = {}      # Arrow 로그: (prefix, 스트림 ID) → (지금 쓰는 CSV path, prefix)
+        self.stats = {"captures": 0, "logs": 0, "dropped": 0}
+        self.thread = threading.Thread(target=self.run, name="writer", daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def save_capture(self, filepath, frame):
+        try:
+            self.jobs.put(("capture", filepath, frame), block=not self.drop_captures)
+        except queue.Full:
+            self.stats["dropped"] += 1
+            print(f"[Warning] 쓰기 큐 가득 참 → 캡처 버림: {filepath}")
+
+    def save_log(self, prefix, path, record, stream_id=None):
+        self.jobs.put(("log", prefix, path, record, stream_id))
+
+    def close(self):
+        """남은 작업을 모두 쓰고 종료 (ESC / 종료 시)"""
+        if self.thread.is_alive():
+            self.jobs.put(None)
+            self.thread.join()
+
+    def run(self):
+        last_flush = time.monotonic()
+        while True:
+            try:
+                job = self.jobs.get(timeout=self.flush_sec)
+            except queue.Empty:
+                job = False
+
+            if job is None:
+                break
+            if job:
+                try:
+                    self.handle(job)
+                except Exception:
+                    traceback.print_exc()
+
+            if time.monotonic() - last_flush >= self.flush_sec:
+                self.flush()
+                last_flush = time.monotonic()
+
+        self.flush()
+        for path, prefix in self.days.values():
+            self.merge(path, prefix)
+        self.days.clear()
+
+    def handle(self, job):
+        if job[0] == "capture":
+            _, filepath, frame = job
+            if not cv2.imwrite(filepath, frame):
+                print(f"[Warning] 캡처 저장 실패: {filepath}")
+            self.stats["captures"] += 1
+            return
+
+        _, prefix, path, record, stream_id = job
+        self.stats["logs"] += 1
+        if self.log_format == "arrow":
+            self.start_day((prefix, stream_id), path, prefix)
+
+        self.headers.setdefault(path, csv_line(record.keys()))
+        self.pending.setdefault(path, []).append(csv_line(record.values()))
+
+    def start_day(self, key, path, prefix):
+        """Arrow 로그: 날짜가 바뀌면 전날 CSV 를 .arrow 로 합침, 이전 실행이 남긴 CSV 는 쓰기 전에 먼저 합침"""
+        current = self.days.get(key)
+        if current and current[0] == path:
+            return
+        if current:
+            self.flush()
+            self.merge(*current)
+        self.merge(path, prefix)
+        self.days[key] = (path, prefix)
+
+    def merge(self, path, prefix):
+        try:
+            merge_csv_into_arrow(path, prefix)
+        except Exception:
+            # CSV 는 남아 있으므로 다음 실행 / python server/server.py convert-logs 로 다시 합칠 수 있음
+            traceback.print_exc()
+
+    def flush(self):
+        pending, self.pending = self.pending, {}
+        for path, lines in pending.items():
+            try:
+                with log_file_lock(path):
+                    with open(path, "a", encoding="utf-8", newline="") as fh:
+                        if fh.tell() == 0:
+                            fh.write(self.headers[path])
+                        fh.write("".join(lines))
+                        fh.flush()
+                        os.fsync(fh.fileno())
+            except OSError:
+                # 다음 flush 에서 다시 시도 (순서 유지: 실패한 줄이 앞)
+                traceback.print_exc()
+                self.pending[path] = lines + self.pending.get(path, [])
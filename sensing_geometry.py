@@ -0,0 +1,71 @@
+"""
+손-물체 판단용 박스 기하 연산 (NumPy 벡터화)
+
+박스는 (x1, y1, x2, y2) 픽셀 좌표, 여러 개를 (N, 4) 배열로 한 번에 계산한다.
+감지 엔진(hoi_detector.py)과 bench_sensing_geometry.py 가 같이 씀
+"""
+import numpy as np
+
+KEY_LANDMARKS = [0, 4, 8, 12, 16, 20, 9]  # 손목, 손가락 끝 5개, 손바닥 중심
+
+
+def box_array(boxes):
+    """박스 목록 → (N, 4) float 배열, None 자리는 NaN (IoU 0, 어떤 거리 비교도 통과 못 함)"""
+    if None not in boxes:
+        return np.array(boxes, dtype=float).reshape(-1, 4)
+    return np.array([(np.nan,) * 4 if box is None else box for box in boxes], dtype=float)
+
+
+def iou_matrix(boxes_a, boxes_b):
+    """(N, 4) × (M, 4) → (N, M) IoU"""
+    ax1, ay1, ax2, ay2 = boxes_a[:, :, None].transpose(1, 0, 2)   # 각 (N, 1)
+    bx1, by1, bx2, by2 = boxes_b.T                               # 각 (M,)
+
+    inter = (np.maximum(np.minimum(ax2, bx2) - np.maximum(ax1, bx1), 0) *
+             np.maximum(np.minimum(ay2, by2) - np.maximum(ay1, by1), 0))
+    union = (ax2 - ax1) * (ay2 - ay1) + (bx2 - bx1) * (by2 - by1) - inter
+
+    # 넓이 0 박스끼리면 inter 도 0 → 0 (0 나누기 경고 없이)
+    return inter / np.maximum(union, 1e-9)
+
+
+def best_match(ious, threshold):
+    """IoU 한 줄 (후보별) → threshold 를 넘는 것 중 가장 큰 후보 인덱스 (같으면 앞쪽), 없으면 None"""
+    if len(ious) == 0:
+        return None
+    j = int(ious.argmax())
+    return j if ious[j] > threshold else None
+
+
+def landmark_points(hand_landmarks, img_w, img_h):
+    """MediaPipe 손 랜드마크 → 주요 랜드마크 (7, 2) 픽셀 좌표"""
+    landmark = hand_landmarks.landmark
+    return np.array([(landmark[i].x, landmark[i].y) for i in KEY_LANDMARKS]) * (img_w, img_h)
+
+
+def point_box_distances(points, boxes):
+    """(P, 2) 점 × (N, 4) 박스 → (P, N) 점에서 박스 테두리까지 거리 (박스 안이면 0)"""
+    p = points[:, None, :]
+    d = np.maximum(np.maximum(boxes[:, :2] - p, 0), p - boxes[:, 2:])   # (P, N, 2) x / y 방향 거리
+    d *= d
+    return np.sqrt(d[..., 0] + d[..., 1])
+
+
+def hand_box_distances(points, boxes):
+    """손 (주요 랜드마크 점들) → 박스별 가장 가까운 랜드마크 거리 (N,)"""
+    return point_box_distances(points, boxes).min(axis=0)
+
+
+def center_distances(x, y, boxes):
+    """점 (x, y) → 박스 중심까지 거리 (N,)"""
+    cx = (boxes[:, 0] + boxes[:, 2]) / 2
+    cy = (boxes[:, 1] + boxes[:, 3]) / 2
+    return np.sqrt((x - cx) ** 2 + (y - cy) ** 2)
+
+
+def closest_within(distances, limit):
+    """limit 이하인 것 중 가장 가까운 인덱스 (같으면 앞쪽), 없으면 None"""
+    if len(distances) == 0:
+        return None
+    i = int(np.argmin(distances))
+    return i if distances[i] <= limit else None
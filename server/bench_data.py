@@ -0,0 +1,179 @@
+"""
+벤치마크용 합성 데이터 생성기 (DATA_DIR 구조 그대로: logs/ + captures/)
+
+하루치 로그를 행 수(rows)별로 만들고, 실제 sensing 모델 / 예전 버전이 남기는 파일명 패턴을 모두 포함:
+- water_log_YYYY-MM-DD.csv                   (timestamp 컬럼, sensing 모델 기본)
+- study_log_YYYY-MM-DD.csv                   (start_time / end_time / duration_sec 세션 행)
+- study_YYYY-MM-DD-HH-MM.csv                 (timestamp 컬럼 없음 → 파일명 시각 사용)
+- study_YYYY-MM-DD_HH-MM-SS.csv              (timestamp 컬럼 있음)
+- water_log_YYYY-MM-DD.arrow                 (pyarrow 가 있으면, Arrow 로그 모드)
+captures/ 에는 {prefix}_{YYYY-MM-DD}_{HH-MM-SS}_{id}.jpg 형식의 JPEG stub 을 만든다.
+
+같은 seed 면 같은 데이터 → 커밋 간 비교 가능
+
+실행: python server/bench_data.py 출력폴더 [--sizes 10,1000,100000] [--captures 20000]
+"""
+import os
+import random
+import argparse
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:
+    pa = None
+
+FIRST_DAY = datetime(2025, 12, 1)
+JPEG_STUB = b"\xff\xd8\xff\xe0\x00\x10JFIF\x00\xff\xd9"
+
+WATER_OBJECTS = ["cup", "mug", "water bottle", "glass"]
+STUDY_OBJECTS = [("book", "open book"), ("book", "notebook"), ("laptop", "laptop"), ("device", "tablet")]
+CAPTURE_PREFIXES = ["water_drinking", "study_start", "study_end", "study"]
+
+
+def day_timestamps(rng: random.Random, day: datetime, count: int) -> list:
+    seconds = sorted(rng.randrange(6 * 3600, 24 * 3600) for _ in range(count))
+    return [day + timedelta(seconds=s) for s in seconds]
+
+
+def water_rows(rng: random.Random, times: list) -> pd.DataFrame:
+    return pd.DataFrame({
+        "timestamp": [t.strftime("%Y-%m-%d %H:%M:%S") for t in times],
+        "action": "water_drinking",
+        "object": [rng.choice(WATER_OBJECTS) for _ in times],
+        "duration_frames": [rng.randint(5, 90) for _ in times],
+        "rise": [round(rng.uniform(10, 80), 1) for _ in times],
+        "consistency": [round(rng.random(), 3) for _ in times],
+        "gesture_conf": [round(rng.random(), 3) for _ in times],
+        "capture_path": [
+            f"captures\\water_drinking_{t.strftime('%Y-%m-%d_%H-%M-%S')}_{i:08x}.jpg" for i, t in enumerate(times)
+        ],
+    })
+
+
+def study_session_rows(rng: random.Random, times: list) -> pd.DataFrame:
+    """sensing 모델 형식: 행 하나 = 세션 하나"""
+    rows = []
+    for t in times:
+        duration = rng.randint(60, 1800)
+        obj, detail = rng.choice(STUDY_OBJECTS)
+        end = t + timedelta(seconds=duration)
+        rows.append({
+            "start_time": t.strftime("%Y-%m-%d %H:%M:%S"),
+            "end_time": end.strftime("%Y-%m-%d %H:%M:%S"),
+            "duration_sec": float(duration),
+            "object": obj,
+            "object_detail": detail,
+            "start_capture": f"captures/study_start_{t.strftime('%Y-%m-%d_%H-%M-%S')}_{rng.getrandbits(32):08x}.jpg",
+            "end_capture": f"captures/study_end_{end.strftime('%Y-%m-%d_%H-%M-%S')}_{rng.getrandbits(32):08x}.jpg",
+        })
+    return pd.DataFrame(rows)
+
+
+def study_point_rows(rng: random.Random, times: list, with_timestamp: bool) -> pd.DataFrame:
+    """예전 형식: 몇 초마다 한 줄씩 남기는 timestamp 로그"""
+    df = pd.DataFrame({
+        "object": [rng.choice(["book", "laptop", "Book"]) for _ in times],
+        "capture_path": [None if i % 4 else "Started" for i in range(len(times))],
+    })
+    if with_timestamp:
+        df.insert(0, "timestamp", [t.strftime("%Y-%m-%dT%H:%M:%S") for t in times])
+    return df
+
+
+def write_arrow(df: pd.DataFrame, path: str):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    with pa.OSFile(path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+def generate_day(data_dir: str, day: datetime, rows: int, seed: int) -> dict:
+    """rows 행짜리 하루 (water 는 rows 행, study 는 세션 로그 + timestamp 파일들에 나눠서 rows 행)"""
+    rng = random.Random(f"{seed}-{day:%Y-%m-%d}-{rows}")
+    logs_dir = os.path.join(data_dir, "logs")
+    date_str = day.strftime("%Y-%m-%d")
+
+    water = water_rows(rng, day_timestamps(rng, day, rows))
+    if pa is not None and rows >= 4:
+        # 절반은 Arrow 로그로 (CSV / Arrow 가 섞인 날짜)
+        half = rows // 2
+        water.iloc[:half].to_csv(os.path.join(logs_dir, f"water_log_{date_str}.csv"), index=False, encoding="utf-8-sig")
+        write_arrow(water.iloc[half:].reset_index(drop=True), os.path.join(logs_dir, f"water_log_{date_str}.arrow"))
+    else:
+        water.to_csv(os.path.join(logs_dir, f"water_log_{date_str}.csv"), index=False, encoding="utf-8-sig")
+
+    session_count = max(1, rows // 10)
+    study_session_rows(rng, day_timestamps(rng, day, session_count)).to_csv(
+        os.path.join(logs_dir, f"study_log_{date_str}.csv"), index=False, encoding="utf-8-sig"
+    )
+
+    point_total = max(0, rows - session_count)
+    file_count = max(1, min(50, point_total // 200 or 1))
+    per_file = point_total // file_count if point_total else 0
+    for i in range(file_count if per_file else 0):
+        start = day + timedelta(hours=6, minutes=i * 17)
+        times = [start + timedelta(seconds=5 * k) for k in range(per_file)]
+        if i % 2:
+            name = f"study_{date_str}_{start:%H-%M-%S}.csv"
+            df = study_point_rows(rng, times, with_timestamp=True)
+        else:
+            name = f"study_{date_str}-{start:%H-%M}.csv"
+            df = study_point_rows(rng, times, with_timestamp=False)
+        df.to_csv(os.path.join(logs_dir, name), index=False, encoding="utf-8-sig")
+
+    return {"date": date_str, "rows": rows, "water_times": water["timestamp"].tolist()}
+
+
+def generate_captures(data_dir: str, days: list, count: int, seed: int) -> int:
+    """로그 시각과 같은 분(minute)에 걸리는 캡처를 섞어서 count 개 생성"""
+    rng = random.Random(seed)
+    captures_dir = os.path.join(data_dir, "captures")
+    log_times = [t for d in days for t in d["water_times"]]
+    for i in range(count):
+        if log_times and i % 2 == 0:
+            ts = datetime.strptime(rng.choice(log_times), "%Y-%m-%d %H:%M:%S")
+            prefix = "water_drinking"
+        else:
+            day = datetime.strptime(rng.choice(days)["date"], "%Y-%m-%d")
+            ts = day + timedelta(seconds=rng.randrange(6 * 3600, 24 * 3600))
+            prefix = rng.choice(CAPTURE_PREFIXES)
+        name = f"{prefix}_{ts:%Y-%m-%d_%H-%M-%S}_{i:08x}.jpg"
+        with open(os.path.join(captures_dir, name), "wb") as fh:
+            fh.write(JPEG_STUB)
+    return count
+
+
+def generate(data_dir: str, sizes=(10, 1000, 100_000), captures: int = 20_000, seed: int = 42) -> dict:
+    """
+    data_dir 아래 logs/ captures/ 생성.
+    반환: {"days": {rows: "YYYY-MM-DD"}, "captures": 개수}
+    """
+    os.makedirs(os.path.join(data_dir, "logs"), exist_ok=True)
+    os.makedirs(os.path.join(data_dir, "captures"), exist_ok=True)
+
+    days = [generate_day(data_dir, FIRST_DAY + timedelta(days=i), rows, seed) for i, rows in enumerate(sizes)]
+    generate_captures(data_dir, days, captures, seed)
+    return {"days": {d["rows"]: d["date"] for d in days}, "captures": captures}
+
+
+def parse_sizes(text: str) -> list:
+    return [int(s) for s in text.split(",") if s.strip()]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="벤치마크용 합성 로그 / 캡처 생성")
+    parser.add_argument("data_dir")
+    parser.add_argument("--sizes", default="10,1000,100000", type=parse_sizes)
+    parser.add_argument("--captures", default=20_000, type=int)
+    parser.add_argument("--seed", default=42, type=int)
+    args = parser.parse_args()
+
+    info = generate(args.data_dir, args.sizes, args.captures, args.seed)
+    print(f"✅ 생성 완료: {args.data_dir}")
+    for rows, date_str in info["days"].items():
+        print(f"  - {date_str}: {rows} rows")
+    print(f"  - captures: {info['captures']}")
@@ -0,0 +1,115 @@
+"""
+로그 프레임 가공(imageUrl / imageFile / type / time) 마이크로 벤치마크
+
+- 임시 폴더에 10k 행짜리 하루치 water / study 로그 + 캡처 파일을 만들고
+- 예전 방식(행마다 .apply + find_capture_by_timestamp)과
+  현재 build_water_frame / build_study_frame (컬럼 연산 + 캡처 테이블 merge)를 비교
+- 행당 비용(µs)을 출력
+
+실행: python server/bench_log_frames.py [행 수]
+"""
+import os
+import sys
+import atexit
+import random
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+REPEAT = 5
+DAY = "2025-12-04"
+
+# server.py 는 import 시점에 DATA_DIR 을 읽으므로 먼저 설정 (GOOGLE_API_KEY 없이도 동작)
+TMP_DIR = tempfile.mkdtemp(prefix="bench_logs_")
+atexit.register(shutil.rmtree, TMP_DIR, ignore_errors=True)
+os.environ["DATA_DIR"] = TMP_DIR
+os.makedirs(os.path.join(TMP_DIR, "logs"))
+os.makedirs(os.path.join(TMP_DIR, "captures"))
+
+import pandas as pd
+
+
+def make_day(rows: int):
+    """하루치 합성 로그. 10행 중 1행꼴로 같은 분(minute)의 캡처 파일을 만든다"""
+    random.seed(0)
+    start = datetime.strptime(DAY, "%Y-%m-%d")
+    step = 86400 / rows
+    water, study = [], []
+    for i in range(rows):
+        ts = start + timedelta(seconds=i * step)
+        ts_str = ts.strftime("%Y-%m-%d %H:%M:%S") if i % 2 else ts.strftime("%Y-%m-%dT%H:%M:%S")
+        water.append({
+            "timestamp": ts_str, "action": "water_drinking", "object": random.choice(["cup", "bottle"]),
+            "duration_frames": random.randint(5, 90), "rise": random.random(),
+            "consistency": random.random(), "gesture_conf": random.random(), "capture_path": "",
+        })
+        study.append({
+            "timestamp": ts_str, "object": random.choice(["Book", "laptop", None]),
+            "object_detail": "", "capture_path": f"captures\\study_{i}.jpg" if i % 3 == 0 else None,
+        })
+        if i % 10 == 0:
+            name = ts.strftime("%Y-%m-%d_%H-%M-%S")
+            for prefix in ("water_drinking", "study_start"):
+                open(os.path.join(TMP_DIR, "captures", f"{prefix}_{name}_{i}.jpg"), "w").close()
+    pd.DataFrame(water).to_csv(os.path.join(TMP_DIR, "logs", f"water_log_{DAY}.csv"), index=False)
+    pd.DataFrame(study).to_csv(os.path.join(TMP_DIR, "logs", f"study_log_{DAY}.csv"), index=False)
+
+
+make_day(ROWS)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import server  # noqa: E402
+
+
+def rowwise_water(df):
+    server.CAPTURE_INDEX.refresh()
+    df["imageUrl"] = df["timestamp"].apply(lambda ts: server.find_capture_by_timestamp("water_drinking", ts))
+    df["imageFile"] = df["imageUrl"].apply(lambda url: os.path.basename(str(url)) if isinstance(url, str) else None)
+    return df
+
+
+def rowwise_study(df):
+    df["imageUrl"] = df["capture_path"].apply(server.format_capture_url)
+    server.CAPTURE_INDEX.refresh()
+    mask = df["imageUrl"].isna()
+    df.loc[mask, "imageUrl"] = df.loc[mask, "timestamp"].apply(
+        lambda ts: server.find_capture_by_timestamp(["study_start", "study_end", "study"], ts)
+    )
+    df["imageFile"] = df["imageUrl"].apply(lambda url: os.path.basename(str(url)) if isinstance(url, str) else None)
+    df["type"] = df["object"].apply(lambda x: str(x).lower() if pd.notna(x) else "laptop")
+    df["time"] = df["timestamp"].apply(
+        lambda x: str(x).split("T")[1][:5] if pd.notna(x) and "T" in str(x)
+        else (str(x).split(" ")[1][:5] if pd.notna(x) and " " in str(x) else None)
+    )
+    return df
+
+
+def bench(label, func, frame):
+    func(frame.copy())  # 캡처 테이블 등 첫 호출 비용 제외
+    best = float("inf")
+    for _ in range(REPEAT):
+        df = frame.copy()
+        t0 = time.perf_counter()
+        func(df)
+        best = min(best, time.perf_counter() - t0)
+    print(f"{label:<28} {best * 1000:9.1f} ms   {best / len(frame) * 1e6:7.2f} µs/row")
+    return best
+
+
+def main():
+    water = server.LOG_CACHE.get("water", DAY)
+    study = server.LOG_CACHE.get("study", DAY)
+    print(f"=== {len(water)} rows / {len(server.CAPTURE_INDEX)} capture keys (best of {REPEAT}) ===")
+
+    old = bench("water  row-wise", rowwise_water, water)
+    new = bench("water  vectorized", server.build_water_frame, water)
+    print(f"{'':<28} x{old / new:.1f}")
+
+    old = bench("study  row-wise", rowwise_study, study)
+    new = bench("study  vectorized", server.build_study_frame, study)
+    print(f"{'':<28} x{old / new:.1f}")
+
+
+if __name__ == "__main__":
+    main()
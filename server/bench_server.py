@@ -0,0 +1,209 @@
+"""
+백엔드 벤치마크 스위트
+
+- bench_data.py 로 임시 DATA_DIR 에 하루 10 / 1k / 100k 행 로그 + 캡처 stub 생성 (seed 고정)
+- Gemini 는 가짜 모듈로 대체 (네트워크 없이, --gemini-ms 만큼 sleep)
+- ASGI TestClient 로 각 엔드포인트 호출 → cold(캐시 비운 첫 요청) / warm p50·p99 / peak memory 출력
+
+실행: python server/bench_server.py [--sizes 10,1000,100000] [--iterations 30] [--json 결과.json]
+같은 옵션이면 같은 데이터 → 변경 전/후 결과 JSON 을 비교하면 됨
+"""
+import os
+import sys
+import io
+import json
+import time
+import types
+import shutil
+import atexit
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import contextlib
+import subprocess
+
+import numpy as np
+
+import bench_data
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="server.py 엔드포인트 벤치마크")
+    parser.add_argument("--sizes", default="10,1000,100000", type=bench_data.parse_sizes)
+    parser.add_argument("--captures", default=20_000, type=int)
+    parser.add_argument("--iterations", default=30, type=int, help="warm 반복 횟수 (1k 행 초과 날짜는 1/10)")
+    parser.add_argument("--gemini-ms", default=50.0, type=float, help="가짜 Gemini 응답 지연")
+    parser.add_argument("--seed", default=42, type=int)
+    parser.add_argument("--data-dir", default=None, help="데이터 폴더 지정 (없으면 임시 폴더, 종료 시 삭제)")
+    parser.add_argument("--json", default=None, help="결과를 JSON 으로 저장")
+    return parser.parse_args()
+
+
+def install_fake_gemini(delay_sec: float):
+    """google.generativeai 대신 쓰는 가짜 모듈 (server.get_genai 가 import 하는 이름으로 등록)"""
+    fake = types.ModuleType("google.generativeai")
+
+    class FakeModel:
+        def __init__(self, name):
+            self.name = name
+
+        def generate_content(self, contents, stream=False, **kwargs):
+            time.sleep(delay_sec)
+            if isinstance(contents, list) and len(contents) > 2:
+                # 일괄 이미지 분석: 번호 붙은 답을 장 수만큼
+                text = "\n".join(f"{i}. Water" for i in range(1, len(contents)))
+            else:
+                text = "오늘도 물과 공부 기록을 잘 쌓았어요. 내일도 이 페이스를 이어가 보세요."
+            if stream:
+                return iter(types.SimpleNamespace(text=part + " ") for part in text.split())
+            return types.SimpleNamespace(text=text)
+
+    fake.configure = lambda **kwargs: None
+    fake.GenerativeModel = FakeModel
+    fake.upload_file = lambda path: path
+    sys.modules["google.generativeai"] = fake
+
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) if values else float("nan")
+
+
+class Bench:
+    def __init__(self, client, server, iterations: int):
+        self.client = client
+        self.server = server
+        self.iterations = iterations
+        self.results = []
+
+    def call(self, method: str, url: str, body=None):
+        with contextlib.redirect_stdout(io.StringIO()):
+            response = self.client.request(method, url, json=body)
+        if response.status_code >= 400:
+            raise RuntimeError(f"{method} {url} → {response.status_code}: {response.text[:200]}")
+        return response
+
+    def timed_call(self, method, url, body=None) -> float:
+        t0 = time.perf_counter()
+        self.call(method, url, body)
+        return (time.perf_counter() - t0) * 1000
+
+    def run(self, name: str, rows, method: str, url: str, body=None, iterations=None, cold=None):
+        """
+        cold: 캐시를 비우는 함수 (주면 cold 지연 + cold 상태 peak memory 측정)
+        body 가 함수면 반복마다 body(i) 로 새 요청 본문 생성 (캐시 miss 측정용)
+        """
+        make_body = body if callable(body) else (lambda i: body)
+        iterations = iterations or self.iterations
+
+        if cold:
+            cold()
+        tracemalloc.start()
+        self.call(method, url, make_body(0))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        cold_ms = None
+        if cold:
+            cold()
+            cold_ms = self.timed_call(method, url, make_body(0))
+
+        samples = [self.timed_call(method, url, make_body(i + 1)) for i in range(iterations)]
+        result = {
+            "name": name,
+            "rows": rows,
+            "cold_ms": round(cold_ms, 2) if cold_ms is not None else None,
+            "p50_ms": round(percentile(samples, 50), 2),
+            "p99_ms": round(percentile(samples, 99), 2),
+            "peak_mb": round(peak / 1024 / 1024, 2),
+            "n": len(samples),
+        }
+        self.results.append(result)
+        cold_text = f"{result['cold_ms']:9.1f}" if cold_ms is not None else f"{'-':>9}"
+        print(f"{name:<22} {str(rows):>7} {cold_text} {result['p50_ms']:9.1f} {result['p99_ms']:9.1f} "
+              f"{result['peak_mb']:9.1f} {len(samples):>4}")
+        return result
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except OSError:
+        return ""
+
+
+def main():
+    args = parse_args()
+
+    data_dir = args.data_dir
+    if data_dir is None:
+        data_dir = tempfile.mkdtemp(prefix="bench_server_")
+        atexit.register(shutil.rmtree, data_dir, ignore_errors=True)
+
+    t0 = time.perf_counter()
+    info = bench_data.generate(data_dir, args.sizes, args.captures, args.seed)
+    print(f"데이터 생성: {data_dir} ({time.perf_counter() - t0:.1f}s, captures {info['captures']})")
+
+    # server.py 는 import 시점에 환경 변수를 읽음
+    os.environ["DATA_DIR"] = data_dir
+    os.environ["GOOGLE_API_KEY"] = "bench"
+    os.environ["TIMING_LOG_LEVEL"] = "ERROR"
+    for name in ("ROLLUP_DB_PATH", "ANALYSIS_CACHE_PATH", "SUMMARY_CACHE_PATH"):
+        os.environ.pop(name, None)
+    install_fake_gemini(args.gemini_ms / 1000)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        import server
+        from fastapi.testclient import TestClient
+    client = TestClient(server.app)
+    print(f"server 시작: {server.STARTUP_TIMINGS['total']} ms")
+
+    bench = Bench(client, server, args.iterations)
+    clear_logs = server.LOG_CACHE.clear
+
+    print(f"\n{'endpoint':<22} {'rows':>7} {'cold ms':>9} {'p50 ms':>9} {'p99 ms':>9} {'peak MB':>9} {'n':>4}")
+    for rows, date_str in info["days"].items():
+        n = args.iterations if rows <= 1000 else max(3, args.iterations // 10)
+        bench.run("GET water/{date}", rows, "GET", f"/api/logs/water/{date_str}", iterations=n, cold=clear_logs)
+        bench.run("GET study/{date}", rows, "GET", f"/api/logs/study/{date_str}", iterations=n, cold=clear_logs)
+        bench.run(
+            "POST logs/update", rows, "POST", "/api/logs/update", iterations=n,
+            body=lambda i, d=date_str: {
+                "source_file": f"study_log_{d}.csv", "log_id": 0, "updates": {"object_detail": f"bench {i}"},
+            },
+        )
+
+    dates = sorted(info["days"].values())
+    total_rows = sum(info["days"])
+    span = f"from={dates[0]}&to={dates[-1]}"
+    bench.run("GET water?from&to", total_rows, "GET", f"/api/logs/water?{span}", iterations=3, cold=clear_logs)
+    bench.run("GET study?from&to", total_rows, "GET", f"/api/logs/study?{span}", iterations=3, cold=clear_logs)
+    bench.run("GET stats/daily", total_rows, "GET", f"/api/stats/daily?{span}")
+
+    summary = {"date": dates[0], "waterMl": 1200, "waterGoal": 2000, "studyMin": 90, "studyGoal": 120}
+    bench.run("POST summary (miss)", "-", "POST", "/api/summary", iterations=10,
+              body=lambda i: dict(summary, waterMl=1000 + i + time.time_ns() % 1_000_000))
+    bench.run("POST summary (hit)", "-", "POST", "/api/summary", body=summary)
+
+    capture = sorted(os.listdir(os.path.join(data_dir, "captures")))[0]
+    bench.run("POST analyze", "-", "POST", "/api/analyze", body={"log_id": 0, "image_filename": capture})
+    bench.run("GET metrics", "-", "GET", "/metrics")
+
+    if args.json:
+        report = {
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "pandas": server.pd.__version__,
+            "options": {k: v for k, v in vars(args).items() if k not in ("json", "data_dir")},
+            "results": bench.results,
+        }
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, ensure_ascii=False, indent=2)
+        print(f"\n결과 저장: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
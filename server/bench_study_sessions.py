@@ -0,0 +1,180 @@
+"""
+공부 세션 집계(aggregate_study_sessions) 마이크로 벤치마크
+
+- 하루 1행 ~ 90일 범위까지 합성 study 로그(세션 행 + timestamp 행 + 파일 여러 개)를 만들고
+- 이전 방식(groupby / agg 두 번 + merge, 아래 inline 사본)과 현재 server.aggregate_study_sessions 를 비교
+- 간격 옵션(split / merge gap, by=['date']) 조합마다 두 결과가 같은지 확인한 뒤 호출당 비용(ms)을 출력
+
+실행: python server/bench_study_sessions.py
+"""
+import os
+import sys
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+# server.py 는 import 시점에 DATA_DIR 을 읽음 (로그 폴더 없이도 import 가능)
+os.environ.setdefault("DATA_DIR", tempfile.gettempdir())
+os.environ.setdefault("TIMING_LOG_LEVEL", "ERROR")
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import server  # noqa: E402
+
+REPEAT = 20
+FIRST_DAY = datetime(2025, 12, 1)
+OBJECTS = ["book", "Book", "laptop", "device", "cup", None]
+
+
+# ---------------- 이전 방식 (groupby / agg) ----------------
+
+def old_parse_log_times(df, column):
+    if column not in df.columns:
+        return pd.Series(pd.NaT, index=df.index, dtype='datetime64[ns]')
+    text = server.text_of(df[column])
+    parsed = pd.to_datetime(text, format='ISO8601', errors='coerce')
+    retry = parsed.isna()
+    if retry.any():
+        parsed[retry] = pd.to_datetime(text[retry], format='mixed', errors='coerce')
+    return parsed.astype('datetime64[ns]').reindex(df.index)
+
+
+def old_study_intervals(df):
+    start = old_parse_log_times(df, 'start_time')
+    end = old_parse_log_times(df, 'end_time')
+    if 'duration_sec' in df.columns:
+        duration = pd.to_timedelta(pd.to_numeric(df['duration_sec'], errors='coerce'), unit='s')
+        end = end.fillna(start + duration)
+    is_interval = start.notna()
+    start = start.fillna(old_parse_log_times(df, 'timestamp'))
+    end = end.fillna(start)
+    end = end.where(end >= start, start)
+    return pd.DataFrame({'start': start, 'end': end, 'is_interval': is_interval}, index=df.index)
+
+
+def old_aggregate(df, obj_type, by=None, split_gap_min=0, merge_gap_min=0):
+    keys = by or []
+    file_keys = keys + ['source_file']
+    columns = keys + server.SESSION_COLUMNS
+    split_gap = pd.Timedelta(minutes=split_gap_min)
+    merge_gap = pd.Timedelta(minutes=merge_gap_min)
+    if 'object' not in df.columns or 'source_file' not in df.columns:
+        return pd.DataFrame(columns=columns)
+
+    wanted = server.SESSION_OBJECT_TYPES.get(obj_type.lower(), (obj_type.lower(),))
+    mask = server.text_of(df['object']).str.lower().isin(wanted).reindex(df.index, fill_value=False)
+    time_columns = [c for c in ('start_time', 'end_time', 'duration_sec', 'timestamp') if c in df.columns]
+    rows = df.loc[mask, file_keys].join(old_study_intervals(df.loc[mask, time_columns])).dropna(subset=['start'])
+    if rows.empty:
+        return pd.DataFrame(columns=columns)
+
+    segment = pd.Series(-np.arange(1, len(rows) + 1), index=rows.index)
+    point = ~rows['is_interval']
+    if point.any():
+        if split_gap > pd.Timedelta(0):
+            points = rows[point].sort_values(file_keys + ['start'], kind='stable')
+            gap = points['start'] - points.groupby(file_keys, sort=False)['start'].shift()
+            segment[points.index] = (gap > split_gap).groupby([points[k] for k in file_keys], sort=False).cumsum()
+        else:
+            segment[point] = 0
+    rows['segment'] = segment
+
+    sessions = rows.groupby(file_keys + ['segment'], sort=False).agg(
+        first=('start', 'min'), last=('end', 'max'), log_count=('start', 'size'),
+    ).reset_index()
+
+    sessions = sessions.sort_values(keys + ['first', 'source_file'], kind='stable').reset_index(drop=True)
+    if keys:
+        reach = sessions.groupby(keys, sort=False)['last'].cummax()
+        prev_reach = reach.groupby([sessions[k] for k in keys], sort=False).shift()
+    else:
+        prev_reach = sessions['last'].cummax().shift()
+    session_id = (~(sessions['first'] <= prev_reach + merge_gap)).cumsum()
+
+    merged = sessions.groupby(session_id, sort=False).agg(
+        **{k: (k, 'first') for k in keys},
+        source_file=('source_file', 'first'),
+        first=('first', 'min'),
+        last=('last', 'max'),
+        log_count=('log_count', 'sum'),
+    )
+    minutes = ((merged['last'] - merged['first']).dt.total_seconds() // 60).astype(int)
+    merged['duration_min'] = minutes.clip(lower=1)
+    return merged[columns].reset_index(drop=True)
+
+
+# ---------------- 합성 데이터 ----------------
+
+def make_logs(days: int, rows_per_day: int, seed: int = 0) -> pd.DataFrame:
+    """세션 행(start/end, end 없이 duration 만 있는 행 포함)과 timestamp 행을 파일 여러 개에 섞음"""
+    rng = random.Random(seed)
+    records = []
+    for d in range(days):
+        day = FIRST_DAY + timedelta(days=d)
+        date_str = day.strftime('%Y-%m-%d')
+        for i in range(rows_per_day):
+            t = day + timedelta(seconds=rng.randrange(8 * 3600, 23 * 3600))
+            fmt = '%Y-%m-%d %H:%M:%S' if rng.random() < 0.8 else '%Y-%m-%dT%H:%M:%S'
+            record = {"date": date_str, "object": rng.choice(OBJECTS)}
+            if rng.random() < 0.5:
+                record["source_file"] = f"study_log_{date_str}.csv"
+                record["start_time"] = t.strftime(fmt)
+                length = rng.randint(10, 1800)
+                if rng.random() < 0.8:
+                    record["end_time"] = (t + timedelta(seconds=length)).strftime(fmt)
+                record["duration_sec"] = float(length)
+            else:
+                record["source_file"] = f"study_{date_str}_{rng.randrange(3):02d}-00-00.csv"
+                record["timestamp"] = t.strftime(fmt) if rng.random() < 0.97 else "not a time"
+            records.append(record)
+    return pd.DataFrame(records, columns=[
+        "date", "source_file", "object", "start_time", "end_time", "duration_sec", "timestamp",
+    ])
+
+
+def best_ms(func, *args, **kwargs):
+    best = float("inf")
+    for _ in range(REPEAT):
+        t0 = time.perf_counter()
+        func(*args, **kwargs)
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def check(df):
+    new_aggregate = server.aggregate_study_sessions.__wrapped__
+    for by in (None, ['date']):
+        for split_gap, merge_gap in ((0, 0), (5, 0), (0, 3), (5, 3)):
+            for obj_type in ("book", "laptop"):
+                expected = old_aggregate(df, obj_type, by, split_gap, merge_gap)
+                actual = new_aggregate(df, obj_type, by, split_gap, merge_gap)
+                try:
+                    pd.testing.assert_frame_equal(
+                        expected.reset_index(drop=True), actual.reset_index(drop=True),
+                        check_dtype=False, check_index_type=False,
+                    )
+                except AssertionError as e:
+                    sys.exit(f"결과 불일치 ({obj_type}, by={by}, split={split_gap}, merge={merge_gap}):\n{e}")
+
+
+def main():
+    new_aggregate = server.aggregate_study_sessions.__wrapped__
+    cases = [("1 day x 1 row", 1, 1), ("1 day x 20 rows", 1, 20), ("1 day x 1k rows", 1, 1_000),
+             ("90 days x 2k rows", 90, 2_000)]
+    print(f"=== aggregate_study_sessions, best of {REPEAT}, ms per call ===")
+    print(f"{'case':<20} {'rows':>8} {'groupby':>9} {'numpy':>9} {'ratio':>7}")
+    for label, days, per_day in cases:
+        df = make_logs(days, per_day)
+        check(df)
+        by = ['date'] if days > 1 else None
+        old = best_ms(old_aggregate, df, 'book', by)
+        new = best_ms(new_aggregate, df, 'book', by)
+        print(f"{label:<20} {len(df):>8} {old:9.2f} {new:9.2f} {'x' + format(old / new, '.1f'):>7}")
+
+
+if __name__ == "__main__":
+    main()
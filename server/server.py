@@ -3,22 +3,135 @@
 # Personal Healthcare Assistant - Backend Server (Final Fixed)
 # ============================================================
 
+import time
+STARTUP_T0 = time.perf_counter()
+
 import os
+import io
+from collections import OrderedDict
 from pathlib import Path
 from dotenv import load_dotenv
 import glob
 import pandas as pd
+import numpy as np
 from typing import Optional, List, Dict, Any
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse, Response, PlainTextResponse
 from pydantic import BaseModel
-import google.generativeai as genai
 import uvicorn
 import traceback
 import re
+import uuid
+import threading
+import sqlite3
+import json
+import hashlib
+import gzip
+import asyncio
+import logging
+import contextvars
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from datetime import datetime, timedelta
+
+# ==========================================
+# 시작 단계별 소요 시간 (/ 응답과 시작 로그에 표시)
+# ==========================================
+def elapsed_ms(t0: float) -> float:
+    return round((time.perf_counter() - t0) * 1000, 1)
+
+STARTUP_TIMINGS: Dict[str, float] = {"imports": elapsed_ms(STARTUP_T0)}
+
+# ==========================================
+# 계측: 지연 시간 histogram (/metrics) + 구조화(JSON) 로그
+# ==========================================
+METRIC_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SLOW_REQUEST_MS = float(os.environ.get("SLOW_REQUEST_MS", "500"))
+
+class Histogram:
+    """Prometheus histogram (라벨 조합별 bucket 누적 개수 / 합계 / 개수)"""
+
+    def __init__(self, name: str, help_text: str, label_names: tuple, buckets: tuple = METRIC_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series: Dict[tuple, list] = {}   # labels → [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.label_names)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        for key, series in items:
+            labels = ",".join(f'{n}="{metric_label(v)}"' for n, v in zip(self.label_names, key))
+            sep = "," if labels else ""
+            for bound, count in zip(self.buckets, series):
+                lines.append(f'{self.name}_bucket{{{labels}{sep}le="{bound}"}} {count}')
+            lines.append(f'{self.name}_bucket{{{labels}{sep}le="+Inf"}} {series[-1]}')
+            lines.append(f"{self.name}_sum{{{labels}}} {series[-2]:.6f}")
+            lines.append(f"{self.name}_count{{{labels}}} {series[-1]}")
+        return lines
+
+def metric_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route", "status")
+)
+PHASE_LATENCY = Histogram(
+    "server_phase_duration_seconds",
+    "Time spent in hot spots (log_glob, log_parse, capture_lookup, sessions, serialize, gemini)",
+    ("phase",),
+)
+
+# 요청 하나 동안 단계별 누적 시간(ms). 미들웨어가 요청마다 새 dict 를 넣음
+REQUEST_SPANS: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar(
+    "request_spans", default=None
+)
+
+TIMING_LOG = logging.getLogger("healthcare.timing")
+if not TIMING_LOG.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    TIMING_LOG.addHandler(_handler)
+    TIMING_LOG.setLevel(os.environ.get("TIMING_LOG_LEVEL", "INFO").upper())
+    TIMING_LOG.propagate = False
+
+def log_event(level: int, event: str, **fields):
+    """한 줄 JSON 로그 (jq 등으로 바로 필터링 가능)"""
+    if TIMING_LOG.isEnabledFor(level):
+        record = {"ts": datetime.now().isoformat(timespec='milliseconds'), "event": event, **fields}
+        TIMING_LOG.log(level, json.dumps(record, ensure_ascii=False, default=str))
+
+@contextmanager
+def timed(phase: str):
+    """hot spot 구간 시간 → PHASE_LATENCY + 현재 요청의 단계별 합계 (with 블록 / 데코레이터 둘 다 가능)"""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - t0
+        PHASE_LATENCY.observe(elapsed, phase=phase)
+        spans = REQUEST_SPANS.get()
+        if spans is not None:
+            spans[phase] = round(spans.get(phase, 0.0) + elapsed * 1000, 2)
 
 # ==========================================
 # .env 로드 (경로 고정)
@@ -27,26 +140,97 @@ BASE_DIR = Path(__file__).resolve().parent
 ROOT_DIR = BASE_DIR.parent
 ENV_PATH = ROOT_DIR / ".env"
 
+phase_t0 = time.perf_counter()
 load_dotenv(dotenv_path=ENV_PATH, override=True)
 
+# 키가 없어도 서버는 뜸 (로그 API만 동작, AI 응답은 기본 문구 / "Analysis Failed")
 GOOGLE_API_KEY = os.environ.get("GOOGLE_API_KEY")
-if not GOOGLE_API_KEY:
-    raise RuntimeError("GOOGLE_API_KEY 로드 실패")
+AI_ENABLED = bool(GOOGLE_API_KEY)
+if not AI_ENABLED:
+    print("⚠️ GOOGLE_API_KEY 없음 → AI 기능 없이 시작 (degraded mode)")
+STARTUP_TIMINGS["config"] = elapsed_ms(phase_t0)
 
 # ==========================================
-# Gemini 모델 설정
+# Gemini 모델 설정 (첫 AI 호출 때 생성)
 # ==========================================
-genai.configure(api_key=GOOGLE_API_KEY)
+SUMMARY_MODEL_NAME = "models/gemini-2.5-flash"
+VISION_MODEL_NAME = "models/gemini-2.5-flash-image"
+
+_genai = None
+_AI_MODELS: Dict[str, Any] = {}
+_AI_INIT_LOCK = threading.Lock()
+
+def get_genai():
+    """google.generativeai 는 import 만 ~1초 → 서버 시작이 아니라 첫 AI 호출 때 로드"""
+    global _genai
+    if not AI_ENABLED:
+        raise RuntimeError("GOOGLE_API_KEY 없음 (AI 비활성)")
+    with _AI_INIT_LOCK:
+        if _genai is None:
+            t0 = time.perf_counter()
+            import google.generativeai as genai
+            genai.configure(api_key=GOOGLE_API_KEY)
+            _genai = genai
+            print(f"✅ Gemini SDK 로드 완료 ({elapsed_ms(t0)} ms)")
+    return _genai
+
+def get_ai_model(name: str):
+    """
+    GenerativeModel 을 한 번만 만들어 재사용.
+    blocking 이므로 AI_EXECUTOR 스레드 안(실제 호출 직전)에서 부를 것
+    """
+    model = _AI_MODELS.get(name)
+    if model is None:
+        genai = get_genai()
+        with _AI_INIT_LOCK:
+            model = _AI_MODELS.get(name)
+            if model is None:
+                model = genai.GenerativeModel(name)
+                _AI_MODELS[name] = model
+                print(f"✅ Gemini 모델 초기화 완료 ({name})")
+    return model
+
+# Gemini SDK 호출은 blocking → 전용 스레드 풀에서 실행해서 이벤트 루프(로그 API)를 막지 않음
+GEMINI_TIMEOUT_SEC = float(os.environ.get("GEMINI_TIMEOUT_SEC", "30"))
+GEMINI_MAX_CONCURRENCY = int(os.environ.get("GEMINI_MAX_CONCURRENCY", "4"))
+AI_EXECUTOR = ThreadPoolExecutor(max_workers=GEMINI_MAX_CONCURRENCY, thread_name_prefix="gemini")
+AI_SEMAPHORE = asyncio.Semaphore(GEMINI_MAX_CONCURRENCY)
+
+def _release_ai_slot(future: asyncio.Future):
+    AI_SEMAPHORE.release()
+    if not future.cancelled():
+        future.exception()  # 시간 초과로 아무도 안 기다리는 결과의 "never retrieved" 경고 방지
+
+async def run_ai_call(func, *args, **kwargs):
+    """
+    blocking Gemini 호출을 AI_EXECUTOR 에서 실행.
+    동시 실행 수는 GEMINI_MAX_CONCURRENCY. GEMINI_TIMEOUT_SEC 는 세마포어를 얻은 뒤의
+    실제 호출 시간에만 적용 (차례를 기다린 시간은 포함하지 않음), 넘으면 TimeoutError
+    """
+    loop = asyncio.get_running_loop()
+    await AI_SEMAPHORE.acquire()
+    try:
+        future = loop.run_in_executor(AI_EXECUTOR, partial(func, *args, **kwargs))
+    except BaseException:
+        AI_SEMAPHORE.release()
+        raise
+    # 시간 초과로 먼저 반환해도 스레드는 끝까지 돈다 → 슬롯은 스레드가 끝날 때 반납해야
+    # 다음 호출이 AI_EXECUTOR 큐에서 기다리며 제한 시간을 쓰지 않음
+    future.add_done_callback(_release_ai_slot)
 
-try:
-    TEXT_MODEL = genai.GenerativeModel("models/gemini-2.5-flash")
-    VISION_MODEL = genai.GenerativeModel("models/gemini-2.5-flash-image")
-    print("✅ Gemini 모델 초기화 완료 (2.5-flash)")
-except Exception as e:
-    print("❌ Gemini 모델 초기화 실패")
-    traceback.print_exc()
-    TEXT_MODEL = None
-    VISION_MODEL = None
+    t0 = time.perf_counter()
+    outcome = "ok"
+    try:
+        with timed("gemini"):
+            return await asyncio.wait_for(asyncio.shield(future), timeout=GEMINI_TIMEOUT_SEC)
+    except asyncio.TimeoutError:
+        outcome = "timeout"
+        raise
+    except Exception:
+        outcome = "error"
+        raise
+    finally:
+        log_event(logging.INFO, "gemini_call", func=getattr(func, "__name__", str(func)), outcome=outcome, ms=elapsed_ms(t0))
 
 
 # ==========================================
@@ -72,13 +256,72 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def timing_middleware(request: Request, call_next):
+    """
+    요청마다 지연 시간 기록 (route 템플릿 기준 → /api/logs/water/{date_str} 로 묶임)
+    SLOW_REQUEST_MS 넘는 요청은 단계별 시간과 함께 WARNING 로그
+    (StreamingResponse 는 첫 응답까지의 시간)
+    """
+    spans: Dict[str, float] = {}
+    token = REQUEST_SPANS.set(spans)
+    t0 = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        elapsed = time.perf_counter() - t0
+        REQUEST_SPANS.reset(token)
+        route = request.scope.get("route")
+        route_path = getattr(route, "path", None) or "unmatched"
+        REQUEST_LATENCY.observe(elapsed, method=request.method, route=route_path, status=status)
+        log_event(
+            logging.WARNING if elapsed * 1000 >= SLOW_REQUEST_MS else logging.DEBUG,
+            "request",
+            method=request.method,
+            path=request.url.path,
+            route=route_path,
+            status=status,
+            ms=round(elapsed * 1000, 2),
+            spans=spans,
+        )
+
 if os.path.exists(CAPTURES_DIR):
     app.mount("/captures", StaticFiles(directory=CAPTURES_DIR), name="captures")
 
 
+@app.get("/metrics")
+def metrics():
+    """Prometheus text format"""
+    lines = REQUEST_LATENCY.render() + PHASE_LATENCY.render()
+    log_cache = LOG_CACHE.stats()
+    capture_index = CAPTURE_INDEX.stats()
+    gauges = (
+        ("log_cache_bytes", "Bytes held by the log DataFrame cache", log_cache["bytes"]),
+        ("log_cache_entries", "(prefix, date) entries held by the log DataFrame cache", log_cache["entries"]),
+        ("capture_index_keys", "(prefix, date, minute) keys in the capture index", capture_index["keys"]),
+        ("capture_index_files", "Capture files in the capture index", capture_index["files"]),
+        ("analysis_cache_entries", "Stored image analysis results", ANALYSIS_CACHE.stats()["entries"]),
+        ("summary_cache_entries", "Stored AI summaries", SUMMARY_CACHE.stats()["entries"]),
+        ("analysis_jobs_running", "Batch analysis jobs in progress", len(ANALYSIS_TASKS)),
+    )
+    for name, help_text, value in gauges:
+        if value is None:
+            continue
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {value}"]
+    return PlainTextResponse("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 @app.get("/")
 def read_root():
-    return {"status": "Server running", "data_path": DATA_DIR}
+    return {
+        "status": "Server running",
+        "data_path": DATA_DIR,
+        "ai": "enabled" if AI_ENABLED else "disabled",
+        "startup_ms": STARTUP_TIMINGS,
+    }
 
 
 # ==========================================
@@ -102,6 +345,10 @@ class LaptopInfo(BaseModel):
     durationMin: float = 0.0
     isStudy: bool = True
 
+class BatchAnalysisRequest(BaseModel):
+    date: Optional[str] = None              # 이 날짜 로그에 연결된 캡처 전체
+    image_filenames: List[str] = []         # 또는 파일명 직접 지정
+
 class SummaryRequest(BaseModel):
     date: str
     waterMl: float
@@ -120,12 +367,19 @@ class LogUpdateRequest(BaseModel):
 # ==========================================
 # 유틸리티 함수들
 # ==========================================
+DATE_IN_NAME_RE = re.compile(r'\d{4}-\d{2}-\d{2}')
+MAX_RANGE_DAYS = 366
+
 def get_csv_files_for_date(prefix: str, date_str: str) -> list:
-    pattern = os.path.join(LOGS_DIR, f"{prefix}*{date_str}*.csv")
-    return list(set(glob.glob(pattern)))
+    # CSV + Arrow(.arrow) 로그 모두 포함
+    files = []
+    with timed("log_glob"):
+        for ext in LOG_EXTENSIONS:
+            files.extend(glob.glob(os.path.join(LOGS_DIR, f"{prefix}*{date_str}*{ext}")))
+    return list(set(files))
 
 def parse_timestamp_from_filename(filename: str) -> Optional[str]:
-    basename = os.path.basename(filename).replace('.csv', '')
+    basename = os.path.splitext(os.path.basename(filename))[0]
     match1 = re.search(r'(\d{4}-\d{2}-\d{2})-(\d{2})-(\d{2})', basename)
     if match1:
         return f"{match1.group(1)}T{match1.group(2)}:{match1.group(3)}:00"
@@ -134,117 +388,1453 @@ def parse_timestamp_from_filename(filename: str) -> Optional[str]:
         return f"{match2.group(1)}T{match2.group(2).replace('-', ':')}"
     return None
 
+def decorate_log_frame(df: pd.DataFrame, path: str, row_offset: int = 0) -> pd.DataFrame:
+    # 각 원본 CSV 안에서의 로우 인덱스를 별도 컬럼으로 유지
+    # 여러 파일을 머지한 뒤에도 파일 내부 행 위치를 알기 위해 사용
+    if 'row_index' not in df.columns:
+        df['row_index'] = range(row_offset, row_offset + len(df))
+
+    file_ts = parse_timestamp_from_filename(path)
+    if file_ts and 'timestamp' not in df.columns:
+        df['timestamp'] = file_ts
+    df['source_file'] = os.path.basename(path)
+    return df
+
+def concat_log_frames(dfs: list) -> pd.DataFrame:
+    if not dfs:
+        return pd.DataFrame()
+
+    merged = pd.concat(dfs, ignore_index=True)
+    if 'timestamp' in merged.columns:
+        merged = merged.sort_values('timestamp').reset_index(drop=True)
+    return merged
+
 def merge_csv_files(files: list) -> pd.DataFrame:
     if not files:
         return pd.DataFrame()
     dfs = []
     for f in files:
         try:
-            df = pd.read_csv(f)
+            df = read_log_file(f)
             if not df.empty:
-                # 각 원본 CSV 안에서의 로우 인덱스를 별도 컬럼으로 유지
-                # 여러 파일을 머지한 뒤에도 파일 내부 행 위치를 알기 위해 사용
-                if 'row_index' not in df.columns:
-                    df['row_index'] = range(len(df))
-
-                file_ts = parse_timestamp_from_filename(f)
-                if file_ts and 'timestamp' not in df.columns:
-                    df['timestamp'] = file_ts
-                df['source_file'] = os.path.basename(f)
-                dfs.append(df)
+                dfs.append(decorate_log_frame(df, f))
         except Exception as e:
             print(f"❌ CSV 로드 실패: {f} / {e}")
             traceback.print_exc()
             continue
-    if not dfs:
-        return pd.DataFrame()
-    
-    merged = pd.concat(dfs, ignore_index=True)
-    if 'timestamp' in merged.columns:
-        merged = merged.sort_values('timestamp').reset_index(drop=True)
-    return merged
+    return concat_log_frames(dfs)
+
+# ==========================================
+# 컬럼 기반 로그 (Arrow IPC, 선택)
+# ==========================================
+# - sensing 모델에서 LOG_FORMAT=arrow 로 실행하면 그날은 .csv 에 추가하고,
+#   날짜가 바뀔 때 / 종료할 때 logs/{prefix}_log_{date}.arrow 로 합침 (그 사이에는 두 파일을 같이 읽음)
+# - 서버는 .csv / .arrow 를 모두 읽음 (기존 CSV 파일명 패턴 그대로 지원)
+# - 기존 CSV 이전: python server/server.py convert-logs
+COLUMNAR_EXT = ".arrow"
+LOG_EXTENSIONS = (".csv", COLUMNAR_EXT)
+
+# 고정 스키마 (log_writer.py 의 LOG_SCHEMAS 와 동일하게 유지)
+# 수정 API에서 쓰는 컬럼(ai_result, book_title 등)도 미리 포함
+LOG_SCHEMAS = {
+    "water": [
+        ("timestamp", "string"),
+        ("action", "string"),
+        ("object", "string"),
+        ("duration_frames", "int64"),
+        ("rise", "int64"),
+        ("consistency", "float64"),
+        ("gesture_conf", "float64"),
+        ("capture_path", "string"),
+        ("ai_result", "string"),
+        ("manual_label", "string"),
+    ],
+    "study": [
+        ("start_time", "string"),
+        ("end_time", "string"),
+        ("duration_sec", "float64"),
+        ("object", "string"),
+        ("object_detail", "string"),
+        ("start_capture", "string"),
+        ("end_capture", "string"),
+        ("book_id", "string"),
+        ("book_title", "string"),
+        ("book_authors", "string"),
+        ("book_thumbnail", "string"),
+        ("total_pages", "float64"),
+        ("read_pages", "float64"),
+        ("description", "string"),
+        ("purpose", "string"),
+        ("duration_min", "float64"),
+        ("category", "string"),
+        ("manual_label", "string"),
+        ("subject", "string"),
+        ("note", "string"),
+    ],
+}
+
+def is_columnar_log(path: str) -> bool:
+    return path.endswith(COLUMNAR_EXT)
+
+def log_prefix_of(path: str) -> str:
+    return "water" if os.path.basename(path).startswith("water") else "study"
+
+# pyarrow 는 Arrow 로그 모드에서만 필요 → 처음 Arrow 파일을 읽거나 쓸 때 import
+pa = None
+
+def require_pyarrow():
+    global pa
+    if pa is None:
+        try:
+            import pyarrow
+            import pyarrow.ipc
+        except ImportError:
+            raise RuntimeError("Arrow 로그를 읽으려면 pyarrow 설치 필요 (pip install pyarrow)")
+        pa = pyarrow
+    return pa
+
+@timed("log_parse")
+def read_log_file(path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    CSV / Arrow 로그를 DataFrame 으로 읽음.
+    columns 를 주면 해당 컬럼만 읽음 (Arrow 는 memory map 에서 필요한 컬럼만 변환)
+    """
+    if not is_columnar_log(path):
+        if columns is None:
+            return pd.read_csv(path)
+        wanted = set(columns)
+        return pd.read_csv(path, usecols=lambda c: c in wanted)
+
+    require_pyarrow()
+    with pa.memory_map(path, 'r') as source:
+        table = pa.ipc.open_file(source).read_all()
+        if columns is not None:
+            table = table.select([c for c in columns if c in table.column_names])
+        return table.to_pandas()
+
+def to_log_table(df: pd.DataFrame, prefix: str):
+    """고정 스키마로 캐스팅한 Arrow Table (스키마에 없는 컬럼은 string 으로 뒤에 붙임)"""
+    require_pyarrow()
+    schema_cols = LOG_SCHEMAS[prefix]
+    known = {name for name, _ in schema_cols}
+    extras = [(c, "string") for c in df.columns if c not in known and c not in ('row_index', 'source_file')]
+
+    arrays, fields = [], []
+    for name, type_name in schema_cols + extras:
+        col = df[name] if name in df.columns else pd.Series([None] * len(df), index=df.index, dtype=object)
+        if type_name == "string":
+            values = [None if pd.isna(v) else str(v) for v in col]
+            arrays.append(pa.array(values, type=pa.string()))
+        else:
+            numeric = pd.to_numeric(col, errors='coerce')
+            if type_name == "int64":
+                numeric = numeric.round()
+            arrays.append(pa.array(numeric, type=pa.float64(), from_pandas=True).cast(type_name))
+        fields.append(pa.field(name, type_name))
+    return pa.Table.from_arrays(arrays, schema=pa.schema(fields))
+
+def write_log_file(df: pd.DataFrame, path: str, expected_stat: Optional[tuple] = None) -> bool:
+    """
+    로그 파일 전체 저장. 임시 파일에 쓰고 rename (원자적 교체)
+    expected_stat=(mtime_ns, size): 읽은 뒤 파일이 바뀌었으면(sensing 루프 append 등) 교체하지 않고 False
+    """
+    tmp_path = path + ".tmp"
+    if not is_columnar_log(path):
+        df.to_csv(tmp_path, index=False, encoding="utf-8-sig")
+    else:
+        table = to_log_table(df, log_prefix_of(path))
+        with pa.OSFile(tmp_path, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+    if expected_stat is not None:
+        st = os.stat(path)
+        if (st.st_mtime_ns, st.st_size) != expected_stat:
+            os.remove(tmp_path)
+            return False
+    os.replace(tmp_path, path)
+    return True
+
+LOG_WRITE_RETRIES = 3
+
+def log_lock_path(path: str) -> str:
+    """logs/water_log_2025-09-01.csv → logs/.water_log_2025-09-01.csv.lock (로그 glob 에 안 걸리게 숨김 파일)"""
+    directory, name = os.path.split(path)
+    return os.path.join(directory, f".{name}.lock")
+
+@contextmanager
+def log_file_lock(path: str):
+    """
+    sensing 루프(log_writer.DiskWriter)와 공유하는 프로세스 간 배타 lock (log_writer.log_file_lock 과 같은 규칙 유지)
+    writer 는 이 lock 안에서만 파일을 열어 줄을 추가하고 닫으므로, lock 을 잡은 동안의 os.replace 는
+    Windows 에서도 막히지 않고 교체 사이에 추가된 줄이 이전 파일로 사라지지 않음
+    """
+    with open(log_lock_path(path), "a+b") as fh:
+        if os.name == "nt":
+            import msvcrt
+            fh.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK, 1)   # 10초 동안 재시도 후 OSError
+                    break
+                except OSError:
+                    continue
+            try:
+                yield
+            finally:
+                fh.seek(0)
+                msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+
+def rewrite_log_file(path: str, apply):
+    """
+    파일 lock (서버 스레드 + sensing 루프와 공유하는 lock 파일) 안에서 읽기 → apply(df) → 원자적 저장.
+    apply 는 df 를 직접 고치고 (고쳤는지 여부, 반환값) 을 돌려줌.
+    lock 을 지키지 않는 writer(이전 버전 sensing 루프 등)가 읽은 뒤 파일을 바꿨으면 다시 읽어서 재적용
+    """
+    with get_file_lock(path), log_file_lock(path):
+        for _ in range(LOG_WRITE_RETRIES):
+            st = os.stat(path)
+            df = read_log_file(path)
+            changed, result = apply(df)
+            if not changed:
+                return result
+            if write_log_file(df, path, expected_stat=(st.st_mtime_ns, st.st_size)):
+                return result
+            print(f"⚠️ 저장 중 파일 변경 감지 → 다시 적용: {path}")
+    raise RuntimeError(f"File kept changing during update: {path}")
+
+FILE_LOCKS: Dict[str, threading.Lock] = {}
+FILE_LOCKS_GUARD = threading.Lock()
+
+def get_file_lock(path: str) -> threading.Lock:
+    """로그 파일별 쓰기 lock (서버 안에서 같은 파일 동시 수정 방지)"""
+    key = os.path.abspath(path)
+    with FILE_LOCKS_GUARD:
+        return FILE_LOCKS.setdefault(key, threading.Lock())
+
+def convert_logs_to_columnar(logs_dir: str = None) -> int:
+    """
+    logs_dir 의 water*/study* CSV 를 같은 이름의 .arrow 로 변환.
+    변환이 끝난 CSV 는 .csv.bak 으로 이름을 바꿔 중복 집계를 막음
+    """
+    logs_dir = logs_dir or LOGS_DIR
+    converted = 0
+    for prefix in ("water", "study"):
+        for csv_path in sorted(glob.glob(os.path.join(logs_dir, f"{prefix}*.csv"))):
+            arrow_path = os.path.splitext(csv_path)[0] + COLUMNAR_EXT
+            try:
+                with log_file_lock(csv_path), log_file_lock(arrow_path):
+                    df = pd.read_csv(csv_path)
+                    if os.path.exists(arrow_path):
+                        df = pd.concat([read_log_file(arrow_path), df], ignore_index=True)
+                    write_log_file(df, arrow_path)
+                    os.replace(csv_path, csv_path + ".bak")
+                converted += 1
+                print(f"✅ 변환 완료: {os.path.basename(csv_path)} → {os.path.basename(arrow_path)}")
+            except Exception as e:
+                print(f"❌ 변환 실패: {csv_path} / {e}")
+                traceback.print_exc()
+    return converted
+
+# ==========================================
+# 로그 프레임 캐시 ((prefix, date) → 머지된 DataFrame)
+# ==========================================
+LOG_CACHE_MAX_MB = float(os.environ.get("LOG_CACHE_MAX_MB", "64"))
+
+class CachedLogFile:
+    """CSV 한 개의 파싱 결과 + 변경 감지용 (mtime, size, 마지막 바이트)"""
+    __slots__ = ("mtime_ns", "size", "columns", "tail_sig", "frame")
+
+    def __init__(self, mtime_ns, size, columns, tail_sig, frame):
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.columns = columns
+        self.tail_sig = tail_sig
+        self.frame = frame
+
+
+class LogFrameCache:
+    """
+    /api/logs/* 용 머지 결과 캐시.
+    - 파일별 (mtime, size)가 그대로면 재파싱하지 않음
+    - save_log처럼 행만 append 된 파일은 늘어난 꼬리 부분만 읽음
+    - 메모리 상한을 넘으면 LRU로 오래된 (prefix, date) 항목부터 제거
+    """
+
+    TAIL_SIG_BYTES = 64
+    # (prefix, date) 별 락은 고정 개수 중 하나를 해시로 골라 씀 → LRU 로 항목이 빠져도 락이 쌓이지 않음
+    KEY_LOCK_STRIPES = 64
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[tuple, dict]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._key_locks = [threading.Lock() for _ in range(self.KEY_LOCK_STRIPES)]
+
+    def _read_full(self, path: str, mtime_ns: int) -> CachedLogFile:
+        if is_columnar_log(path):
+            try:
+                df = read_log_file(path)
+            except Exception as e:
+                print(f"❌ Arrow 로그 로드 실패: {path} / {e}")
+                traceback.print_exc()
+                return CachedLogFile(mtime_ns, os.path.getsize(path), None, b"", None)
+            return CachedLogFile(mtime_ns, os.path.getsize(path), list(df.columns), b"", decorate_log_frame(df, path))
+
+        with open(path, 'rb') as fh:
+            raw = fh.read()
+        sig = raw[-self.TAIL_SIG_BYTES:]
+        try:
+            with timed("log_parse"):
+                df = pd.read_csv(io.BytesIO(raw))
+        except Exception as e:
+            print(f"❌ CSV 로드 실패: {path} / {e}")
+            traceback.print_exc()
+            return CachedLogFile(mtime_ns, len(raw), None, sig, None)
+        columns = list(df.columns)
+        return CachedLogFile(mtime_ns, len(raw), columns, sig, decorate_log_frame(df, path))
+
+    def _read_appended(self, path: str, mtime_ns: int, size: int, cached: CachedLogFile) -> Optional[CachedLogFile]:
+        """앞부분이 그대로이고 뒤에 행만 붙었으면 꼬리만 파싱, 아니면 None"""
+        with open(path, 'rb') as fh:
+            start = max(cached.size - len(cached.tail_sig), 0)
+            fh.seek(start)
+            head = fh.read(cached.size - start)
+            if head != cached.tail_sig or not head.endswith(b'\n'):
+                return None
+            data = fh.read(size - cached.size)
+        if not data.endswith(b'\n'):
+            return None  # 쓰는 도중인 행 → 전체 재로드
+
+        with timed("log_parse"):
+            tail = pd.read_csv(io.BytesIO(data), header=None, names=cached.columns)
+        tail = decorate_log_frame(tail, path, row_offset=len(cached.frame))
+        frame = pd.concat([cached.frame, tail], ignore_index=True)
+        sig = (head + data)[-self.TAIL_SIG_BYTES:]
+        return CachedLogFile(mtime_ns, cached.size + len(data), cached.columns, sig, frame)
+
+    def _load(self, path: str, st: os.stat_result, cached: Optional[CachedLogFile]) -> CachedLogFile:
+        # append 로 꼬리만 읽는 건 CSV 만 해당 (Arrow 는 파일 전체가 교체됨)
+        if (cached is not None and cached.frame is not None and st.st_size > cached.size
+                and not is_columnar_log(path)):
+            try:
+                appended = self._read_appended(path, st.st_mtime_ns, st.st_size, cached)
+                if appended is not None:
+                    return appended
+            except Exception as e:
+                print(f"⚠️ CSV 꼬리 읽기 실패, 전체 재로드: {path} / {e}")
+        return self._read_full(path, st.st_mtime_ns)
+
+    @staticmethod
+    def _frame_bytes(df: Optional[pd.DataFrame]) -> int:
+        if df is None or df.empty:
+            return 0
+        return int(df.memory_usage(deep=True).sum())
+
+    def get(self, prefix: str, date_str: str, files: Optional[list] = None) -> pd.DataFrame:
+        """
+        머지된 DataFrame 의 얕은 사본을 반환 (데이터 복사 없음)
+        호출 측은 컬럼 추가 / 통째 교체(df[col] = ...)만 가능, 값을 제자리에서 고치려면 .copy() 후에
+        files: 이미 찾아둔 파일 목록 (범위 조회에서 glob 중복 방지), 없으면 직접 glob
+        """
+        key = (prefix, date_str)
+        if files is None:
+            files = get_csv_files_for_date(prefix, date_str)
+        files = sorted(files)
+
+        # 파일 stat / 파싱은 (prefix, date) 별 락에서만 → 다른 날짜·타입 요청은 기다리지 않음
+        # 전역 락은 _entries / _total_bytes 를 만지는 짧은 구간에만 잡는다
+        with self._key_lock(key):
+            with self._lock:
+                entry = self._entries.get(key)
+                old_files = dict(entry["files"]) if entry else {}
+                merged = entry["merged"] if entry else None
+            new_files = {}
+            changed = merged is None or set(old_files) != set(files)
+
+            for path in files:
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    changed = True
+                    continue
+                cached = old_files.get(path)
+                if cached is not None and cached.mtime_ns == st.st_mtime_ns and cached.size == st.st_size:
+                    new_files[path] = cached
+                    continue
+                changed = True
+                new_files[path] = self._load(path, st, cached)
+
+            if changed:
+                frames = [c.frame for c in new_files.values() if c.frame is not None and not c.frame.empty]
+                merged = concat_log_frames(frames)
+                nbytes = self._frame_bytes(merged) + sum(self._frame_bytes(c.frame) for c in new_files.values())
+                with self._lock:
+                    current = self._entries.pop(key, None)
+                    if current is not None:
+                        self._total_bytes -= current["nbytes"]
+                    self._entries[key] = {"files": new_files, "merged": merged, "nbytes": nbytes}
+                    self._total_bytes += nbytes
+                    self._evict()
+            else:
+                with self._lock:
+                    # 읽는 사이 discard / 제거된 항목은 되살리지 않음 (다음 조회에서 다시 읽음)
+                    if self._entries.get(key) is entry:
+                        self._entries.move_to_end(key)
+
+        return merged.copy(deep=False)
+
+    def _key_lock(self, key: tuple) -> threading.Lock:
+        return self._key_locks[hash(key) % len(self._key_locks)]
+
+    def _evict(self):
+        # 가장 최근 항목 하나는 상한을 넘더라도 유지
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            _, old = self._entries.popitem(last=False)
+            self._total_bytes -= old["nbytes"]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def stats(self) -> dict:
+        """/metrics 용: 보관 중인 (prefix, date) 항목 수와 바이트"""
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._total_bytes, "max_bytes": self.max_bytes}
+
+    def discard(self, path: str):
+        """파일을 직접 고쳐 쓴 경우(/api/logs/update) 해당 파일 캐시 제거"""
+        path = os.path.abspath(path)
+        with self._lock:
+            for entry in self._entries.values():
+                for cached_path in list(entry["files"]):
+                    if os.path.abspath(cached_path) == path:
+                        del entry["files"][cached_path]
+                        entry["merged"] = None
+            for key in [k for k, e in self._entries.items() if e["merged"] is None]:
+                self._total_bytes -= self._entries.pop(key)["nbytes"]
+
+
+LOG_CACHE = LogFrameCache(int(LOG_CACHE_MAX_MB * 1024 * 1024))
+
+# ==========================================
+# 캡처 인덱스 (captures 폴더 메모리 캐시)
+# ==========================================
+# 파일명 형식: {prefix}_{YYYY-MM-DD}_{HH-MM-SS}_{uuid}.jpg
+CAPTURE_NAME_RE = re.compile(r'^(.+?)_(\d{4}-\d{2}-\d{2})_(\d{2}-\d{2})')
+
+class CaptureIndex:
+    """
+    captures 폴더를 한 번만 스캔해서 (prefix, date, HH-MM) → 파일 경로 목록으로 보관.
+    폴더 mtime이 바뀌었을 때만 다시 스캔하므로, 로그 행마다 glob 하던 비용이 사라진다.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._index: Dict[tuple, List[str]] = {}
+        self._tables: Dict[tuple, tuple] = {}
+        self._mtime_ns: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _dir_mtime_ns(self) -> Optional[int]:
+        try:
+            return os.stat(self.directory).st_mtime_ns
+        except OSError:
+            return None
+
+    def rebuild(self):
+        mtime_ns = self._dir_mtime_ns()
+        index: Dict[tuple, List[str]] = {}
+        if mtime_ns is not None:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    match = CAPTURE_NAME_RE.match(entry.name)
+                    if not match:
+                        continue
+                    index.setdefault(match.groups(), []).append(
+                        os.path.join(self.directory, entry.name)
+                    )
+        # dict 통째로 교체 → 조회 중인 스레드는 이전 인덱스를 그대로 사용
+        self._index = index
+        self._tables = {}
+        self._mtime_ns = mtime_ns
+
+    def refresh(self):
+        """폴더가 바뀌었으면(파일 추가/삭제) 다시 스캔"""
+        if self._dir_mtime_ns() == self._mtime_ns:
+            return
+        with self._lock:
+            if self._dir_mtime_ns() != self._mtime_ns:
+                self.rebuild()
+
+    def __len__(self):
+        return len(self._index)
+
+    def stats(self) -> dict:
+        """/metrics 용: (prefix, date, minute) 키 수와 캡처 파일 수"""
+        index = self._index
+        return {"keys": len(index), "files": sum(len(paths) for paths in index.values())}
+
+    def lookup(self, prefix: str, date_str: str, time_key: str) -> Optional[str]:
+        matches = self._index.get((prefix, date_str, time_key))
+        return matches[0] if matches else None
+
+    def table(self, prefixes) -> pd.DataFrame:
+        """
+        (minute, url) 조회 테이블. 로그 프레임과 merge 해서 행마다 lookup 하지 않도록.
+        같은 분에 여러 prefix 캡처가 있으면 prefixes 앞쪽 것을 사용 (lookup 순서와 동일)
+        """
+        key = tuple(prefixes)
+        index = self._index
+        cached = self._tables.get(key)
+        if cached is not None and cached[0] is index:
+            return cached[1]
+
+        rows = [
+            (rank, f"{date_str} {time_key}", paths[0])
+            for rank, p in enumerate(key)
+            for (prefix, date_str, time_key), paths in index.items()
+            if prefix == p
+        ]
+        table = pd.DataFrame(rows, columns=['rank', 'minute', 'path'])
+        table['minute'] = pd.to_datetime(
+            table['minute'], format='%Y-%m-%d %H-%M', errors='coerce'
+        ).astype('datetime64[s]')
+        table = (
+            table.dropna(subset=['minute'])
+            .sort_values('rank', kind='stable')
+            .drop_duplicates('minute')
+        )
+        table = pd.DataFrame({
+            'minute': table['minute'].to_numpy(),
+            'url': format_capture_urls(table['path']).to_numpy(),
+        })
+        self._tables[key] = (index, table)
+        return table
+
+
+CAPTURE_INDEX = CaptureIndex(CAPTURES_DIR)
+phase_t0 = time.perf_counter()
+try:
+    CAPTURE_INDEX.rebuild()
+    print(f"✅ 캡처 인덱스 생성 완료 ({len(CAPTURE_INDEX)} keys)")
+except Exception as e:
+    print(f"❌ 캡처 인덱스 생성 실패: {e}")
+    traceback.print_exc()
+STARTUP_TIMINGS["capture_index"] = elapsed_ms(phase_t0)
+
+
+CAPTURE_URL_BASE = "http://localhost:8000/captures/"
+PATH_DIR_RE = f"^.*[{re.escape(os.sep + (os.altsep or ''))}]"
 
 def format_capture_url(path):
     if pd.isna(path) or str(path).lower() == 'nan' or 'Started' in str(path):
         return None
-    return f"http://localhost:8000/captures/{os.path.basename(str(path))}"
+    return f"{CAPTURE_URL_BASE}{os.path.basename(str(path))}"
 
-def calculate_study_duration_per_file(df: pd.DataFrame, obj_type: str):
+def text_of(values: pd.Series) -> pd.Series:
+    """null 이 아닌 값만 문자열로 (.str 연산용, 결과는 to_nullable 로 원래 index 에 맞춤)"""
+    return values[values.notna()].astype(str)
+
+def to_nullable(values: pd.Series, index) -> pd.Series:
+    out = values.astype(object).reindex(index)
+    return out.where(out.notna(), None)
+
+def format_capture_urls(paths: pd.Series) -> pd.Series:
+    """format_capture_url 의 컬럼 버전"""
+    text = text_of(paths)
+    text = text[(text.str.lower() != 'nan') & ~text.str.contains('Started', regex=False)]
+    return to_nullable(CAPTURE_URL_BASE + text.str.replace(PATH_DIR_RE, '', regex=True), paths.index)
+
+def match_capture_urls(timestamps: pd.Series, prefixes) -> pd.Series:
+    """
+    find_capture_by_timestamp 의 컬럼 버전.
+    timestamp 를 한 번에 파싱 → 분 단위로 내림 → 캡처 테이블과 left merge (없으면 None)
+    """
+    if isinstance(prefixes, str):
+        prefixes = [prefixes]
+
+    with timed("capture_lookup"):
+        CAPTURE_INDEX.refresh()
+        minutes = pd.to_datetime(timestamps.astype(str), format='mixed', errors='coerce')
+        minutes = minutes.where(timestamps.notna()).dt.floor('min').astype('datetime64[s]')
+        merged = pd.DataFrame({'minute': minutes.to_numpy()}).merge(
+            CAPTURE_INDEX.table(prefixes), on='minute', how='left'
+        )
+    urls = pd.Series(merged['url'].to_numpy(), index=timestamps.index, dtype=object)
+    return urls.where(urls.notna(), None)
+
+def image_file_names(urls: pd.Series) -> pd.Series:
+    return to_nullable(text_of(urls).str.rsplit('/', n=1).str[-1], urls.index)
+
+# ==========================================
+# 공부 세션 집계
+# ==========================================
+# 세션 간격 기준 (분)
+# - SESSION_SPLIT_GAP_MIN: 한 파일 안 timestamp 로그 사이가 이보다 벌어지면 세션 분리 (0 = 파일 하나 = 세션 하나)
+# - SESSION_MERGE_GAP_MIN: 같은 물체 세션끼리 (파일이 달라도) 겹치거나 이 간격 이내면 하나로 병합
+SESSION_SPLIT_GAP_MIN = float(os.environ.get("SESSION_SPLIT_GAP_MIN", "0"))
+SESSION_MERGE_GAP_MIN = float(os.environ.get("SESSION_MERGE_GAP_MIN", "0"))
+
+# sensing 모델은 laptop / keyboard / tablet / monitor 를 'device' 로 기록
+SESSION_OBJECT_TYPES = {"book": ("book",), "laptop": ("laptop", "device")}
+SESSION_COLUMNS = ['source_file', 'first', 'last', 'duration_min', 'log_count']
+
+def parse_log_times(values: pd.Series) -> np.ndarray:
+    """로그 시각 컬럼 → datetime64[ns] 배열 (빈 값 / 못 읽는 값은 NaT)"""
+    if values.dtype.kind == 'M':
+        return values.to_numpy(dtype='datetime64[ns]')
+    # 문자열 컬럼(CSV 기본)은 그대로, 그 외(object 등)는 null 이 아닌 값만 문자열로
+    text = values if isinstance(values.dtype, pd.StringDtype) else values.astype(str).where(values.notna())
+    # 대부분 ISO 형식 ('YYYY-MM-DD HH:MM:SS' / 'T' 구분) → 빠른 경로, 실패한 값만 mixed 로 다시 파싱
+    parsed = pd.to_datetime(text, format='ISO8601', errors='coerce').to_numpy(dtype='datetime64[ns]')
+    retry = np.isnat(parsed) & text.notna().to_numpy()
+    if retry.any():
+        retried = pd.to_datetime(text[retry], format='mixed', errors='coerce')
+        parsed[retry] = retried.to_numpy(dtype='datetime64[ns]')
+    return parsed
+
+def study_intervals(df: Dict[str, pd.Series]):
+    """
+    컬럼 이름 → Series 매핑(DataFrame 도 가능)에서 행마다 (start, end, is_interval) 배열
+    - start_time / end_time 형식 (sensing 모델 세션 로그): 행 하나가 세션. end_time 이 없으면 start + duration_sec
+    - timestamp 형식: start = end = timestamp
+    """
+    size = len(df[next(iter(df))])
+
+    def times(column):
+        if column not in df:
+            return np.full(size, np.datetime64('NaT', 'ns'))
+        return parse_log_times(df[column])
+
+    start = times('start_time')
+    end = times('end_time')
+    if 'duration_sec' in df:
+        seconds = pd.to_numeric(df['duration_sec'], errors='coerce').to_numpy(dtype=float)
+        duration = pd.to_timedelta(seconds, unit='s').to_numpy(dtype='timedelta64[ns]')
+        end = np.where(np.isnat(end), start + duration, end)
+
+    is_interval = ~np.isnat(start)
+    start = np.where(is_interval, start, times('timestamp'))
+    end = np.where(np.isnat(end), start, end)
+    end = np.where(end >= start, end, start)
+    return start, end, is_interval
+
+@timed("sessions")
+def aggregate_study_sessions(
+    df: pd.DataFrame,
+    obj_type: str,
+    by: Optional[List[str]] = None,
+    split_gap_min: Optional[float] = None,
+    merge_gap_min: Optional[float] = None,
+) -> pd.DataFrame:
+    """
+    obj_type('book'/'laptop') 로그를 세션 단위로 한 번에 집계 (행 단위 loop 없음)
+    1) 파일 안: interval 행은 그대로 세션, timestamp 행은 파일 단위로 묶음 (split_gap_min 넘는 간격에서 분리)
+    2) 파일 간: by 그룹 안에서 시작 순으로 정렬 후, 겹치거나 merge_gap_min 이내인 세션 병합
+    duration_min = 세션 (last - first) 분 (최소 1분)
+    반환 컬럼: by..., source_file(세션 시작 파일), first, last, duration_min, log_count
+    """
+    keys = by or []
+    file_keys = keys + ['source_file']
+    columns = keys + SESSION_COLUMNS
+    split_gap = pd.Timedelta(minutes=SESSION_SPLIT_GAP_MIN if split_gap_min is None else split_gap_min)
+    merge_gap = pd.Timedelta(minutes=SESSION_MERGE_GAP_MIN if merge_gap_min is None else merge_gap_min)
     if 'object' not in df.columns or 'source_file' not in df.columns:
-        return 0, 0, []
+        return pd.DataFrame(columns=columns)
+
+    wanted = SESSION_OBJECT_TYPES.get(obj_type.lower(), (obj_type.lower(),))
+    objects = df['object']
+    if not isinstance(objects.dtype, pd.StringDtype):
+        objects = text_of(objects).reindex(df.index)
+    mask = objects.str.lower().isin(wanted).to_numpy(dtype=bool, na_value=False, copy=True)
+    for k in file_keys:
+        mask &= df[k].notna().to_numpy()
+    if not mask.any():
+        return pd.DataFrame(columns=columns)
+    # df.loc[mask, cols] 대신 컬럼별로 잘라냄 (작은 입력에서 DataFrame 재구성 비용이 집계 전체보다 큼)
+    time_columns = [c for c in ('start_time', 'end_time', 'duration_sec', 'timestamp') if c in df.columns]
+    selected = {c: df[c][mask] for c in file_keys + time_columns}
+
+    # 여기부터는 numpy 배열로 한 번에 처리
+    # (groupby/agg 는 행 수와 상관없이 호출당 수 ms 씩 들어서 하루 몇 행짜리 요청에서 오히려 느림)
+    start, end, point = study_intervals(selected)
+    valid = ~np.isnat(start)
+    if not valid.any():
+        return pd.DataFrame(columns=columns)
+    rows = {k: selected[k].to_numpy()[valid] for k in file_keys}
+    start = start[valid].view('i8')
+    end = end[valid].view('i8')
+    point = ~point[valid]
+    key_code = _sorted_codes(rows, keys)
+    file_code = _sorted_codes(rows, ['source_file'], key_code)
+
+    # 1) 파일 안 세션 번호: interval 행은 행마다 고유(음수), timestamp 행은 간격 기준 누적
+    segment = -np.arange(1, len(start) + 1)
+    if point.any():
+        segment[point] = 0
+        if split_gap > pd.Timedelta(0):
+            idx = np.flatnonzero(point)
+            idx = idx[np.lexsort((start[idx], file_code[idx]))]
+            new_segment = np.ones(len(idx), dtype=bool)
+            new_segment[1:] = (file_code[idx][1:] != file_code[idx][:-1]) | (np.diff(start[idx]) > split_gap.value)
+            segment[idx] = np.cumsum(new_segment)
+
+    order = np.lexsort((segment, file_code))
+    bounds = _group_starts(file_code[order], segment[order])
+    first = np.minimum.reduceat(start[order], bounds)
+    last = np.maximum.reduceat(end[order], bounds)
+    log_count = np.diff(np.append(bounds, len(order)))
+    head = order[bounds]   # 세션마다 대표 행 (source_file / by 값)
+
+    # 2) 파일 간 병합: 같은 by 그룹에서 시작 순으로, 앞 세션들의 최대 종료 시각(+gap) 이전에 시작하면 같은 세션
+    order = np.lexsort((file_code[head], first, key_code[head]))
+    first, last, log_count, head = first[order], last[order], log_count[order], head[order]
+    group = key_code[head]
+    new_session = np.ones(len(first), dtype=bool)
+    for lo, hi in zip(*_group_bounds(group)):
+        reach = np.maximum.accumulate(last[lo:hi])
+        new_session[lo + 1:hi] = first[lo + 1:hi] > reach[:-1] + merge_gap.value
+
+    bounds = np.flatnonzero(new_session)
+    first = np.minimum.reduceat(first, bounds)
+    last = np.maximum.reduceat(last, bounds)
+    head = head[bounds]
+    merged = {k: rows[k][head] for k in file_keys}
+    merged['first'] = first.view('datetime64[ns]')
+    merged['last'] = last.view('datetime64[ns]')
+    merged['log_count'] = np.add.reduceat(log_count, bounds)
+    merged['duration_min'] = np.maximum((last - first) // (60 * 10**9), 1)
+    return pd.DataFrame(merged, columns=columns)
+
+def _sorted_codes(rows: Dict[str, np.ndarray], columns: List[str], codes: Optional[np.ndarray] = None) -> np.ndarray:
+    """columns 값 조합 → 정렬 순서를 따르는 정수 코드 (codes 가 있으면 그 뒤에 이어서, columns 가 비면 전부 0)"""
+    if codes is None:
+        codes = np.zeros(len(next(iter(rows.values()))), dtype=np.int64)
+    for column in columns:
+        column_codes, uniques = pd.factorize(rows[column], sort=True)
+        codes = codes * len(uniques) + column_codes
+    return codes
+
+def _group_starts(*sorted_keys: np.ndarray) -> np.ndarray:
+    """정렬된 키 배열들 → 값이 바뀌는 위치 (각 그룹의 시작 인덱스)"""
+    change = np.zeros(len(sorted_keys[0]), dtype=bool)
+    change[0] = True
+    for key in sorted_keys:
+        change[1:] |= key[1:] != key[:-1]
+    return np.flatnonzero(change)
+
+def _group_bounds(sorted_key: np.ndarray):
+    starts = _group_starts(sorted_key)
+    return starts, np.append(starts[1:], len(sorted_key))
+
+def sessions_to_records(sessions: pd.DataFrame) -> list:
+    return [
+        {
+            'source_file': row.source_file,
+            'start_time': row.first.strftime('%H:%M'),
+            'end_time': row.last.strftime('%H:%M'),
+            'duration_min': int(row.duration_min),
+            'log_count': int(row.log_count),
+        }
+        for row in sessions.itertuples(index=False)
+    ]
 
-    type_df = df[df['object'].astype(str).str.lower() == obj_type.lower()]
-    if type_df.empty or 'timestamp' not in type_df.columns:
+def calculate_study_duration_per_file(df: pd.DataFrame, obj_type: str):
+    try:
+        sessions = aggregate_study_sessions(df, obj_type)
+    except Exception as e:
+        print(f"❌ duration 계산 실패 ({obj_type}): {e}")
+        traceback.print_exc()
         return 0, 0, []
 
-    total_min = 0
-    sessions = []
+    return int(sessions['duration_min'].sum()), len(sessions), sessions_to_records(sessions)
 
-    for source_file, group in type_df.groupby('source_file'):
-        try:
-            timestamps = group['timestamp'].dropna().tolist()
-            if len(timestamps) < 1:
-                continue
-            first = pd.to_datetime(timestamps[0])
-            last = pd.to_datetime(timestamps[-1])
-            duration = max(int((last - first).total_seconds() / 60), 1)
-            total_min += duration
-
-            sessions.append({
-                'source_file': source_file,
-                'start_time': first.strftime('%H:%M'),
-                'end_time': last.strftime('%H:%M'),
-                'duration_min': duration,
-                'log_count': len(timestamps),
-            })
-        except Exception as e:
-            print(f"❌ duration 계산 실패 ({source_file}): {e}")
-            traceback.print_exc()
+def parse_date_param(value: str) -> str:
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').strftime('%Y-%m-%d')
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail=f"Invalid date: {value}")
+
+def get_date_range(from_date: str, to_date: str) -> List[str]:
+    start = datetime.strptime(parse_date_param(from_date), '%Y-%m-%d')
+    end = datetime.strptime(parse_date_param(to_date), '%Y-%m-%d')
+    if end < start:
+        raise HTTPException(status_code=400, detail="'from' must be before 'to'")
+    if (end - start).days >= MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range too long (max {MAX_RANGE_DAYS} days)")
+    return [(start + timedelta(days=i)).strftime('%Y-%m-%d') for i in range((end - start).days + 1)]
+
+def get_csv_files_for_range(prefix: str, dates: Optional[List[str]]) -> Dict[str, list]:
+    """LOGS_DIR 을 한 번만 glob 해서 파일명 속 날짜 기준으로 묶음 (dates=None 이면 전체)"""
+    wanted = set(dates) if dates is not None else None
+    by_date: Dict[str, list] = {}
+    with timed("log_glob"):
+        for ext in LOG_EXTENSIONS:
+            for f in glob.glob(os.path.join(LOGS_DIR, f"{prefix}*{ext}")):
+                match = DATE_IN_NAME_RE.search(os.path.basename(f))
+                if match and (wanted is None or match.group(0) in wanted):
+                    by_date.setdefault(match.group(0), []).append(f)
+    return by_date
+
+def load_log_range(prefix: str, dates: List[str]) -> pd.DataFrame:
+    """날짜별 캐시 프레임을 모아 'date' 컬럼을 붙인 하나의 DataFrame 으로 반환"""
+    frames = []
+    for date_str, files in sorted(get_csv_files_for_range(prefix, dates).items()):
+        df = LOG_CACHE.get(prefix, date_str, files=files)
+        if df.empty:
             continue
+        df['id'] = df.index
+        df['date'] = date_str
+        frames.append(df)
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
+
+def add_water_amount(df: pd.DataFrame) -> pd.DataFrame:
+    # amount: duration_frames 기반으로 (이미 있으면 스킵)
+    if 'duration_frames' in df.columns and 'amount' not in df.columns:
+        df['amount'] = pd.to_numeric(df['duration_frames'], errors='coerce').fillna(0).astype(int)
+    elif 'amount' not in df.columns:
+        df['amount'] = 0
+    return df
+
+def build_water_frame(df: pd.DataFrame) -> pd.DataFrame:
+    df = add_water_amount(df)
+
+    # ★ timestamp 기준으로 captures 이미지 찾기 (capture_path는 무시)
+    if 'timestamp' in df.columns:
+        df['imageUrl'] = match_capture_urls(df['timestamp'], 'water_drinking')
+    else:
+        df['imageUrl'] = None
+
+    df['imageFile'] = image_file_names(df['imageUrl'])
+
+    if 'ai_result' not in df.columns:
+        df['ai_result'] = "Not Analyzed"
+    else:
+        # 컬럼은 있지만 비어 있는 행 (Arrow 고정 스키마 / 일부만 분석된 파일)
+        df['ai_result'] = df['ai_result'].where(df['ai_result'].notna(), "Not Analyzed")
+    return df
+
+def build_study_frame(df: pd.DataFrame) -> pd.DataFrame:
+    # 1) 우선 CSV의 capture_path로부터 laptop/book 캡처 사용
+    df['imageUrl'] = None
+    if 'capture_path' in df.columns:
+        df['imageUrl'] = format_capture_urls(df['capture_path'])
+
+    # 2) 없는 것만 timestamp 기반 study_start / study_end / study_* 에서 찾아오기
+    if 'timestamp' in df.columns:
+        by_time = match_capture_urls(df['timestamp'], ['study_start', 'study_end', 'study'])
+        df['imageUrl'] = df['imageUrl'].where(df['imageUrl'].notna(), by_time)
+
+    df['imageFile'] = image_file_names(df['imageUrl'])
+
+    if 'object' in df.columns:
+        df['type'] = text_of(df['object']).str.lower().reindex(df.index).astype(object).fillna('laptop')
+
+    if 'timestamp' in df.columns:
+        # 'YYYY-MM-DDTHH:MM:SS' / 'YYYY-MM-DD HH:MM:SS' → 'HH:MM'
+        text = text_of(df['timestamp'])
+        after_t = text.str.extract(r'^[^T]*T([^T]{0,5})', expand=False)
+        after_space = text.str.extract(r'^[^ ]* ([^ ]{0,5})', expand=False)
+        df['time'] = to_nullable(after_t.where(after_t.notna(), after_space), df.index)
+    return df
+
+def sync_duration_min(df: pd.DataFrame) -> pd.DataFrame:
+    # duration_sec → duration_min 동기화
+    # - CSV에서 duration_sec를 수정하면 항상 duration_min도 함께 업데이트되도록 처리
+    if 'duration_sec' in df.columns:
+        df['duration_min'] = pd.to_numeric(df['duration_sec'], errors='coerce').fillna(0) / 60.0
+    return df
 
-    return total_min, len(sessions), sessions
+# ==========================================
+# 로그 응답 JSON 직렬화
+# - dict 변환 + jsonable_encoder 를 거치지 않고 DataFrame 컬럼에서 바로 JSON 생성
+# - 출력은 예전 JSONResponse(jsonable_encoder) 와 바이트 단위로 같게 유지:
+#   float 은 Python repr, 날짜는 isoformat(), "/" 는 그대로, 구분자 공백 없음
+# ==========================================
+GZIP_MIN_BYTES = int(os.environ.get("GZIP_MIN_BYTES", 16 * 1024))
+JSON_SEPARATORS = (",", ":")
+
+class RawJSON(str):
+    """이미 인코딩된 JSON 조각 (dump_json 에서 그대로 이어붙임)"""
+
+def json_default(obj):
+    # json 이 모르는 값: numpy 스칼라 → Python 값, Timestamp / datetime → isoformat (jsonable_encoder 와 동일)
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if hasattr(obj, "isoformat"):
+        return obj.isoformat()
+    return str(obj)
+
+def json_column(s: pd.Series) -> list:
+    """컬럼 → Python 값 목록 (NaN / inf / NA → None)"""
+    if s.dtype.kind == "f":
+        values = s.to_numpy()
+        out = values.astype(object)
+        out[~np.isfinite(values)] = None
+        return out.tolist()
+    if s.dtype.kind in "iub":
+        return s.tolist()
+    if s.dtype.kind == "M":
+        return [None if v is pd.NaT else v.isoformat() for v in s.astype(object)]
+    out = s.astype(object).to_numpy(copy=True)
+    out[s.isna().to_numpy() | s.isin([float('inf'), float('-inf')]).to_numpy()] = None
+    return out.tolist()
+
+@timed("serialize")
+def frame_to_json(df: pd.DataFrame) -> RawJSON:
+    # 컬럼별로 한 번에 변환 → 행 dict 는 zip 으로만 만들고 C json 인코더로
+    names = [str(c) for c in df.columns]
+    columns = [json_column(df.iloc[:, i]) for i in range(df.shape[1])]
+    rows = [dict(zip(names, row)) for row in zip(*columns)] if columns else [{} for _ in range(len(df))]
+    return RawJSON(json.dumps(rows, ensure_ascii=False, separators=JSON_SEPARATORS, default=json_default))
+
+def dump_json(obj) -> str:
+    if isinstance(obj, RawJSON):
+        return obj
+    if isinstance(obj, dict):
+        return "{" + ",".join(
+            f"{json.dumps(str(k), ensure_ascii=False)}:{dump_json(v)}" for k, v in obj.items()
+        ) + "}"
+    if isinstance(obj, (list, tuple)):
+        return "[" + ",".join(dump_json(v) for v in obj) + "]"
+    return json.dumps(obj, ensure_ascii=False, separators=JSON_SEPARATORS, default=json_default)
+
+def log_json_response(request: Request, content) -> Response:
+    """JSON bytes 를 그대로 응답. 크면 gzip 압축 (클라이언트가 지원할 때만)"""
+    with timed("serialize"):
+        body = dump_json(content).encode("utf-8")
+    headers = {"Vary": "Accept-Encoding"}
+    if len(body) >= GZIP_MIN_BYTES and "gzip" in request.headers.get("accept-encoding", ""):
+        with timed("compress"):
+            body = gzip.compress(body, compresslevel=5)
+        headers["Content-Encoding"] = "gzip"
+    return Response(content=body, media_type="application/json", headers=headers)
+
+EMPTY_STUDY_DAY = {"logs": [], "totalBookMin": 0, "totalLaptopMin": 0, "sessions": []}
 
 
 # ==========================================
-# API 엔드포인트
+# 일별 집계 테이블 (rollup, SQLite)
 # ==========================================
+ROLLUP_DB_PATH = os.environ.get("ROLLUP_DB_PATH", os.path.join(LOGS_DIR, "daily_stats.sqlite3"))
+# 전체 조회(from/to 생략) 때 원본 지문(stat)을 다시 확인하는 최근 날짜 수 (sensing 이 쓰는 오늘 + 자정 넘긴 어제)
+# 지난 날짜는 /api/logs/update → refresh_file, 또는 그 날짜를 포함한 기간 조회 때 다시 확인
+ROLLUP_RECENT_DAYS = 2
 
-@app.get("/api/logs/water/{date_str}")
-def get_water_logs(date_str: str):
-    files = get_csv_files_for_date("water", date_str)
-    if not files:
-        return []
-    try:
-        df = merge_csv_files(files)
-        if df.empty:
+# 프론트 calculateLogStats 와 동일: 5분 이내 연속 기록은 한 번 마신 것으로 묶음
+DRINK_GROUP_GAP_MIN = 5
+DEFAULT_DRINK_ML = 200
+
+def summarize_water_day(df: pd.DataFrame) -> Dict[str, Any]:
+    if df.empty:
+        return {"water_ml": 0.0, "drink_count": 0}
+
+    df = add_water_amount(df)
+    amounts = pd.to_numeric(df['amount'], errors='coerce').fillna(0)
+    amounts = amounts.where(amounts != 0, DEFAULT_DRINK_ML)
+
+    if 'timestamp' in df.columns:
+        hm = df['timestamp'].astype(str).str.extract(r'[T ](\d{2}):(\d{2})').astype(float)
+        minutes = (hm[0] * 60 + hm[1]).sort_values(na_position='last')
+    else:
+        minutes = pd.Series(float('nan'), index=df.index)
+    gaps = minutes.diff()
+    new_group = gaps.isna() | (gaps > DRINK_GROUP_GAP_MIN)
+
+    return {"water_ml": float(amounts.sum()), "drink_count": int(new_group.sum())}
+
+def summarize_study_day(df: pd.DataFrame) -> Dict[str, Any]:
+    book_min, book_count, _ = calculate_study_duration_per_file(df, 'book')
+    laptop_min, laptop_count, _ = calculate_study_duration_per_file(df, 'laptop')
+    return {"book_min": book_min, "laptop_min": laptop_min, "session_count": book_count + laptop_count}
+
+
+class DailyRollupStore:
+    """
+    날짜별 합계(water_ml, drink_count, book_min, laptop_min, session_count)를
+    SQLite 한 테이블에 저장. 각 행은 원본 CSV들의 (파일명, mtime, size) 지문을 함께 보관해서
+    sensing 루프의 save_log 추가나 /api/logs/update 수정이 있었던 날짜만 다시 계산한다.
+    """
+
+    COLUMNS = ("water_ml", "drink_count", "book_min", "laptop_min", "session_count")
+    # 집계 방식이 바뀌면 올려서 기존 행을 다시 계산하게 함
+    VERSION = 2
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._ready:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.db_path)
+        if not self._ready:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS daily_stats (
+                    date TEXT PRIMARY KEY,
+                    water_ml REAL NOT NULL DEFAULT 0,
+                    drink_count INTEGER NOT NULL DEFAULT 0,
+                    book_min INTEGER NOT NULL DEFAULT 0,
+                    laptop_min INTEGER NOT NULL DEFAULT 0,
+                    session_count INTEGER NOT NULL DEFAULT 0,
+                    source_sig TEXT NOT NULL,
+                    updated_at TEXT NOT NULL
+                )
+            """)
+            conn.commit()
+            self._ready = True
+        return conn
+
+    @staticmethod
+    def _files_by_date(dates: Optional[List[str]] = None) -> Dict[str, Dict[str, list]]:
+        """LOGS_DIR 한 번 glob → {date: {"water": [...], "study": [...]}}"""
+        by_date: Dict[str, Dict[str, list]] = {}
+        for prefix in ("water", "study"):
+            for date_str, files in get_csv_files_for_range(prefix, dates).items():
+                by_date.setdefault(date_str, {"water": [], "study": []})[prefix] = files
+        return by_date
+
+    @staticmethod
+    def _signature(files: Dict[str, list]) -> str:
+        parts = [f"v{DailyRollupStore.VERSION}"]
+        for f in sorted(files["water"] + files["study"]):
+            try:
+                st = os.stat(f)
+            except OSError:
+                continue
+            parts.append(f"{os.path.basename(f)}:{st.st_mtime_ns}:{st.st_size}")
+        return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()
+
+    def _compute(self, date_str: str, files: Dict[str, list]) -> Dict[str, Any]:
+        water_df = LOG_CACHE.get("water", date_str, files=files["water"])
+        study_df = LOG_CACHE.get("study", date_str, files=files["study"])
+        return {**summarize_water_day(water_df), **summarize_study_day(study_df)}
+
+    def _sync(self, conn: sqlite3.Connection, by_date: Dict[str, Dict[str, list]], dates: List[str], trusted=()):
+        """
+        by_date 중 원본 지문이 바뀐 날짜만 다시 집계, dates 범위에서 원본 로그가 없어진 날짜는 삭제
+        trusted: 집계가 이미 있어 지문 확인(stat)을 건너뛰는 날짜
+        """
+        stored = dict(conn.execute(
+            "SELECT date, source_sig FROM daily_stats WHERE date BETWEEN ? AND ?", (dates[0], dates[-1])
+        ).fetchall())
+        now = datetime.now().isoformat(timespec='seconds')
+
+        for date_str, files in by_date.items():
+            if date_str in trusted:
+                continue
+            sig = self._signature(files)
+            if stored.get(date_str) == sig:
+                continue
+            row = self._compute(date_str, files)
+            conn.execute(
+                "INSERT OR REPLACE INTO daily_stats "
+                "(date, water_ml, drink_count, book_min, laptop_min, session_count, source_sig, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (date_str, *(row[c] for c in self.COLUMNS), sig, now),
+            )
+
+        # 원본 로그가 사라진 날짜는 집계에서도 제거
+        scope = set(dates)
+        removed = [(d,) for d in stored if d in scope and d not in by_date]
+        if removed:
+            conn.executemany("DELETE FROM daily_stats WHERE date = ?", removed)
+        conn.commit()
+
+    def refresh(self, dates: Optional[List[str]] = None, by_date: Optional[Dict[str, Dict[str, list]]] = None):
+        """
+        dates 중 원본 로그가 바뀐 날짜만 다시 집계 (stat 도 그 날짜의 파일만)
+        dates=None(전체): 집계에 없는 날짜와 최근 ROLLUP_RECENT_DAYS 일만 지문 확인
+        """
+        if by_date is None:
+            by_date = self._files_by_date(dates)
+        with self._lock:
+            conn = self._connect()
+            try:
+                trusted = ()
+                if dates is None:
+                    stored = {d for (d,) in conn.execute("SELECT date FROM daily_stats")}
+                    cutoff = (datetime.now() - timedelta(days=ROLLUP_RECENT_DAYS - 1)).strftime('%Y-%m-%d')
+                    trusted = {d for d in stored if d < cutoff}
+                    dates = sorted(stored | set(by_date))
+                if dates:
+                    self._sync(conn, by_date, dates, trusted)
+            finally:
+                conn.close()
+
+    def refresh_file(self, path: str):
+        match = DATE_IN_NAME_RE.search(os.path.basename(path))
+        if match:
+            self.refresh([match.group(0)])
+
+    def query(self, dates: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        by_date = self._files_by_date(dates)
+        if not by_date and not os.path.exists(self.db_path):
+            # 로그도 집계 DB 도 아직 없음 (LOGS_DIR 이 없는 새 설치 등) → 로그 목록 API 처럼 빈 결과
             return []
+        self.refresh(dates, by_date)
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.row_factory = sqlite3.Row
+                if dates is None:
+                    rows = conn.execute("SELECT * FROM daily_stats ORDER BY date").fetchall()
+                else:
+                    rows = conn.execute(
+                        "SELECT * FROM daily_stats WHERE date BETWEEN ? AND ? ORDER BY date",
+                        (dates[0], dates[-1]),
+                    ).fetchall()
+            finally:
+                conn.close()
+        return [
+            {
+                "date": r["date"],
+                "waterMl": r["water_ml"],
+                "drinkCount": r["drink_count"],
+                "bookMin": r["book_min"],
+                "laptopMin": r["laptop_min"],
+                "sessionCount": r["session_count"],
+            }
+            for r in rows
+        ]
 
-        df['id'] = df.index
 
-        # amount: duration_frames 기반으로 (이미 있으면 스킵)
-        if 'duration_frames' in df.columns and 'amount' not in df.columns:
-            df['amount'] = pd.to_numeric(df['duration_frames'], errors='coerce').fillna(0).astype(int)
-        elif 'amount' not in df.columns:
-            df['amount'] = 0
+ROLLUP = DailyRollupStore(ROLLUP_DB_PATH)
+
+
+# ==========================================
+# AI 결과 캐시 (SQLite key-value)
+# ==========================================
+ANALYSIS_CACHE_PATH = os.environ.get("ANALYSIS_CACHE_PATH", os.path.join(LOGS_DIR, "analysis_cache.sqlite3"))
+
+ANALYZE_PROMPT = "이 사진 속 음료가 무엇인지 한 단어로 말해줘(예: 콜라, 물, 커피). 컵만 보이면 물."
+
+class SqliteKVCache:
+    """
+    문자열 key → 문자열 value 를 SQLite 테이블 하나에 저장하는 영구 캐시
+    ttl_sec: 지나면 만료, max_entries: 넘으면 오래된 항목부터 삭제 (None 이면 제한 없음)
+    """
 
-        # ★ timestamp 기준으로 captures 이미지 찾기 (capture_path는 무시)
-        if 'timestamp' in df.columns:
-            df['imageUrl'] = df['timestamp'].apply(
-                lambda ts: find_capture_by_timestamp('water_drinking', ts)
+    def __init__(self, db_path: str, table: str, ttl_sec: Optional[float] = None, max_entries: Optional[int] = None):
+        self.db_path = db_path
+        self.table = table
+        self.ttl_sec = ttl_sec
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path)
+        if not self._ready:
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
             )
+            conn.commit()
+            self._ready = True
+        return conn
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            conn = self._connect()
+            try:
+                row = conn.execute(
+                    f"SELECT value, created_at FROM {self.table} WHERE key = ?", (key,)
+                ).fetchone()
+                if row and self.ttl_sec is not None and datetime.now().timestamp() - row[1] > self.ttl_sec:
+                    conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                    conn.commit()
+                    row = None
+            finally:
+                conn.close()
+        return row[0] if row else None
+
+    def put(self, key: str, value: str):
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute(
+                    f"INSERT OR REPLACE INTO {self.table} (key, value, created_at) VALUES (?, ?, ?)",
+                    (key, value, datetime.now().timestamp()),
+                )
+                if self.max_entries is not None:
+                    conn.execute(
+                        f"DELETE FROM {self.table} WHERE key NOT IN "
+                        f"(SELECT key FROM {self.table} ORDER BY created_at DESC LIMIT ?)",
+                        (self.max_entries,),
+                    )
+                conn.commit()
+            finally:
+                conn.close()
+
+    def stats(self) -> dict:
+        """/metrics 용: 저장된 항목 수 (DB 를 못 열면 None)"""
+        with self._lock:
+            try:
+                conn = self._connect()
+                try:
+                    entries = conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+                finally:
+                    conn.close()
+            except sqlite3.Error:
+                entries = None
+        return {"entries": entries}
+
+
+def image_cache_key(image_path: str, prompt: str) -> str:
+    """이미지 바이트 + 프롬프트 해시 (같은 사진을 다시 열어도 같은 키)"""
+    digest = hashlib.sha256(prompt.encode("utf-8") + b"\0")
+    with open(image_path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+AI_RESULT_WRITE_LOCK = threading.Lock()
+
+def store_ai_result(image_filename: str, result: str) -> int:
+    """
+    분석 결과를 해당 캡처를 쓰는 로그 행의 ai_result 컬럼에 기록.
+    캡처 파일명 속 날짜로 그날 로그를 찾아 imageFile 이 같은 행만 갱신. 반환: 갱신한 행 수
+    """
+    match = CAPTURE_NAME_RE.match(image_filename)
+    if not match:
+        return 0
+    with AI_RESULT_WRITE_LOCK:
+        return _store_ai_result(image_filename, match.group(2), result)
+
+def _store_ai_result(image_filename: str, date_str: str, result: str) -> int:
+    updated = 0
+    for prefix, build in (("water", build_water_frame), ("study", build_study_frame)):
+        df = LOG_CACHE.get(prefix, date_str)
+        if df.empty:
+            continue
+        df = build(df)
+        hits = df[df['imageFile'] == image_filename]
+        if 'ai_result' in hits.columns:
+            hits = hits[hits['ai_result'] != result]
+
+        for source_file, rows in hits.groupby('source_file'):
+            path = os.path.join(LOGS_DIR, source_file)
+            row_indexes = [int(i) for i in rows['row_index']]
+
+            def apply(file_df):
+                idx = [i for i in row_indexes if 0 <= i < len(file_df)]
+                if not idx:
+                    return False, 0
+                if 'ai_result' not in file_df.columns:
+                    file_df['ai_result'] = None
+                file_df['ai_result'] = file_df['ai_result'].astype(object)
+                file_df.loc[idx, 'ai_result'] = result
+                return True, len(idx)
+
+            updated += rewrite_log_file(path, apply)
+            LOG_CACHE.discard(path)
+    return updated
+
+
+ANALYSIS_CACHE = SqliteKVCache(ANALYSIS_CACHE_PATH, "analysis_cache")
+
+# 하루 요약 캐시: 같은 입력(SummaryRequest)이면 Gemini 재호출 없이 반환
+SUMMARY_CACHE_PATH = os.environ.get("SUMMARY_CACHE_PATH", os.path.join(LOGS_DIR, "summary_cache.sqlite3"))
+SUMMARY_CACHE_TTL_SEC = float(os.environ.get("SUMMARY_CACHE_TTL_SEC", str(7 * 24 * 3600)))
+SUMMARY_CACHE_MAX_ENTRIES = int(os.environ.get("SUMMARY_CACHE_MAX_ENTRIES", "1000"))
+SUMMARY_CACHE = SqliteKVCache(
+    SUMMARY_CACHE_PATH, "summary_cache", ttl_sec=SUMMARY_CACHE_TTL_SEC, max_entries=SUMMARY_CACHE_MAX_ENTRIES
+)
+
+def summary_cache_key(request: BaseModel) -> str:
+    """요청 필드를 정규화(문자열 trim, 키 정렬)한 JSON 의 해시 + 모델명"""
+    def normalize(value):
+        if isinstance(value, dict):
+            return {k: normalize(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [normalize(v) for v in value]
+        if isinstance(value, str):
+            return value.strip()
+        if isinstance(value, float) and value.is_integer():
+            return int(value)
+        return value
+
+    payload = json.dumps(normalize(request.model_dump()), sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(f"{SUMMARY_MODEL_NAME}|{payload}".encode("utf-8")).hexdigest()
+
+
+# ==========================================
+# 일괄 이미지 분석 (백그라운드 작업)
+# ==========================================
+ANALYZE_BATCH_SIZE = int(os.environ.get("ANALYZE_BATCH_SIZE", "4"))   # 요청 한 번에 묶을 이미지 수
+MAX_ANALYSIS_JOBS = 50
+
+BATCH_ANALYZE_PROMPT = (
+    "다음 {count}장의 사진 각각에 대해, 사진 속 음료가 무엇인지 한 단어로 말해줘(예: 콜라, 물, 커피). "
+    "컵만 보이면 물.\n"
+    "사진 순서대로 한 줄에 하나씩 '번호: 답' 형식으로만 답해줘."
+)
+NUMBERED_ANSWER_RE = re.compile(r'^\s*(\d+)\s*[:.)]\s*(.+?)\s*$')
+
+ANALYSIS_JOBS: "OrderedDict[str, dict]" = OrderedDict()
+ANALYSIS_TASKS: Dict[str, asyncio.Task] = {}
+
+def parse_numbered_answers(text: str, count: int) -> List[str]:
+    answers: Dict[int, str] = {}
+    for line in text.splitlines():
+        match = NUMBERED_ANSWER_RE.match(line)
+        if match:
+            answers[int(match.group(1))] = match.group(2)
+    if sorted(answers) != list(range(1, count + 1)):
+        raise ValueError(f"응답 개수 불일치 ({len(answers)}/{count}): {text!r}")
+    return [answers[i] for i in range(1, count + 1)]
+
+def analyze_images_sync(image_paths: List[str]) -> List[str]:
+    # 여러 장을 한 번의 멀티모달 요청으로 분석
+    model = get_ai_model(VISION_MODEL_NAME)
+    genai = get_genai()
+    images = [genai.upload_file(path=p) for p in image_paths]
+    prompt = BATCH_ANALYZE_PROMPT.format(count=len(image_paths))
+    response = model.generate_content(
+        [prompt, *images], request_options={"timeout": GEMINI_TIMEOUT_SEC}
+    )
+    return parse_numbered_answers(response.text, len(image_paths))
+
+def capture_files_for_date(date_str: str) -> List[str]:
+    """그날 water/study 로그에 연결된 캡처 파일명 (중복 제거, 순서 유지)"""
+    names: List[str] = []
+    for prefix, build in (("water", build_water_frame), ("study", build_study_frame)):
+        df = LOG_CACHE.get(prefix, date_str)
+        if df.empty:
+            continue
+        names.extend(build(df)['imageFile'].dropna().tolist())
+    return list(dict.fromkeys(names))
+
+def new_analysis_job(filenames: List[str]) -> dict:
+    job = {
+        "job_id": uuid.uuid4().hex[:12],
+        "status": "queued",
+        "total": len(filenames),
+        "done": 0,
+        "cached": 0,
+        "failed": 0,
+        "results": {name: None for name in filenames},
+        "created_at": datetime.now().isoformat(timespec='seconds'),
+    }
+    ANALYSIS_JOBS[job["job_id"]] = job
+    # 오래된 완료 작업부터 정리
+    while len(ANALYSIS_JOBS) > MAX_ANALYSIS_JOBS:
+        oldest_id, oldest = next(iter(ANALYSIS_JOBS.items()))
+        if oldest["status"] not in ("done", "failed"):
+            break
+        ANALYSIS_JOBS.pop(oldest_id)
+    return job
+
+async def record_analysis(job: dict, name: str, cache_key: str, result: str, cached: bool = False):
+    loop = asyncio.get_running_loop()
+    if not cached:
+        await loop.run_in_executor(None, ANALYSIS_CACHE.put, cache_key, result)
+    try:
+        await loop.run_in_executor(None, store_ai_result, name, result)
+    except Exception as e:
+        print(f"⚠️ ai_result 로그 기록 실패 ({name}): {e}")
+    job["results"][name] = result
+    job["done"] += 1
+    if cached:
+        job["cached"] += 1
+
+def mark_analysis_failed(job: dict, names: List[str], reason: str):
+    for name in names:
+        job["results"][name] = reason
+        job["failed"] += 1
+
+async def analyze_chunk(job: dict, chunk: List[tuple]):
+    """chunk: [(파일명, 경로, 캐시키), ...] → 한 번의 요청으로 분석, 응답 파싱 실패 시 한 장씩 재시도"""
+    names = [name for name, _, _ in chunk]
+    if not AI_ENABLED:
+        mark_analysis_failed(job, names, "Analysis Failed")
+        return
+
+    try:
+        if len(chunk) > 1:
+            try:
+                results = await run_ai_call(analyze_images_sync, [path for _, path, _ in chunk])
+            except ValueError as e:
+                print(f"⚠️ 일괄 분석 응답 파싱 실패 → 개별 분석: {e}")
+                for item in chunk:
+                    await analyze_chunk(job, [item])
+                return
         else:
-            df['imageUrl'] = None
+            results = [await run_ai_call(analyze_image_sync, chunk[0][1], ANALYZE_PROMPT)]
+    except Exception as e:
+        print(f"❌ 일괄 분석 실패 ({', '.join(names)}): {e!r}")
+        mark_analysis_failed(job, names, "Analysis Failed")
+        return
 
-        df['imageFile'] = df['imageUrl'].apply(
-            lambda url: os.path.basename(str(url)) if isinstance(url, str) else None
-        )
+    for (name, _, cache_key), result in zip(chunk, results):
+        await record_analysis(job, name, cache_key, result.strip())
 
-        if 'ai_result' not in df.columns:
-            df['ai_result'] = "Not Analyzed"
+async def run_analysis_job(job: dict):
+    loop = asyncio.get_running_loop()
+    job["status"] = "running"
+    try:
+        pending = []
+        for name in list(job["results"]):
+            path = os.path.join(CAPTURES_DIR, name)
+            if not os.path.exists(path):
+                mark_analysis_failed(job, [name], "Image not found")
+                continue
+            cache_key = await loop.run_in_executor(None, image_cache_key, path, ANALYZE_PROMPT)
+            cached = await loop.run_in_executor(None, ANALYSIS_CACHE.get, cache_key)
+            if cached is not None:
+                await record_analysis(job, name, cache_key, cached, cached=True)
+            else:
+                pending.append((name, path, cache_key))
 
-        df = df.replace([float('inf'), float('-inf')], None)
-        df = df.astype(object).where(pd.notnull(df), None)
-        return df.to_dict(orient="records")
+        # 묶음 단위 요청을 GEMINI_MAX_CONCURRENCY 개 워커가 차례로 가져가서 처리
+        # (묶음 전부를 한꺼번에 띄우지 않음 → 작업 하나가 세마포어 대기열을 독차지하지 않음)
+        size = max(ANALYZE_BATCH_SIZE, 1)
+        chunks = iter([pending[i:i + size] for i in range(0, len(pending), size)])
+
+        async def worker():
+            for chunk in chunks:
+                await analyze_chunk(job, chunk)
+
+        workers = min(GEMINI_MAX_CONCURRENCY, -(-len(pending) // size))
+        await asyncio.gather(*(worker() for _ in range(workers)))
+        job["status"] = "done"
+    except Exception as e:
+        print(f"❌ 분석 작업 실패 ({job['job_id']}): {e}")
+        traceback.print_exc()
+        job["status"] = "failed"
+    finally:
+        ANALYSIS_TASKS.pop(job["job_id"], None)
+
+
+# ==========================================
+# API 엔드포인트
+# ==========================================
+
+@app.get("/api/logs/water/{date_str}")
+def get_water_logs(date_str: str, request: Request):
+    try:
+        df = LOG_CACHE.get("water", date_str)
+        if df.empty:
+            return []
+
+        df['id'] = df.index
+        df = build_water_frame(df)
+        return log_json_response(request, frame_to_json(df))
     except Exception as e:
         print("water 로그 로드 실패:", e)
         traceback.print_exc()
@@ -253,70 +1843,108 @@ def get_water_logs(date_str: str):
 
 
 @app.get("/api/logs/study/{date_str}")
-def get_study_logs(date_str: str):
-    files = get_csv_files_for_date("study", date_str)
-    if not files:
-        return {"logs": [], "totalBookMin": 0, "totalLaptopMin": 0, "sessions": []}
+def get_study_logs(date_str: str, request: Request):
     try:
-        df = merge_csv_files(files)
+        df = LOG_CACHE.get("study", date_str)
         if df.empty:
-            return {"logs": [], "totalBookMin": 0, "totalLaptopMin": 0, "sessions": []}
+            return dict(EMPTY_STUDY_DAY)
 
-        # duration_sec → duration_min (없으면 생성)
-        # duration_sec → duration_min 동기화
-        # - CSV에서 duration_sec를 수정하면 항상 duration_min도 함께 업데이트되도록 처리
-        if 'duration_sec' in df.columns:
-            df['duration_min'] = pd.to_numeric(df['duration_sec'], errors='coerce').fillna(0) / 60.0
+        df = sync_duration_min(df)
 
         book_min, book_count, book_sessions = calculate_study_duration_per_file(df, 'book')
         laptop_min, laptop_count, laptop_sessions = calculate_study_duration_per_file(df, 'laptop')
 
         df['id'] = df.index
+        df = build_study_frame(df)
 
-        # 1) 우선 CSV의 capture_path로부터 laptop/book 캡처 사용
-        df['imageUrl'] = None
-        if 'capture_path' in df.columns:
-            df['imageUrl'] = df['capture_path'].apply(format_capture_url)
-
-        # 2) 없는 것만 timestamp 기반 study_start / study_end / study_* 에서 찾아오기
-        if 'timestamp' in df.columns:
-            mask = df['imageUrl'].isna()
-            df.loc[mask, 'imageUrl'] = df.loc[mask, 'timestamp'].apply(
-                lambda ts: find_capture_by_timestamp(['study_start', 'study_end', 'study'], ts)
-            )
-
-        df['imageFile'] = df['imageUrl'].apply(
-            lambda url: os.path.basename(str(url)) if isinstance(url, str) else None
-        )
-
-        if 'object' in df.columns:
-            df['type'] = df['object'].apply(
-                lambda x: str(x).lower() if pd.notna(x) else 'laptop'
-            )
-
-        if 'timestamp' in df.columns:
-            df['time'] = df['timestamp'].apply(
-                lambda x: str(x).split('T')[1][:5]
-                if pd.notna(x) and 'T' in str(x)
-                else (str(x).split(' ')[1][:5]
-                      if pd.notna(x) and ' ' in str(x)
-                      else None)
-            )
-
-        df = df.replace([float('inf'), float('-inf')], None)
-        df = df.astype(object).where(pd.notnull(df), None)
-
-        return {
-            "logs": df.to_dict(orient="records"),
+        return log_json_response(request, {
+            "logs": frame_to_json(df),
             "totalBookMin": book_min,
             "totalLaptopMin": laptop_min,
             "sessions": book_sessions + laptop_sessions,
             "activityCount": book_count + laptop_count,
-        }
+        })
     except Exception as e:
         print("study 로그 로드 실패:", e)
         traceback.print_exc()
-        return {"logs": [], "totalBookMin": 0, "totalLaptopMin": 0, "sessions": []}
+        return dict(EMPTY_STUDY_DAY)
+
+
+@app.get("/api/logs/water")
+def get_water_logs_range(request: Request, from_date: str = Query(..., alias="from"), to_date: str = Query(..., alias="to")):
+    """
+    여러 날짜의 water 로그를 한 번에 반환 (주간 차트 / 캘린더용)
+    응답: { "YYYY-MM-DD": [ ...단일 날짜 API와 같은 레코드... ], ... }
+    """
+    dates = get_date_range(from_date, to_date)
+    result: Dict[str, list] = {d: [] for d in dates}
+    try:
+        df = load_log_range("water", dates)
+        if df.empty:
+            return result
+
+        df = build_water_frame(df)
+        for date_str, day_df in df.groupby('date', sort=False):
+            result[date_str] = frame_to_json(day_df.drop(columns='date'))
+        return log_json_response(request, result)
+    except Exception as e:
+        print("water 범위 로그 로드 실패:", e)
+        traceback.print_exc()
+        return result
+
+
+@app.get("/api/logs/study")
+def get_study_logs_range(request: Request, from_date: str = Query(..., alias="from"), to_date: str = Query(..., alias="to")):
+    """
+    여러 날짜의 study 로그 + 날짜별 집계(totalBookMin, totalLaptopMin, sessions, activityCount)
+    응답: { "YYYY-MM-DD": { ...단일 날짜 API와 같은 형식... }, ... }
+    """
+    dates = get_date_range(from_date, to_date)
+    result: Dict[str, dict] = {d: dict(EMPTY_STUDY_DAY) for d in dates}
+    try:
+        df = load_log_range("study", dates)
+        if df.empty:
+            return result
+
+        df = sync_duration_min(df)
+        book = aggregate_study_sessions(df, 'book', by=['date'])
+        laptop = aggregate_study_sessions(df, 'laptop', by=['date'])
+        book_by_day = dict(list(book.groupby('date', sort=False)))
+        laptop_by_day = dict(list(laptop.groupby('date', sort=False)))
+
+        df = build_study_frame(df)
+        for date_str, day_df in df.groupby('date', sort=False):
+            day_book = book_by_day.get(date_str, book.iloc[0:0])
+            day_laptop = laptop_by_day.get(date_str, laptop.iloc[0:0])
+            result[date_str] = {
+                "logs": frame_to_json(day_df.drop(columns='date')),
+                "totalBookMin": int(day_book['duration_min'].sum()),
+                "totalLaptopMin": int(day_laptop['duration_min'].sum()),
+                "sessions": sessions_to_records(day_book) + sessions_to_records(day_laptop),
+                "activityCount": len(day_book) + len(day_laptop),
+            }
+        return log_json_response(request, result)
+    except Exception as e:
+        print("study 범위 로그 로드 실패:", e)
+        traceback.print_exc()
+        return result
+
+
+@app.get("/api/stats/daily")
+def get_daily_stats(from_date: Optional[str] = Query(None, alias="from"), to_date: Optional[str] = Query(None, alias="to")):
+    """
+    날짜별 합계만 반환 (대시보드 / 히스토리용, 원본 로그 파싱 없이 rollup 테이블에서 조회)
+    from/to 생략 시 전체 날짜
+    """
+    dates = None
+    if from_date or to_date:
+        dates = get_date_range(from_date or to_date, to_date or from_date)
+    try:
+        return ROLLUP.query(dates)
+    except Exception as e:
+        print("일별 집계 조회 실패:", e)
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=str(e))
 
 
 def find_capture_by_timestamp(prefixes, timestamp: str) -> Optional[str]:
@@ -324,6 +1952,7 @@ def find_capture_by_timestamp(prefixes, timestamp: str) -> Optional[str]:
     prefixes: 'water_drinking' 또는 ['study_start', 'study_end', 'study']처럼 리스트
     timestamp: '2025-12-04T20:44:23' 또는 '2025-12-04 20:44:23'
     → Desktop/captures/{prefix}_{YYYY-MM-DD}_{HH-MM}* 를 찾아서 첫 파일을 반환
+    (glob 대신 CAPTURE_INDEX 조회, 호출 전에 CAPTURE_INDEX.refresh() 필요)
     """
     if not timestamp:
         return None
@@ -331,6 +1960,8 @@ def find_capture_by_timestamp(prefixes, timestamp: str) -> Optional[str]:
         dt = pd.to_datetime(str(timestamp))
     except Exception:
         return None
+    if pd.isna(dt):
+        return None
 
     date_str = dt.strftime('%Y-%m-%d')   # 2025-12-04
     time_key = dt.strftime('%H-%M')      # 20-44
@@ -339,15 +1970,104 @@ def find_capture_by_timestamp(prefixes, timestamp: str) -> Optional[str]:
         prefixes = [prefixes]
 
     for p in prefixes:
-        pattern = os.path.join(CAPTURES_DIR, f"{p}_{date_str}_{time_key}*")
-        matches = glob.glob(pattern)
-        if matches:
-            return format_capture_url(matches[0])
+        match = CAPTURE_INDEX.lookup(p, date_str, time_key)
+        if match:
+            return format_capture_url(match)
 
     return None
 
 
 
+# ======================================================================
+# 로그 수정 (단건 / 일괄)
+# ======================================================================
+# 프론트는 보통 snake_case(book_title, read_pages)를 보냄
+# 혹시 camelCase(bookTitle, readPages)가 와도 snake_case로 매핑
+LOG_UPDATE_KEY_MAP = {
+    "bookTitle": "book_title",
+    "bookAuthors": "book_authors",
+    "bookThumbnail": "book_thumbnail",
+    "readPages": "read_pages",
+    "totalPages": "total_pages",
+    "durationMin": "duration_min",
+}
+
+class LogBatchUpdateRequest(BaseModel):
+    operations: List[LogUpdateRequest]
+
+def resolve_log_file(source_file: str) -> Optional[str]:
+    file_path = os.path.join(LOGS_DIR, source_file)
+    if os.path.exists(file_path):
+        return file_path
+    candidates = glob.glob(os.path.join(LOGS_DIR, f"*{source_file}*"))
+    return candidates[0] if candidates else None
+
+def set_log_value(df: pd.DataFrame, rows, col_name: str, value):
+    try:
+        df.loc[rows, col_name] = value
+    except (TypeError, ValueError):
+        # 숫자 컬럼에 문자열 등 → object 로 바꿔서 다시 기록
+        df[col_name] = df[col_name].astype(object)
+        df.loc[rows, col_name] = value
+
+def apply_log_update(df: pd.DataFrame, log_id, updates: Dict[str, Any]) -> Dict[str, Any]:
+    """updates 를 df 에 적용 (in-place). 반환: {"applied": [...], "skipped": [...], "error": ...}"""
+    result = {"applied": [], "skipped": [], "error": None}
+
+    # 파일 전체 업데이트는 명시적으로 "all" 또는 빈 값일 때만 처리
+    # (0 은 실제 첫 번째 로그 인덱스로 사용)
+    if str(log_id) in ("all", ""):
+        rows = df.index
+    else:
+        try:
+            idx = int(log_id)
+        except ValueError:
+            print(f"⚠️ log_id가 숫자가 아님: {log_id}")
+            result["error"] = f"Invalid log_id: {log_id}"
+            return result
+        if not 0 <= idx < len(df):
+            result["error"] = f"log_id out of range: {log_id}"
+            return result
+        rows = [idx]
+
+    for key, value in (updates or {}).items():
+        # 컬럼명 결정 (우선: snake_case / 보조: key_map)
+        col_name = key
+        if col_name not in df.columns and key in LOG_UPDATE_KEY_MAP:
+            col_name = LOG_UPDATE_KEY_MAP[key]
+
+        if col_name not in df.columns:
+            # 컬럼이 없으면 새로 만들 수도 있지만, 일단 경고만 찍고 스킵
+            print(f"⚠️ 로그에 '{col_name}' 컬럼이 없어 스킵됨. (원래 키: {key})")
+            result["skipped"].append(key)
+            continue
+
+        set_log_value(df, rows, col_name, value)
+        result["applied"].append(col_name)
+    return result
+
+def apply_log_updates_to_file(file_path: str, operations: List[LogUpdateRequest]) -> List[Dict[str, Any]]:
+    """
+    한 파일에 대한 수정들을 파일 lock 안에서 한 번 읽고 한 번 원자적으로 저장.
+    읽은 뒤 파일이 바뀌었으면(sensing 루프 append) 다시 읽어서 재적용
+    """
+    def apply(df):
+        results = [apply_log_update(df, op.log_id, op.updates) for op in operations]
+        return any(r["applied"] for r in results), results
+
+    results = rewrite_log_file(file_path, apply)
+    if not any(r["applied"] for r in results):
+        return results
+
+    LOG_CACHE.discard(file_path)
+    print("✅ 로그 업데이트 저장 완료:", file_path)
+    try:
+        ROLLUP.refresh_file(file_path)
+    except Exception as e:
+        print("⚠️ 일별 집계 갱신 실패:", e)
+        traceback.print_exc()
+    return results
+
 
 # ======================================================================
 # ✅ [최종 수정] 프론트엔드 요청(/api/logs/update)을 처리하는 범용 수정 API
@@ -362,66 +2082,12 @@ def update_log_generic(payload: LogUpdateRequest):
     print(f"📥 로그 업데이트 요청: {payload.source_file} / log_id={payload.log_id}")
     
     try:
-        # 1. 파일 찾기
-        file_path = os.path.join(LOGS_DIR, payload.source_file)
-        if not os.path.exists(file_path):
-            search_pattern = os.path.join(LOGS_DIR, f"*{payload.source_file}*")
-            candidates = glob.glob(search_pattern)
-            if candidates:
-                file_path = candidates[0]
-            else:
-                print(f"❌ 파일 찾기 실패: {payload.source_file}")
-                raise HTTPException(status_code=404, detail="File not found")
-
-        # 2. CSV 읽기
-        df = pd.read_csv(file_path)
-
-        # 3. 키 매핑
-        #    - 프론트는 보통 snake_case(book_title, read_pages)를 보냄
-        #    - 혹시 camelCase(bookTitle, readPages)가 와도 snake_case로 매핑
-        key_map = {
-            "bookTitle": "book_title",
-            "bookAuthors": "book_authors",
-            "bookThumbnail": "book_thumbnail",
-            "readPages": "read_pages",
-            "totalPages": "total_pages",
-            "durationMin": "duration_min",
-        }
-
-        updates = payload.updates or {}
-        # 파일 전체 업데이트는 명시적으로 "all" 또는 빈 값일 때만 처리
-        # (0 은 실제 첫 번째 로그 인덱스로 사용)
-        is_file_wide_update = str(payload.log_id) in ("all", "")
-
-        # 4. 업데이트 적용
-        for key, value in updates.items():
-            # 4-1. 컬럼명 결정 (우선: snake_case / 보조: key_map)
-            col_name = key
-            if col_name not in df.columns and key in key_map:
-                col_name = key_map[key]
-
-            if col_name not in df.columns:
-                # 컬럼이 없으면 새로 만들 수도 있지만, 일단 경고만 찍고 스킵
-                print(f"⚠️ CSV에 '{col_name}' 컬럼이 없어 스킵됨. (원래 키: {key})")
-                continue
-
-            if is_file_wide_update:
-                # 파일 내 모든 행 업데이트 (책 정보 수정 시)
-                df.loc[:, col_name] = value
-            else:
-                # 개별 로그 수정 (manual update)
-                try:
-                    idx = int(payload.log_id)
-                    if 0 <= idx < len(df):
-                        df.at[idx, col_name] = value
-                except ValueError:
-                    print(f"⚠️ log_id가 숫자가 아님: {payload.log_id}")
-                    continue
+        file_path = resolve_log_file(payload.source_file)
+        if file_path is None:
+            print(f"❌ 파일 찾기 실패: {payload.source_file}")
+            raise HTTPException(status_code=404, detail="File not found")
 
-        # 5. 저장
-        df.to_csv(file_path, index=False, encoding="utf-8-sig")
-        print("✅ 로그 업데이트 저장 완료:", file_path)
-        
+        apply_log_updates_to_file(file_path, [payload])
         return {"status": "success"}
 
     except HTTPException:
@@ -432,68 +2098,181 @@ def update_log_generic(payload: LogUpdateRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/logs/update/batch")
+def update_logs_batch(payload: LogBatchUpdateRequest):
+    """
+    여러 수정을 한 번에 처리 (예: 일주일치 책 정보 수정)
+    Payload: { operations: [ { source_file, log_id, updates }, ... ] }
+    파일별로 묶어서 파일당 한 번만 읽고/저장. 응답의 results 는 operations 순서와 동일
+    """
+    print(f"📥 로그 일괄 업데이트 요청: {len(payload.operations)}건")
+    results: List[Optional[Dict[str, Any]]] = [None] * len(payload.operations)
+
+    groups: Dict[str, List[int]] = {}
+    for i, op in enumerate(payload.operations):
+        file_path = resolve_log_file(op.source_file)
+        if file_path is None:
+            results[i] = {"status": "error", "detail": "File not found"}
+            continue
+        groups.setdefault(file_path, []).append(i)
+
+    for file_path, indices in groups.items():
+        try:
+            file_results = apply_log_updates_to_file(file_path, [payload.operations[i] for i in indices])
+        except Exception as e:
+            print("❌ 저장 중 오류 발생:", e)
+            traceback.print_exc()
+            for i in indices:
+                results[i] = {"status": "error", "detail": str(e)}
+            continue
+        for i, r in zip(indices, file_results):
+            results[i] = {
+                "status": "error" if r["error"] else "success",
+                "detail": r["error"],
+                "applied": r["applied"],
+                "skipped": r["skipped"],
+            }
+
+    for i, op in enumerate(payload.operations):
+        results[i] = {"source_file": op.source_file, "log_id": op.log_id, **results[i]}
+
+    failed = sum(1 for r in results if r["status"] != "success")
+    status = "success" if failed == 0 else ("error" if failed == len(results) else "partial")
+    return {"status": status, "results": results}
+
+
+def analyze_image_sync(image_path: str, prompt: str) -> str:
+    # 업로드 + 추론을 한 작업으로 묶어서 워커 슬롯 하나만 사용
+    model = get_ai_model(VISION_MODEL_NAME)
+    img = get_genai().upload_file(path=image_path)
+    response = model.generate_content(
+        [prompt, img], request_options={"timeout": GEMINI_TIMEOUT_SEC}
+    )
+    return response.text.strip()
+
+
 @app.post("/api/analyze")
 async def analyze_image(request: AnalysisRequest):
-    if VISION_MODEL is None:
-        print("⚠️ VISION_MODEL 미초기화")
-        return {"result": "Analysis Failed"}
-
     image_path = os.path.join(CAPTURES_DIR, request.image_filename)
     if not os.path.exists(image_path):
         raise HTTPException(status_code=404, detail="Image not found")
-    
+
+    loop = asyncio.get_running_loop()
     try:
-        img = genai.upload_file(path=image_path)
-        prompt = "이 사진 속 음료가 무엇인지 한 단어로 말해줘(예: 콜라, 물, 커피). 컵만 보이면 물."
-        response = VISION_MODEL.generate_content([prompt, img])
-        return {"result": response.text.strip()}
+        # 1. 같은 이미지 + 프롬프트를 이미 분석했으면 업로드 없이 바로 반환
+        cache_key = await loop.run_in_executor(None, image_cache_key, image_path, ANALYZE_PROMPT)
+        result = await loop.run_in_executor(None, ANALYSIS_CACHE.get, cache_key)
+
+        if result is None:
+            if not AI_ENABLED:
+                print("⚠️ AI 비활성 (GOOGLE_API_KEY 없음)")
+                return {"result": "Analysis Failed"}
+            result = await run_ai_call(analyze_image_sync, image_path, ANALYZE_PROMPT)
+            await loop.run_in_executor(None, ANALYSIS_CACHE.put, cache_key, result)
+
+        # 2. 로그 ai_result 에도 기록 → 다음 로드부터 "Not Analyzed" 가 아님
+        try:
+            await loop.run_in_executor(None, store_ai_result, request.image_filename, result)
+        except Exception as e:
+            print("⚠️ ai_result 로그 기록 실패:", e)
+            traceback.print_exc()
+
+        return {"result": result}
+    except asyncio.TimeoutError:
+        print(f"❌ Image analysis timeout ({GEMINI_TIMEOUT_SEC}s): {request.image_filename}")
+        return {"result": "Analysis Failed"}
     except Exception as e:
         print("❌ Image analysis error:", e)
         traceback.print_exc()
         return {"result": "Analysis Failed"}
 
 
-@app.post("/api/summary")
-async def generate_summary(request: SummaryRequest):
-    if TEXT_MODEL is None:
-        return {
-            "summary": (
-                "오늘은 물과 공부 기록을 차분히 쌓아가는 하루였어요. "
-                "내일도 너무 무리하지 말고 꾸준한 페이스를 이어가면 좋겠어요."
-            )
-        }
+@app.post("/api/analyze/batch")
+async def analyze_images_batch(request: BatchAnalysisRequest):
+    """
+    날짜 또는 파일명 목록의 캡처를 백그라운드에서 일괄 분석.
+    진행 상황은 /api/analyze/jobs/{job_id} 로 조회
+    """
+    filenames = list(dict.fromkeys(request.image_filenames))
+    if request.date:
+        date_str = parse_date_param(request.date)
+        loop = asyncio.get_running_loop()
+        filenames += [n for n in await loop.run_in_executor(None, capture_files_for_date, date_str)
+                      if n not in filenames]
+    if not filenames:
+        raise HTTPException(status_code=400, detail="No images to analyze")
+
+    job = new_analysis_job(filenames)
+    ANALYSIS_TASKS[job["job_id"]] = asyncio.create_task(run_analysis_job(job))
+    return {"job_id": job["job_id"], "status": job["status"], "total": job["total"]}
+
+
+@app.get("/api/analyze/jobs/{job_id}")
+def get_analysis_job(job_id: str):
+    job = ANALYSIS_JOBS.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+SUMMARY_FALLBACK = "오늘은 물과 공부 기록을 차분히 쌓아가는 하루였어요. 내일도 무리하지 말고 편안하게 이어가보세요."
+SUMMARY_NO_AI = (
+    "오늘은 물과 공부 기록을 차분히 쌓아가는 하루였어요. "
+    "내일도 너무 무리하지 말고 꾸준한 페이스를 이어가면 좋겠어요."
+)
+
+def fallback_summary() -> str:
+    """AI 를 쓸 수 없거나(키 없음) 호출이 실패했을 때 돌려줄 기본 요약"""
+    return SUMMARY_FALLBACK if AI_ENABLED else SUMMARY_NO_AI
 
+async def get_cached_summary(cache_key: str) -> Optional[str]:
+    """SUMMARY_CACHE 조회 (SQLite blocking → 스레드에서). 캐시를 못 열면 없는 것으로 취급"""
+    loop = asyncio.get_running_loop()
     try:
-        # 물/공부 달성 여부
-        water_achieved = "달성" if request.waterMl >= request.waterGoal else "부족"
-        study_achieved = "달성" if request.studyMin >= request.studyGoal else "부족"
+        return await loop.run_in_executor(None, SUMMARY_CACHE.get, cache_key)
+    except Exception as e:
+        print(f"⚠️ 요약 캐시 조회 실패: {e}")
+        return None
 
-        # 기본 정보 정리
-        base_info = f"""
+async def put_cached_summary(cache_key: str, summary: str):
+    loop = asyncio.get_running_loop()
+    try:
+        await loop.run_in_executor(None, SUMMARY_CACHE.put, cache_key, summary)
+    except Exception as e:
+        print(f"⚠️ 요약 캐시 저장 실패: {e}")
+
+def build_summary_prompt(request: SummaryRequest) -> str:
+    """SummaryRequest → Gemini 하루 요약 프롬프트"""
+    # 물/공부 달성 여부
+    water_achieved = "달성" if request.waterMl >= request.waterGoal else "부족"
+    study_achieved = "달성" if request.studyMin >= request.studyGoal else "부족"
+
+    # 기본 정보 정리
+    base_info = f"""
 - 물 섭취: {request.waterMl}ml / 목표 {request.waterGoal}ml ({water_achieved})
 - 공부: {request.studyMin}분 / 목표 {request.studyGoal}분 ({study_achieved})
 """
 
-        # 💻 노트북 활동 요약
-        laptop_section = ""
-        if request.laptopInfo and request.laptopInfo.durationMin > 0:
-            laptop = request.laptopInfo
-            category_names = {
-                "lecture": "강의 시청",
-                "assignment": "과제",
-                "coding": "코딩",
-                "youtube": "YouTube",
-                "game": "게임",
-            }
-            cat_name = category_names.get(laptop.category, laptop.category)
-            laptop_section = f"- 노트북 활동: {cat_name} {laptop.durationMin}분\n"
-
-        # 📚 책 정보
-        book_section = ""
-        if request.bookInfo and (request.bookInfo.title or request.bookInfo.description):
-            book = request.bookInfo
-            purpose_text = "학습 목적" if book.purpose == "study" else "취미 독서"
-            book_section = f"""
+    # 💻 노트북 활동 요약
+    laptop_section = ""
+    if request.laptopInfo and request.laptopInfo.durationMin > 0:
+        laptop = request.laptopInfo
+        category_names = {
+            "lecture": "강의 시청",
+            "assignment": "과제",
+            "coding": "코딩",
+            "youtube": "YouTube",
+            "game": "게임",
+        }
+        cat_name = category_names.get(laptop.category, laptop.category)
+        laptop_section = f"- 노트북 활동: {cat_name} {laptop.durationMin}분\n"
+
+    # 📚 책 정보
+    book_section = ""
+    if request.bookInfo and (request.bookInfo.title or request.bookInfo.description):
+        book = request.bookInfo
+        purpose_text = "학습 목적" if book.purpose == "study" else "취미 독서"
+        book_section = f"""
 - 오늘 읽은 책: "{book.title or '제목 미기록'}"
 - 저자: {', '.join(book.authors) if book.authors else '미상'}
 - 읽은 페이지: {book.readPages}p / {book.totalPages}p
@@ -502,8 +2281,8 @@ async def generate_summary(request: SummaryRequest):
 - 책 설명: {book.description[:200] if book.description else '설명 없음'}
 """
 
-        # 📌 통합 프롬프트 — 하루 요약 + 물 + 공부 + 노트북 + 독서(있으면)
-        prompt = f"""
+    # 📌 통합 프롬프트 — 하루 요약 + 물 + 공부 + 노트북 + 독서(있으면)
+    prompt = f"""
 당신은 차분하고 따뜻한 하루 리포트 코치입니다.
 
 [오늘의 기록]
@@ -528,20 +2307,159 @@ async def generate_summary(request: SummaryRequest):
 5) 전체는 5~7문장, 존댓말, 차분하지만 따뜻한 톤.
    지나치게 극적인 표현이나 과장된 격려는 피하세요.
 """
+    return prompt
+
+
+@app.post("/api/summary")
+async def generate_summary(request: SummaryRequest):
+    cache_key = summary_cache_key(request)
+    cached = await get_cached_summary(cache_key)
+    if cached is not None:
+        return {"summary": cached}
+
+    if not AI_ENABLED:
+        return {"summary": fallback_summary()}
+
+    try:
+        prompt = build_summary_prompt(request)
 
         # 🔥 AI 실행
-        response = TEXT_MODEL.generate_content(prompt)
+        response = await run_ai_call(generate_text_sync, prompt)
         summary = ' '.join(response.text.strip().split())
+        await put_cached_summary(cache_key, summary)
 
         return {"summary": summary}
 
+    except asyncio.TimeoutError:
+        print(f"❌ AI summary timeout ({GEMINI_TIMEOUT_SEC}s): {request.date}")
+        return {"summary": fallback_summary()}
+
     except Exception as e:
         print("❌ AI summary error:", e)
         traceback.print_exc()
-        return {
-            "summary": "오늘은 물과 공부 기록을 차분히 쌓아가는 하루였어요. 내일도 무리하지 말고 편안하게 이어가보세요."
-        }
+        return {"summary": fallback_summary()}
+
+
+def generate_text_sync(prompt: str, stream: bool = False):
+    return get_ai_model(SUMMARY_MODEL_NAME).generate_content(
+        prompt, stream=stream, request_options={"timeout": GEMINI_TIMEOUT_SEC}
+    )
+
+
+async def stream_ai_text(prompt: str):
+    """
+    텍스트 모델 스트리밍 응답을 조각 단위로 yield.
+    SDK 이터레이터는 blocking 이라 AI_EXECUTOR 스레드에서 돌리고 asyncio.Queue 로 넘겨받음
+    (조각 사이 대기가 GEMINI_TIMEOUT_SEC 를 넘으면 TimeoutError)
+    - 슬롯은 run_ai_call 과 같이 생산 스레드가 끝날 때 반납 (클라이언트가 끊겨도 동시 호출 수 유지)
+    - 끊김 / 시간 초과 / 오류로 여기서 먼저 끝나면 cancelled 를 세워 생산 스레드가 다음 조각에서 멈춤
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    done = object()
+    cancelled = threading.Event()
+
+    def produce():
+        try:
+            response = generate_text_sync(prompt, stream=True)
+            for chunk in response:
+                if cancelled.is_set():
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, chunk.text)
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, e)
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, done)
+
+    await AI_SEMAPHORE.acquire()
+    try:
+        producer = loop.run_in_executor(AI_EXECUTOR, produce)
+    except BaseException:
+        AI_SEMAPHORE.release()
+        raise
+    producer.add_done_callback(_release_ai_slot)
+
+    t0 = time.perf_counter()
+    outcome = "cancelled"
+    try:
+        while True:
+            item = await asyncio.wait_for(queue.get(), timeout=GEMINI_TIMEOUT_SEC)
+            if item is done:
+                break
+            if isinstance(item, Exception):
+                outcome = "error"
+                raise item
+            yield item
+        await producer
+        outcome = "ok"
+        PHASE_LATENCY.observe(time.perf_counter() - t0, phase="gemini_stream")
+    except asyncio.TimeoutError:
+        outcome = "timeout"
+        raise
+    finally:
+        cancelled.set()
+        log_event(logging.INFO, "gemini_call", func="generate_text_stream", outcome=outcome, ms=elapsed_ms(t0))
+
+def sse_event(data: dict, event: Optional[str] = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.post("/api/summary/stream")
+async def stream_summary(request: SummaryRequest):
+    """
+    /api/summary 의 스트리밍 버전 (Server-Sent Events)
+    - 생성 중: data: {"delta": "..."}
+    - 완료:   event: done  / data: {"summary": "공백 정리된 전체 문장"}
+    - 실패:   event: error / data: {"summary": 기본 문구}
+    전체 문장이 필요한 클라이언트는 기존 /api/summary 사용
+    """
+    cache_key = summary_cache_key(request)
+
+    async def events():
+        cached = await get_cached_summary(cache_key)
+        if cached is not None:
+            yield sse_event({"delta": cached})
+            yield sse_event({"summary": cached}, event="done")
+            return
+
+        if not AI_ENABLED:
+            yield sse_event({"summary": fallback_summary()}, event="error")
+            return
+
+        parts = []
+        try:
+            async for text in stream_ai_text(build_summary_prompt(request)):
+                parts.append(text)
+                yield sse_event({"delta": text})
+            summary = ' '.join(''.join(parts).strip().split())
+            await put_cached_summary(cache_key, summary)
+            yield sse_event({"summary": summary}, event="done")
+        except Exception as e:
+            print(f"❌ AI summary stream error: {e!r}")
+            yield sse_event({"summary": fallback_summary()}, event="error")
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+STARTUP_TIMINGS["total"] = elapsed_ms(STARTUP_T0)
+print(
+    "🚀 서버 준비 완료 ("
+    + ", ".join(f"{name} {ms} ms" for name, ms in STARTUP_TIMINGS.items())
+    + f") · AI: {'lazy' if AI_ENABLED else 'disabled'}"
+)
 
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    import sys
+
+    if len(sys.argv) > 1 and sys.argv[1] == "convert-logs":
+        # python server/server.py convert-logs [logs_dir]
+        count = convert_logs_to_columnar(sys.argv[2] if len(sys.argv) > 2 else None)
+        print(f"총 {count}개 CSV → Arrow 변환")
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8000)
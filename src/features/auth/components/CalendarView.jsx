@@ -1,5 +1,6 @@
-import React, { useState } from 'react';
+import React, { useState, useEffect } from 'react';
 import { ChevronLeft, ChevronRight } from 'lucide-react';
+import { fetchDailyStats } from '../../../shared/services/apiService';
 
 export default function CalendarView({ history, goals, onDateClick, isDarkMode }) {
   // ★ [수정] 진짜 '오늘' 날짜를 기준으로 초기화
@@ -16,9 +17,34 @@ export default function CalendarView({ history, goals, onDateClick, isDarkMode }
   const days = Array.from({ length: daysInMonth }, (_, i) => i + 1);
   const blanks = Array.from({ length: firstDayOfMonth }, (_, i) => i);
 
+  // 보이는 달의 날짜별 합계를 rollup API 한 번으로 가져옴 (날짜마다 로그 요청하지 않음)
+  const [monthStats, setMonthStats] = useState({});
+
+  useEffect(() => {
+    const pad = (n) => String(n).padStart(2, '0');
+    const fromDate = `${year}-${pad(month + 1)}-01`;
+    const toDate = `${year}-${pad(month + 1)}-${pad(daysInMonth)}`;
+    let cancelled = false;
+
+    fetchDailyStats(fromDate, toDate).then((rows) => {
+      if (cancelled) return;
+      const byDate = {};
+      rows.forEach((r) => {
+        byDate[r.date] = { water: r.waterMl || 0, study: (r.bookMin || 0) + (r.laptopMin || 0) };
+      });
+      setMonthStats(byDate);
+    });
+
+    return () => { cancelled = true; };
+  }, [year, month, daysInMonth]);
+
   const getDataForDay = (day) => {
     const dateStr = `${year}-${String(month + 1).padStart(2, '0')}-${String(day).padStart(2, '0')}`;
-    return history.find(h => h.date === dateStr);
+    const entry = history.find(h => h.date === dateStr);
+    const server = monthStats[dateStr];
+    if (!server) return entry;
+    // 식사(calories)는 서버에 없으므로 history 값 유지
+    return { calories: 0, ...entry, ...server };
   };
 
   const monthNames = ["January", "February", "March", "April", "May", "June", "July", "August", "September", "October", "November", "December"];
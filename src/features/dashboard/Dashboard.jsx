@@ -18,6 +18,8 @@ import DatePicker from '../../shared/components/DatePicker';
 // 유틸리티
 import { calculateOverallScore, formatMinutesToTime } from '../study/utils/studyCalculator';
 import { generateQuickTips, getTipColorClass } from './utils/tipsGenerator';
+import { buildDailyTotals } from './utils/weeklyTotals';
+import { fetchWaterLogsRange, fetchStudyLogsRange } from '../../shared/services/apiService';
 
 export default function Dashboard({ 
   user, 
@@ -55,19 +57,39 @@ export default function Dashboard({
 
   // handleDateChange는 DatePicker 내부에서 처리됨
 
+  // 주간 차트: 7일치 로그를 기간 API 두 번(water / study)으로 가져옴 (날짜별 14번 → 2번)
+  const [weeklyTotals, setWeeklyTotals] = useState({});
+
+  useEffect(() => {
+    const days = generateWeeklyData(currentDate);
+    const fromDate = days[0].date;
+    const toDate = days[days.length - 1].date;
+    let cancelled = false;
+
+    Promise.all([fetchWaterLogsRange(fromDate, toDate), fetchStudyLogsRange(fromDate, toDate)])
+      .then(([waterByDate, studyByDate]) => {
+        if (!cancelled) setWeeklyTotals(buildDailyTotals(waterByDate, studyByDate));
+      });
+
+    return () => { cancelled = true; };
+  }, [currentDate]);
+
   const weeklyData = useMemo(() => {
+    // 오늘(선택 날짜)은 화면의 실시간 값, 나머지는 서버 기간 조회 → 없으면 history
     const getWater = (date) => {
       if (date === currentDate) return stats.waterMl;
+      if (weeklyTotals[date]) return weeklyTotals[date].water;
       const log = user.history?.find(h => h.date === date);
       return log ? log.water : 0;
     };
     const getStudy = (date) => {
       if (date === currentDate) return studySummary.totalStudyMin;
+      if (weeklyTotals[date]) return weeklyTotals[date].study;
       const log = user.history?.find(h => h.date === date);
       return log?.study || 0;
     };
     return generateWeeklyData(currentDate, getWater, getStudy);
-  }, [currentDate, user.history, stats.waterMl, studySummary.totalStudyMin, user.goals.water, user.goals.study]);
+  }, [currentDate, weeklyTotals, user.history, stats.waterMl, studySummary.totalStudyMin, user.goals.water, user.goals.study]);
 
   const quickTips = useMemo(() => {
     return generateQuickTips({
@@ -0,0 +1,67 @@
+// src/features/dashboard/utils/weeklyTotals.js
+// ============================================================
+// 기간 로그(/api/logs/water|study?from&to) → 날짜별 물/공부 합계
+// useWaterLogs / useStudyLogs 와 같은 방식으로 계산해서
+// 주간 차트 막대가 그날 대시보드 숫자와 일치하도록 함
+// ============================================================
+
+import { calculateLogStats } from '../../water/utils/logProcessor';
+import { isNonStudyLabel } from '../../study/utils/studyCalculator';
+
+const toHHMM = (item) => {
+  if (item.time) return item.time.substring(0, 5);
+  const ts = item.timestamp || '';
+  const match = ts.match(/(\d{2}:\d{2})/);
+  return match ? match[1] : '00:00';
+};
+
+/**
+ * 하루치 물 로그 → 물 섭취량 (ml)
+ * @param {Array} rawLogs - /api/logs/water 응답의 하루치 배열
+ * @returns {number}
+ */
+export const waterMlFromLogs = (rawLogs) => {
+  const logs = (rawLogs || []).map((item) => ({
+    time: toHHMM(item),
+    amount: parseInt(item.amount, 10) || 200,
+  }));
+  return calculateLogStats(logs).waterMl;
+};
+
+/**
+ * 하루치 공부 응답 → 공부 시간 (분) = Book + Laptop(공부 라벨만)
+ * @param {Object} data - { logs, totalBookMin, totalLaptopMin }
+ * @returns {number}
+ */
+export const studyMinFromLogs = (data) => {
+  if (!data) return 0;
+  let bookMin = 0;
+  let laptopMin = 0;
+
+  (data.logs || []).forEach((log) => {
+    const duration = parseFloat(log.duration_min) || 0;
+    if ((log.object || 'laptop').toLowerCase().includes('book')) {
+      bookMin += duration;
+      return;
+    }
+    const aiResult = log.ai_result === 'Not Analyzed' ? '' : log.ai_result;
+    if (!isNonStudyLabel(log.manual_label || aiResult)) laptopMin += duration;
+  });
+
+  if (bookMin === 0) bookMin = data.totalBookMin || 0;
+  return +(bookMin + laptopMin).toFixed(1);
+};
+
+/**
+ * 기간 응답 두 개 → { 'YYYY-MM-DD': { water, study } }
+ */
+export const buildDailyTotals = (waterByDate = {}, studyByDate = {}) => {
+  const totals = {};
+  new Set([...Object.keys(waterByDate), ...Object.keys(studyByDate)]).forEach((date) => {
+    totals[date] = {
+      water: waterMlFromLogs(waterByDate[date]),
+      study: studyMinFromLogs(studyByDate[date]),
+    };
+  });
+  return totals;
+};
@@ -4,6 +4,7 @@
 // ============================================================
 
 import { useState, useEffect, useCallback, useRef, useMemo } from 'react';
+import { isNonStudyLabel } from '../utils/studyCalculator';
 
 const API_BASE_URL = 'http://localhost:8000';
 
@@ -100,10 +101,9 @@ export const useStudyLogs = (currentDate, onLogsLoaded) => {
     studyLogs
       .filter((l) => l.type === 'laptop')
       .forEach((log) => {
-        const label = (log.userLabel || log.aiResult || 'Study').toLowerCase();
         const duration = parseFloat(log.durationMin) || 0;
 
-        if (label.includes('game') || label.includes('youtube') || label.includes('other')) {
+        if (isNonStudyLabel(log.userLabel || log.aiResult)) {
           nonStudyMin += duration;
         } else {
           studyMin += duration;
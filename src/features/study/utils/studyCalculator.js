@@ -42,6 +42,16 @@ export const isStudyCategory = (category) => {
   return LAPTOP_CATEGORIES[category]?.isStudy === true;
 };
 
+/**
+ * Laptop 로그 라벨(사용자 수정값 / AI 결과)이 비공부 활동인지 확인
+ * @param {string} label - userLabel 또는 aiResult (없으면 공부로 간주)
+ * @returns {boolean}
+ */
+export const isNonStudyLabel = (label) => {
+  const text = (label || 'Study').toLowerCase();
+  return text.includes('game') || text.includes('youtube') || text.includes('other');
+};
+
 /**
  * 로그를 세션(활동 단위)으로 묶기
  * - 5분 이상 간격이 있으면 다른 세션으로 분리
@@ -290,6 +300,7 @@ export const generateRadarData = ({
 export default {
   LAPTOP_CATEGORIES,
   isStudyCategory,
+  isNonStudyLabel,
   groupLogsIntoSessions,
   calculateSessionBasedTime,
   calculateBookStudyTime,
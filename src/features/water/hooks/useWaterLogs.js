@@ -3,6 +3,7 @@
 
 import { useState, useEffect, useCallback, useRef } from 'react';
 import { calculateLogStats } from '../utils/logProcessor';
+import { streamAISummary } from '../../../shared/services/apiService';
 
 const API_BASE_URL = 'http://localhost:8000';
 
@@ -225,14 +226,9 @@ export const useWaterLogs = (currentDate, currentUser, _unusedOnHistoryUpdate, s
         laptopInfo: null,
       };
 
-      const response = await fetch(`${API_BASE_URL}/api/summary`, {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify(summaryData),
-      });
-
-      const data = await response.json();
-      setAiSummary(data.summary);
+      // SSE 스트리밍: 생성되는 문장을 바로 화면에 표시
+      const summary = await streamAISummary(summaryData, setAiSummary);
+      setAiSummary(summary || 'AI 요약 생성에 실패했습니다.');
     } catch (error) {
       setAiSummary('AI 요약 생성에 실패했습니다.');
     } finally {
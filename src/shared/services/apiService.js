@@ -40,6 +40,58 @@ export const fetchStudyLogs = async (dateStr) => {
   }
 };
 
+// 2-1. 기간(from~to) 로그 한 번에 가져오기 (주간 차트 / 캘린더용)
+// 반환: { "YYYY-MM-DD": 단일 날짜 API와 같은 형식, ... }
+export const fetchWaterLogsRange = async (fromDate, toDate) => {
+  try {
+    const response = await fetch(`${API_BASE_URL}/api/logs/water?from=${fromDate}&to=${toDate}`);
+
+    if (!response.ok) {
+      console.warn("기간 물 로그를 가져오지 못했습니다.");
+      return {};
+    }
+
+    return await response.json();
+  } catch (error) {
+    console.error("Error fetching water logs range:", error);
+    return {};
+  }
+};
+
+export const fetchStudyLogsRange = async (fromDate, toDate) => {
+  try {
+    const response = await fetch(`${API_BASE_URL}/api/logs/study?from=${fromDate}&to=${toDate}`);
+
+    if (!response.ok) {
+      console.warn("기간 Study 로그를 가져오지 못했습니다.");
+      return {};
+    }
+
+    return await response.json();
+  } catch (error) {
+    console.error("Error fetching study logs range:", error);
+    return {};
+  }
+};
+
+// 2-2. 날짜별 합계(rollup) 가져오기 - 히스토리/대시보드용
+// 반환: [{ date, waterMl, drinkCount, bookMin, laptopMin, sessionCount }, ...]
+export const fetchDailyStats = async (fromDate, toDate) => {
+  try {
+    const response = await fetch(`${API_BASE_URL}/api/stats/daily?from=${fromDate}&to=${toDate}`);
+
+    if (!response.ok) {
+      console.warn("일별 집계를 가져오지 못했습니다.");
+      return [];
+    }
+
+    return await response.json();
+  } catch (error) {
+    console.error("Error fetching daily stats:", error);
+    return [];
+  }
+};
+
 // 3. 이미지 분석 요청
 export const analyzeDrinkImage = async (logId, imageFilename) => {
   try {
@@ -61,31 +113,85 @@ export const analyzeDrinkImage = async (logId, imageFilename) => {
   }
 };
 
+// 3-1. 하루치 캡처 일괄 분석 요청 (백그라운드 작업)
+// 반환: { job_id, status, total } → fetchAnalysisJob(job_id) 로 진행 상황 조회
+export const requestBatchAnalysis = async ({ date = null, imageFilenames = [] } = {}) => {
+  try {
+    const response = await fetch(`${API_BASE_URL}/api/analyze/batch`, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({ date, image_filenames: imageFilenames }),
+    });
+
+    if (!response.ok) throw new Error("Batch analysis request failed");
+    return await response.json();
+  } catch (error) {
+    console.error("Error requesting batch analysis:", error);
+    return null;
+  }
+};
+
+// 반환: { job_id, status, total, done, cached, failed, results: { 파일명: 결과 } }
+export const fetchAnalysisJob = async (jobId) => {
+  try {
+    const response = await fetch(`${API_BASE_URL}/api/analyze/jobs/${jobId}`);
+    if (!response.ok) throw new Error("Job not found");
+    return await response.json();
+  } catch (error) {
+    console.error("Error fetching analysis job:", error);
+    return null;
+  }
+};
+
+// 로그 여러 건 한 번에 수정 (파일당 한 번만 읽고 저장)
+// operations: [{ source_file, log_id, updates }, ...]
+// 반환: { status: "success" | "partial" | "error", results: [...] } (operations 순서와 동일)
+export const updateLogsBatch = async (operations) => {
+  try {
+    const response = await fetch(`${API_BASE_URL}/api/logs/update/batch`, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({ operations }),
+    });
+
+    if (!response.ok) throw new Error("Batch log update failed");
+    return await response.json();
+  } catch (error) {
+    console.error("Error updating logs:", error);
+    return null;
+  }
+};
+
+// 서버 SummaryRequest 형식으로 변환
+const buildSummaryPayload = (data) => {
+  // [수정 포인트] 서버가 float 타입을 기대하므로 확실하게 숫자형으로 변환해서 전송
+  return {
+    date: data.date,
+    waterMl: Number(data.waterMl) || 0,
+    waterGoal: Number(data.waterGoal) || 2000,
+    studyMin: Number(data.studyMin) || 0,
+    studyGoal: Number(data.studyGoal) || 300,
+    
+    // 책 정보가 있을 때만 전송, 숫자형 필드 변환
+    bookInfo: data.bookInfo ? {
+        ...data.bookInfo,
+        readPages: Number(data.bookInfo.readPages) || 0,
+        totalPages: Number(data.bookInfo.totalPages) || 0,
+        durationMin: Number(data.bookInfo.durationMin) || 0,
+    } : null,
+    
+    // 노트북 정보가 있을 때만 전송, 숫자형 필드 변환
+    laptopInfo: data.laptopInfo ? {
+        ...data.laptopInfo,
+        durationMin: Number(data.laptopInfo.durationMin) || 0,
+    } : null
+  };
+};
+
 // 4. AI Daily Summary 생성 요청 (Gemini API)
 export const generateAISummary = async (data) => {
   try {
-    // [수정 포인트] 서버가 float 타입을 기대하므로 확실하게 숫자형으로 변환해서 전송
-    const payload = {
-      date: data.date,
-      waterMl: Number(data.waterMl) || 0,
-      waterGoal: Number(data.waterGoal) || 2000,
-      studyMin: Number(data.studyMin) || 0,
-      studyGoal: Number(data.studyGoal) || 300,
-      
-      // 책 정보가 있을 때만 전송, 숫자형 필드 변환
-      bookInfo: data.bookInfo ? {
-          ...data.bookInfo,
-          readPages: Number(data.bookInfo.readPages) || 0,
-          totalPages: Number(data.bookInfo.totalPages) || 0,
-          durationMin: Number(data.bookInfo.durationMin) || 0,
-      } : null,
-      
-      // 노트북 정보가 있을 때만 전송, 숫자형 필드 변환
-      laptopInfo: data.laptopInfo ? {
-          ...data.laptopInfo,
-          durationMin: Number(data.laptopInfo.durationMin) || 0,
-      } : null
-    };
+    const payload = buildSummaryPayload(data);
 
     const response = await fetch(`${API_BASE_URL}/api/summary`, {
       method: "POST",
@@ -105,3 +211,55 @@ export const generateAISummary = async (data) => {
     return null;
   }
 };
+
+// 4-1. AI Daily Summary 스트리밍 (SSE) - 생성되는 대로 onDelta(지금까지의 문장) 호출
+// 반환: 최종 요약 문자열 (실패 시 서버 기본 문구 또는 null)
+export const streamAISummary = async (data, onDelta) => {
+  try {
+    const response = await fetch(`${API_BASE_URL}/api/summary/stream`, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify(buildSummaryPayload(data)),
+    });
+
+    if (!response.ok || !response.body) {
+      console.warn("AI Summary 스트리밍 실패: 서버 응답 오류");
+      return null;
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+    let text = "";
+    let summary = null;
+
+    while (true) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+
+      // SSE 이벤트는 빈 줄(\n\n)로 구분
+      const events = buffer.split("\n\n");
+      buffer = events.pop();
+
+      events.forEach((raw) => {
+        const dataLine = raw.split("\n").find((line) => line.startsWith("data: "));
+        if (!dataLine) return;
+        const payload = JSON.parse(dataLine.slice(6));
+
+        if (payload.delta !== undefined) {
+          text += payload.delta;
+          if (onDelta) onDelta(text);
+        }
+        if (payload.summary !== undefined) {
+          summary = payload.summary;
+        }
+      });
+    }
+
+    return summary;
+  } catch (error) {
+    console.error("Error streaming AI summary:", error);
+    return null;
+  }
+};
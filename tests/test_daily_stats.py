@@ -0,0 +1,71 @@
+"""
+/api/stats/daily (DailyRollupStore): LOGS_DIR 이 없을 때 / 기간 조회가 그 기간 파일만 확인하는지
+
+실행: python -m pytest tests
+"""
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "server"))
+
+# server.py 는 import 시점에 DATA_DIR 을 읽음
+os.environ.setdefault("DATA_DIR", tempfile.gettempdir())
+os.environ.setdefault("TIMING_LOG_LEVEL", "ERROR")
+
+import server  # noqa: E402
+
+WATER_HEADER = "timestamp,action,object,duration_frames,rise,consistency,gesture_conf,capture_path\n"
+
+
+def use_logs_dir(monkeypatch, logs_dir):
+    monkeypatch.setattr(server, "LOGS_DIR", str(logs_dir))
+    store = server.DailyRollupStore(str(logs_dir / "daily_stats.sqlite3"))
+    monkeypatch.setattr(server, "ROLLUP", store)
+    return store
+
+
+def write_water_log(logs_dir, date_str, times):
+    logs_dir.mkdir(exist_ok=True)
+    with open(logs_dir / f"water_log_{date_str}.csv", "w", encoding="utf-8") as fh:
+        fh.write(WATER_HEADER)
+        for t in times:
+            fh.write(f"{date_str} {t},water_drinking,cup,40,76,0.93,1.0,\n")
+
+
+def test_missing_logs_dir_returns_empty(tmp_path, monkeypatch):
+    logs_dir = tmp_path / "logs"
+    use_logs_dir(monkeypatch, logs_dir)
+
+    assert server.get_daily_stats("2025-09-01", "2025-09-07") == []
+    assert server.get_daily_stats(None, None) == []
+    # 조회만으로 폴더를 만들지 않음
+    assert not logs_dir.exists()
+
+
+def test_range_query_stats_only_requested_dates(tmp_path, monkeypatch):
+    logs_dir = tmp_path / "logs"
+    use_logs_dir(monkeypatch, logs_dir)
+    write_water_log(logs_dir, "2025-09-01", ["09:00:00", "09:30:00"])
+    write_water_log(logs_dir, "2025-09-05", ["10:00:00"])
+
+    signed = []
+    original = server.DailyRollupStore._signature
+    monkeypatch.setattr(server.DailyRollupStore, "_signature",
+                        staticmethod(lambda files: signed.append(files) or original(files)))
+
+    rows = server.get_daily_stats("2025-09-01", "2025-09-02")
+    assert [(r["date"], r["drinkCount"], r["waterMl"]) for r in rows] == [("2025-09-01", 2, 80.0)]
+    assert len(signed) == 1
+    assert all("2025-09-01" in f for f in signed[0]["water"])
+
+    # 전체 조회: 아직 집계에 없는 날짜만 새로 계산, 이미 있는 지난 날짜는 stat 하지 않음
+    signed.clear()
+    rows = server.get_daily_stats(None, None)
+    assert [r["date"] for r in rows] == ["2025-09-01", "2025-09-05"]
+    assert [os.path.basename(f) for files in signed for f in files["water"]] == ["water_log_2025-09-05.csv"]
+
+    # 원본이 사라진 날짜는 집계에서도 제거
+    os.remove(logs_dir / "water_log_2025-09-05.csv")
+    assert [r["date"] for r in server.get_daily_stats(None, None)] == ["2025-09-01"]
@@ -0,0 +1,265 @@
+"""
+HOIDetector 상태 전이 테스트 (카메라 / YOLO / MediaPipe 없이 가짜 박스 + 손 랜드마크로)
+
+실행: python -m pytest tests
+"""
+import os
+import sys
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import hoi_detector  # noqa: E402
+from hoi_detector import HOIDetector  # noqa: E402
+
+IMG_W, IMG_H = 640, 480
+CUP_BOX = (300, 200, 380, 320)    # 80 x 120 → 크기 비율 / 세로 비율 조건 통과
+BOOK_BOX = (100, 250, 260, 400)
+START = datetime(2025, 9, 1, 9, 0, 0)
+
+
+def make_hand(x, y, gesture=None):
+    """손 랜드마크 21개를 (x, y) 픽셀 한 점에 모음, gesture: 'cup' (C 자) / 'pen' (집기)"""
+    nx, ny = x / IMG_W, y / IMG_H
+    landmark = [SimpleNamespace(x=nx, y=ny) for _ in range(21)]
+    if gesture == "cup":
+        landmark[8] = SimpleNamespace(x=nx + 0.1, y=ny)     # 엄지-검지 거리 0.1
+    elif gesture == "pen":
+        landmark[8] = SimpleNamespace(x=nx + 0.02, y=ny)
+        landmark[12] = SimpleNamespace(x=nx, y=ny + 0.02)
+    return SimpleNamespace(landmark=landmark)
+
+
+def box_center(box):
+    x1, y1, x2, y2 = box
+    return (x1 + x2) / 2, (y1 + y2) / 2
+
+
+class Recorder:
+    """capture 대신: 저장 요청만 기록"""
+
+    def __init__(self):
+        self.prefixes = []
+
+    def __call__(self, frame, timestamp_str, prefix):
+        self.prefixes.append(prefix)
+        return f"captures/{prefix}_{len(self.prefixes)}.jpg"
+
+
+class Runner:
+    def __init__(self, **kwargs):
+        self.capture = Recorder()
+        self.detector = HOIDetector(self.capture, **kwargs)
+        self.events = []
+        self.frames = 0
+
+    def step(self, detections, hand):
+        frame = np.zeros((IMG_H, IMG_W, 3), dtype=np.uint8)
+        frame_time = START + timedelta(seconds=self.frames / self.detector.fps)
+        self.frames += 1
+        events = self.detector.process(frame, detections, hand, frame_time)
+        self.events += events
+        return events
+
+    def run(self, count, detections, hand):
+        for _ in range(count):
+            self.step(detections, hand)
+
+
+def water_ready_runner(**kwargs):
+    """시작 직후 DRINKING_COOLDOWN 프레임은 쿨다운 (last_water_detected_frame = 0) → 빈 프레임으로 넘김"""
+    runner = Runner(**kwargs)
+    runner.run(hoi_detector.DRINKING_COOLDOWN, [], None)
+    return runner
+
+
+def cup_detections():
+    return [(CUP_BOX, "cup", 0.9)]
+
+
+def book_detections():
+    return [(BOOK_BOX, "open book", 0.8)]
+
+
+def touch_cup(runner, frames=hoi_detector.WATER_CONTACT_FRAMES):
+    x, y = box_center(CUP_BOX)
+    runner.run(frames, cup_detections(), make_hand(x, y, "cup"))
+
+
+def lift_cup(runner, step_px):
+    """추적 구간 내내 손을 step_px 씩 위로 (컵은 그대로 보임)"""
+    x, y = box_center(CUP_BOX)
+    for i in range(hoi_detector.WATER_TRACKING_FRAMES):
+        runner.step(cup_detections(), make_hand(x, y - step_px * (i + 1), "cup"))
+
+
+# ---------------- 물 마시기 ----------------
+
+def test_water_ignored_during_startup_cooldown():
+    runner = Runner()
+    touch_cup(runner)
+    assert runner.detector.water.state == "idle"
+    assert runner.detector.water.contact_counter == 0
+
+
+def test_water_contact_enters_tracking():
+    runner = water_ready_runner()
+    touch_cup(runner, hoi_detector.WATER_CONTACT_FRAMES - 1)
+    assert runner.detector.water.state == "idle"
+    assert runner.detector.water.contact_counter == hoi_detector.WATER_CONTACT_FRAMES - 1
+
+    touch_cup(runner, 1)
+    assert runner.detector.water.state == "tracking"
+    assert runner.detector.active_interaction == "water"
+    assert runner.detector.water.detected_cup_name == "cup"
+    assert runner.detector.detect_now.is_set()
+
+
+def test_water_contact_resets_when_hand_leaves():
+    runner = water_ready_runner()
+    touch_cup(runner, 3)
+    runner.step(cup_detections(), None)
+    assert runner.detector.water.contact_counter == 0
+    assert runner.detector.water.tracked_cup_box is None
+
+
+def test_water_drinking_logged_after_rise():
+    runner = water_ready_runner()
+    touch_cup(runner)
+    lift_cup(runner, step_px=3)
+
+    assert len(runner.events) == 1
+    prefix, record = runner.events[0]
+    assert prefix == "water"
+    assert record["action"] == "water_drinking"
+    assert record["object"] == "cup"
+    assert record["duration_frames"] == hoi_detector.WATER_TRACKING_FRAMES
+    assert record["rise"] >= hoi_detector.MIN_TOTAL_RISE
+    assert record["consistency"] >= hoi_detector.MOVEMENT_CONSISTENCY
+    assert record["gesture_conf"] == 1.0
+    assert record["capture_path"] == "captures/water_drinking_1.jpg"
+    assert runner.detector.water.state == "idle"
+    assert runner.detector.active_interaction is None
+
+
+def test_water_rejected_without_rise():
+    runner = water_ready_runner()
+    touch_cup(runner)
+    lift_cup(runner, step_px=0)
+
+    assert runner.events == []
+    assert runner.capture.prefixes == []
+    assert runner.detector.water.state == "idle"
+    assert runner.detector.active_interaction is None
+
+
+def test_water_cooldown_blocks_new_contact():
+    runner = water_ready_runner()
+    touch_cup(runner)
+    lift_cup(runner, step_px=3)
+    assert len(runner.events) == 1
+
+    touch_cup(runner, hoi_detector.WATER_CONTACT_FRAMES * 2)
+    assert runner.detector.water.state == "idle"
+    assert runner.detector.water.contact_counter == 0
+
+    # 쿨다운이 끝나면 다시 접촉 판단
+    runner.run(hoi_detector.DRINKING_COOLDOWN, cup_detections(), None)
+    touch_cup(runner)
+    assert runner.detector.water.state == "tracking"
+
+
+def test_water_hand_restored_then_lost():
+    runner = water_ready_runner()
+    touch_cup(runner)
+    lifted = 5
+    x, y = box_center(CUP_BOX)
+    for i in range(lifted):
+        runner.step(cup_detections(), make_hand(x, y - 3 * (i + 1), "cup"))
+
+    # 손이 안 보여도 MISSING_HAND_TOLERANCE 프레임까지는 Kalman 예측으로 추적 유지
+    runner.run(hoi_detector.MISSING_HAND_TOLERANCE, cup_detections(), None)
+    assert runner.detector.water.state == "tracking"
+    assert runner.detector.water.tracking_counter == lifted + hoi_detector.MISSING_HAND_TOLERANCE
+
+    runner.step(cup_detections(), None)
+    assert runner.detector.water.state == "idle"
+    assert runner.detector.active_interaction is None
+    assert runner.events == []
+
+
+# ---------------- 공부 ----------------
+
+def touch_book(runner, frames, gesture="pen"):
+    x, y = box_center(BOOK_BOX)
+    runner.run(frames, book_detections(), make_hand(x, y, gesture))
+
+
+def test_study_session_starts_after_min_frames():
+    runner = Runner()
+    touch_book(runner, hoi_detector.STUDY_MIN_START_FRAMES - 1)
+    assert runner.detector.study.state == "idle"
+    assert runner.capture.prefixes == []
+
+    touch_book(runner, 1)
+    study = runner.detector.study
+    assert study.state == "studying"
+    assert runner.detector.active_interaction == "study"
+    assert study.object_name == "book"
+    assert study.object_detail == "open book"
+    assert study.start_time == "2025-09-01 09:00:02"
+    assert runner.capture.prefixes == ["study_start"]
+
+
+def test_study_session_logged_after_away_frames():
+    runner = Runner(fps=10)
+    touch_book(runner, hoi_detector.STUDY_MIN_START_FRAMES + 200)
+    runner.run(hoi_detector.STUDY_AWAY_FRAMES - 1, book_detections(), None)
+    assert runner.detector.study.state == "studying"
+    assert runner.events == []
+
+    runner.step(book_detections(), None)
+    assert runner.detector.study.state == "idle"
+    assert runner.detector.active_interaction is None
+    assert len(runner.events) == 1
+    prefix, record = runner.events[0]
+    assert prefix == "study"
+    # studying 구간 프레임 수 (손이 떠나 있던 프레임 포함) / fps
+    assert record["duration_sec"] == (200 + hoi_detector.STUDY_AWAY_FRAMES) / 10
+    assert record["object"] == "book"
+    assert record["object_detail"] == "open book"
+    assert record["start_capture"] == "captures/study_start_1.jpg"
+    assert record["end_capture"] == "captures/study_end_2.jpg"
+
+
+def test_study_away_counter_resets_when_hand_returns():
+    runner = Runner()
+    touch_book(runner, hoi_detector.STUDY_MIN_START_FRAMES)
+    runner.run(hoi_detector.STUDY_AWAY_FRAMES - 1, book_detections(), None)
+    touch_book(runner, 1)
+    assert runner.detector.study.away_counter == 0
+    runner.run(hoi_detector.STUDY_AWAY_FRAMES - 1, book_detections(), None)
+    assert runner.detector.study.state == "studying"
+
+
+def test_short_study_session_not_logged():
+    runner = Runner()
+    touch_book(runner, hoi_detector.STUDY_MIN_START_FRAMES)
+    runner.run(hoi_detector.STUDY_AWAY_FRAMES, book_detections(), None)
+    assert hoi_detector.STUDY_AWAY_FRAMES < hoi_detector.STUDY_MIN_SESSION_FRAMES
+    assert runner.detector.study.state == "idle"
+    assert runner.events == []
+    assert runner.capture.prefixes == ["study_start", "study_end"]
+
+
+def test_water_lock_blocks_study():
+    """물 마시기 추적 중에는 공부 물체에 손이 닿아도 공부 시작 카운트 안 함"""
+    runner = water_ready_runner()
+    touch_cup(runner)
+    x, y = box_center(BOOK_BOX)
+    runner.step(cup_detections() + book_detections(), make_hand(x, y, "pen"))
+    assert runner.detector.active_interaction == "water"
+    assert runner.detector.study.start_counter == 0
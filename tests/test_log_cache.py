@@ -0,0 +1,52 @@
+"""
+LogFrameCache: 호출 측 컬럼 수정이 캐시에 남지 않는지, (prefix, date) 가 많아도 락이 쌓이지 않는지
+
+실행: python -m pytest tests
+"""
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "server"))
+
+# server.py 는 import 시점에 DATA_DIR 을 읽음
+os.environ.setdefault("DATA_DIR", tempfile.gettempdir())
+os.environ.setdefault("TIMING_LOG_LEVEL", "ERROR")
+
+import server  # noqa: E402
+
+WATER_HEADER = "timestamp,action,object,duration_frames,rise,consistency,gesture_conf,capture_path\n"
+
+
+def write_water_log(tmp_path, date_str):
+    path = tmp_path / f"water_log_{date_str}.csv"
+    with open(path, "w", encoding="utf-8") as fh:
+        fh.write(WATER_HEADER)
+        fh.write(f"{date_str} 09:00:00,water_drinking,cup,40,76,0.93,1.0,\n")
+    return str(path)
+
+
+def test_column_changes_do_not_leak_into_cache(tmp_path):
+    cache = server.LogFrameCache(1 << 20)
+    path = write_water_log(tmp_path, "2025-09-01")
+
+    df = cache.get("water", "2025-09-01", files=[path])
+    df['id'] = df.index
+    df['rise'] = 0
+    server.build_water_frame(df)
+
+    again = cache.get("water", "2025-09-01", files=[path])
+    assert 'id' not in again.columns
+    assert 'imageUrl' not in again.columns
+    assert again['rise'].tolist() == [76]
+
+
+def test_key_locks_do_not_grow_with_dates(tmp_path):
+    cache = server.LogFrameCache(1)   # 상한이 작아 매번 이전 항목이 LRU 로 빠짐
+    for day in range(1, 29):
+        date_str = f"2025-09-{day:02d}"
+        cache.get("water", date_str, files=[write_water_log(tmp_path, date_str)])
+
+    assert cache.stats()["entries"] == 1
+    assert len(cache._key_locks) == server.LogFrameCache.KEY_LOCK_STRIPES
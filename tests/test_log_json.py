@@ -0,0 +1,69 @@
+"""
+frame_to_json / dump_json 출력이 예전 응답(frame_to_records + jsonable_encoder + JSONResponse)과 바이트 단위로 같은지
+
+실행: python -m pytest tests
+"""
+import json
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "server"))
+
+# server.py 는 import 시점에 DATA_DIR 을 읽음
+os.environ.setdefault("DATA_DIR", tempfile.gettempdir())
+os.environ.setdefault("TIMING_LOG_LEVEL", "ERROR")
+
+import server  # noqa: E402
+
+
+def legacy_body(content):
+    """예전 로그 API: 레코드 dict → jsonable_encoder → JSONResponse"""
+    def frame_to_records(df):
+        df = df.replace([float('inf'), float('-inf')], None)
+        df = df.astype(object).where(pd.notnull(df), None)
+        return df.to_dict(orient="records")
+
+    if isinstance(content, pd.DataFrame):
+        content = frame_to_records(content)
+    else:
+        content = {k: frame_to_records(v) if isinstance(v, pd.DataFrame) else v for k, v in content.items()}
+    return JSONResponse(jsonable_encoder(content)).body.decode("utf-8")
+
+
+def sample_frame():
+    return pd.DataFrame({
+        "timestamp": ["2025-09-01 09:00:00", "2025-09-01T09:05:30", None],
+        "object": ["cup", "컵 / mug", pd.NA],
+        "duration_frames": [40, 41, 42],
+        "consistency": [0.93, 0.1 + 0.2, np.nan],
+        "gesture_conf": [1.0, np.inf, 1e-05],
+        "duration_sec": [600.0, 12345678.9, -np.inf],
+        "imageUrl": ["http://localhost:8000/captures/a.jpg", None, None],
+        "detected_at": pd.to_datetime(["2025-09-01 09:00:00", "2025-09-01 09:00:00.250", None], format="ISO8601"),
+    })
+
+
+def test_frame_to_json_matches_legacy_bytes():
+    df = sample_frame()
+    assert server.frame_to_json(df) == legacy_body(df)
+
+
+def test_study_envelope_matches_legacy_bytes():
+    df = sample_frame()
+    content = {"logs": df, "totalBookMin": 10, "totalLaptopMin": 0,
+               "sessions": [{"start": "2025-09-01 09:00:00", "duration_min": 10.5}], "activityCount": 1}
+    new = server.dump_json({**content, "logs": server.frame_to_json(df)})
+    assert new == legacy_body(content)
+    assert json.loads(new)["logs"][1]["consistency"] == 0.1 + 0.2
+
+
+def test_empty_frame():
+    assert server.frame_to_json(pd.DataFrame()) == "[]"
+    assert server.frame_to_json(sample_frame().iloc[0:0]) == "[]"
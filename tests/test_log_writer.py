@@ -0,0 +1,169 @@
+"""
+DiskWriter(감지 스크립트) 와 서버 rewrite_log_file 이 같은 로그 파일을 동시에 쓸 때 줄이 사라지지 않는지
+
+실행: python -m pytest tests
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "server"))
+
+# server.py 는 import 시점에 DATA_DIR 을 읽음
+os.environ.setdefault("DATA_DIR", tempfile.gettempdir())
+os.environ.setdefault("TIMING_LOG_LEVEL", "ERROR")
+
+import server  # noqa: E402
+from log_writer import DiskWriter, log_file_lock, log_lock_path  # noqa: E402
+
+ROWS = 400
+
+
+def water_record(i):
+    return {
+        "timestamp": f"2025-09-01 09:{i // 60:02d}:{i % 60:02d}", "action": "water_drinking", "object": "cup",
+        "duration_frames": 40, "rise": i, "consistency": 0.9, "gesture_conf": 1.0, "capture_path": "",
+    }
+
+
+def mark_rows(df):
+    """서버 수정 API 흉내: 아직 표시 안 된 행에 ai_result 기록"""
+    if "ai_result" not in df.columns:
+        df["ai_result"] = None
+    todo = df["ai_result"].isna()
+    df.loc[todo, "ai_result"] = "seen"
+    return bool(todo.any()), int(todo.sum())
+
+
+def test_lock_path_is_hidden_next_to_log(tmp_path):
+    path = str(tmp_path / "water_log_2025-09-01.csv")
+    assert log_lock_path(path) == str(tmp_path / ".water_log_2025-09-01.csv.lock")
+    assert server.log_lock_path(path) == log_lock_path(path)
+
+
+def test_writer_waits_for_server_lock(tmp_path):
+    path = str(tmp_path / "water_log_2025-09-01.csv")
+    writer = DiskWriter(8, 0.01)
+    writer.start()
+    try:
+        with server.log_file_lock(path):
+            writer.save_log("water", path, water_record(0))
+            time.sleep(0.2)
+            # 서버가 lock 을 잡고 있는 동안에는 파일을 만들지도 열지도 않음
+            assert not os.path.exists(path)
+    finally:
+        writer.close()
+    assert pd.read_csv(path)["rise"].tolist() == [0]
+
+
+def test_concurrent_rewrite_keeps_buffered_rows(tmp_path):
+    path = str(tmp_path / "water_log_2025-09-01.csv")
+    writer = DiskWriter(64, 0.005)
+    writer.start()
+    done = threading.Event()
+    rewrites = []
+    errors = []
+
+    def rewrite_loop():
+        while not done.is_set():
+            if not os.path.exists(path):
+                time.sleep(0.001)
+                continue
+            try:
+                rewrites.append(server.rewrite_log_file(path, mark_rows))
+            except Exception as e:   # 재시도 소진 등
+                errors.append(e)
+
+    rewriter = threading.Thread(target=rewrite_loop)
+    rewriter.start()
+    try:
+        for i in range(ROWS):
+            writer.save_log("water", path, water_record(i))
+            if i % 10 == 0:
+                time.sleep(0.002)
+    finally:
+        writer.close()
+        done.set()
+        rewriter.join()
+
+    assert errors == []
+    assert sum(1 for n in rewrites if n) > 1   # 실제로 쓰기 도중에 여러 번 고쳐 씀
+
+    df = pd.read_csv(path)
+    # 줄이 사라지거나 두 번 들어가지 않고, 헤더도 한 번만
+    assert sorted(df["rise"].tolist()) == list(range(ROWS))
+    # 서버가 고친 값도 유지 (writer 가 이전 내용으로 덮어쓰지 않음)
+    assert df["ai_result"].notna().sum() == sum(rewrites)
+
+    # lock 을 풀어 둔 상태로 끝남
+    with log_file_lock(path):
+        pass
+
+
+def read_arrow(path):
+    import pyarrow as pa
+    import pyarrow.ipc
+    with pa.OSFile(path, 'rb') as source:
+        return pa.ipc.open_file(source).read_all()
+
+
+def test_arrow_rows_merged_once_per_day(tmp_path):
+    day1 = str(tmp_path / "water_log_2025-09-01.csv")
+    day2 = str(tmp_path / "water_log_2025-09-02.csv")
+    writer = DiskWriter(64, 0.01, log_format="arrow")
+    writer.start()
+    try:
+        for i in range(3):
+            writer.save_log("water", day1, water_record(i))
+        time.sleep(0.1)
+        # 그날 줄은 CSV 에 추가만 함
+        assert os.path.exists(day1)
+        assert not os.path.exists(tmp_path / "water_log_2025-09-01.arrow")
+
+        # 날짜가 바뀌면 전날 CSV → .arrow
+        writer.save_log("water", day2, water_record(3))
+        time.sleep(0.1)
+        assert not os.path.exists(day1)
+        assert read_arrow(str(tmp_path / "water_log_2025-09-01.arrow"))["rise"].to_pylist() == [0, 1, 2]
+    finally:
+        writer.close()
+
+    table = read_arrow(str(tmp_path / "water_log_2025-09-02.arrow"))
+    assert not os.path.exists(day2)
+    assert table.schema.field("rise").type == "int64"
+    assert table["rise"].to_pylist() == [3]
+    assert table["capture_path"].to_pylist() == [None]
+
+
+def test_arrow_merge_appends_and_is_idempotent(tmp_path):
+    from log_writer import csv_line, merge_csv_into_arrow
+
+    path = str(tmp_path / "water_log_2025-09-01.csv")
+    arrow_path = str(tmp_path / "water_log_2025-09-01.arrow")
+
+    def write_csv(records):
+        with open(path, "w", encoding="utf-8", newline="") as fh:
+            fh.write(csv_line(records[0].keys()))
+            fh.writelines(csv_line(r.values()) for r in records)
+
+    write_csv([water_record(0)])
+    merge_csv_into_arrow(path, "water")
+    # 이전 실행이 남긴 CSV → 기존 .arrow 뒤에 이어 붙임
+    write_csv([water_record(1), water_record(2)])
+    with open(path, encoding="utf-8") as fh:
+        leftover = fh.read()
+    merge_csv_into_arrow(path, "water")
+    assert read_arrow(arrow_path)["rise"].to_pylist() == [0, 1, 2]
+
+    # .arrow 교체 후 CSV 삭제 전에 죽은 경우: 같은 CSV 는 다시 합치지 않고 삭제만
+    with open(path, "w", encoding="utf-8", newline="") as fh:
+        fh.write(leftover)
+    merge_csv_into_arrow(path, "water")
+    assert not os.path.exists(path)
+    assert read_arrow(arrow_path)["rise"].to_pylist() == [0, 1, 2]